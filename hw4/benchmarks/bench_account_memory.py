@@ -0,0 +1,80 @@
+# Память на одну активную сессию: login через AccountManager, Account со __slots__
+# против прежнего Account с __dict__ на каждом экземпляре (подкласс без __slots__).
+# Считается всё, что остаётся жить после login: Account, строка login, номер сессии, запись active_accounts.
+# Запуск из каталога hw4: python benchmarks/bench_account_memory.py [sessions]
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests" / "ru" / "hse" / "client")]
+
+import ru.hse.client.AccountManager as account_manager_module
+from ru.hse.Account import Account
+from ru.hse.IAuthorizationSource import IAuthorizationSource
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AccountManager import AccountManager
+from MockAccountDataSource import MockAccountDataSource
+
+
+# Account до __slots__: те же методы, атрибуты в __dict__ экземпляра
+# (подкласс Account не подходит - унаследованные слоты оставили бы его __dict__ пустым)
+DictAccount = type("DictAccount", (), {name: value for name, value in vars(Account).items()
+                                       if name not in Account.__slots__ and name != "__slots__"})
+
+
+class CountingAuthSource(IAuthorizationSource):
+    # Ничего не хранит, чтобы в замер попадала только память клиента
+    def __init__(self):
+        self.session_counter = 0
+
+    def register(self, login: str, password: str) -> OperationResponse:
+        return self.login(login, password)
+
+    def login(self, login: str, password: str) -> OperationResponse:
+        self.session_counter += 1
+        return OperationResponse(OperationResponse.SUCCEED, self.session_counter)
+
+    def logout(self, login: str, active_session: int) -> OperationResponse:
+        return OperationResponse(OperationResponse.SUCCEED)
+
+
+def measure(account_class, sessions):
+    account_manager_module.Account = account_class
+    try:
+        manager = AccountManager(CountingAuthSource(), MockAccountDataSource())
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        for i in range(sessions):
+            manager.login(f"user{i}", "password")
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        assert len(manager.active_accounts) == sessions
+        manager.active_accounts.clear()
+        manager.close()
+        return used / sessions, elapsed
+    finally:
+        account_manager_module.Account = Account
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"sessions={sessions}")
+    results = {}
+    for name, account_class in (("__dict__", DictAccount), ("__slots__", Account)):
+        per_account, elapsed = measure(account_class, sessions)
+        results[name] = per_account
+        print(f"{name:>9}: {per_account:7.1f} bytes/account  total {per_account * sessions / 2 ** 20:7.1f} MB"
+              f"  (login {elapsed:.1f}s under tracemalloc)")
+    print(f"saved: {results['__dict__'] - results['__slots__']:.1f} bytes/account"
+          f"  (x{results['__dict__'] / results['__slots__']:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Сравнение ops/sec: пул keep-alive соединений ApiClient против requests.post на каждую операцию.
+# Запуск из каталога hw4: python benchmarks/bench_api_client_pool.py [ops] [threads]
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests" / "ru" / "hse" / "client")]
+
+import requests
+
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.ApiClient import ApiClient
+from StandInServer import StandInServer
+
+
+class UnpooledApiClient:
+    # Прежняя реализация: новое TCP-соединение и словарь заголовков на каждую операцию
+    def __init__(self, url):
+        self.connection_uri = url
+
+    def get_balance(self, login, session):
+        json_body = {"login": login, "session": session}
+        headers = {'Content-Type': 'application/json'}
+        response = requests.post(f"{self.connection_uri}/account/balance", json=json_body, headers=headers)
+        response.raise_for_status()
+        return OperationResponse.from_string(response.text)
+
+
+def run(api_client, session, ops, threads):
+    per_thread = ops // threads
+
+    def worker():
+        for _ in range(per_thread):
+            api_client.get_balance("bench", session)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with StandInServer() as server:
+        pooled = ApiClient(server.url, max_connections=threads)
+        session = pooled.register("bench", "password").body
+
+        unpooled_rate = run(UnpooledApiClient(server.url), session, ops, threads)
+        pooled_rate = run(pooled, session, ops, threads)
+        pooled.close()
+
+    print(f"ops={ops} threads={threads}")
+    print(f"requests.post per call : {unpooled_rate:10.1f} ops/sec")
+    print(f"pooled keep-alive      : {pooled_rate:10.1f} ops/sec  (x{pooled_rate / unpooled_rate:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Стоимость разбора одного тела ответа (режим 2): javaobj.load против BodyCodec, и полного OperationResponse.decode.
+# Запуск из каталога hw4: python benchmarks/bench_body_codec.py [repeat]
+import base64
+import logging
+import sys
+import timeit
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src")]
+
+from javaobj import load
+
+from ru.hse.BodyCodec import BodyCodec
+from ru.hse.OperationResponse import OperationResponse
+
+VALUES = {"Double": 123.45, "Long": 42, "Boolean": True}
+
+
+def javaobj_decode(string):
+    # прежняя реализация OperationResponse._response_from_string
+    return load(BytesIO(base64.b64decode(string))).value
+
+
+def codec_decode(string):
+    return BodyCodec.JAVA_PRIMITIVES.decode(base64.b64decode(string))
+
+
+def cost_us(func, arg, number):
+    return min(timeit.repeat(lambda: func(arg), number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'body':<10}{'javaobj':>12}{'BodyCodec':>12}{'decode()':>12}   (us per response)")
+    for name, value in VALUES.items():
+        payload = base64.b64encode(BodyCodec.JAVA_PRIMITIVES.encode(value)).decode("ascii")
+        old = cost_us(javaobj_decode, payload, max(1, number // 20))
+        new = cost_us(codec_decode, payload, number)
+        full = cost_us(OperationResponse.decode, f"0|2|{payload}", number)
+        print(f"{name:<10}{old:>12.2f}{new:>12.2f}{full:>12.2f}   (x{old / new:.0f})")
+
+
+if __name__ == "__main__":
+    main()
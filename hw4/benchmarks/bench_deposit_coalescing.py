@@ -0,0 +1,57 @@
+# Мелкие пополнения одного счёта из многих потоков: каждый deposit отдельным запросом
+# против deposit_coalesce_window (одним суммарным deposit за окно). Сервер - StandInServer с задержкой.
+# Запуск из каталога hw4: python benchmarks/bench_deposit_coalescing.py [deposits] [threads] [latency_ms]
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests" / "ru" / "hse" / "client")]
+
+from ru.hse.client.AccountManager import AccountManager
+from ru.hse.client.ApiClient import ApiClient
+from StandInServer import StandInServer
+
+
+def run(server, window, deposits, threads):
+    api_client = ApiClient(server.url, max_connections=threads)
+    manager = AccountManager(api_client, api_client, deposit_coalesce_window=window)
+    login = f"meter{window}"
+    account = manager.register(login, "password")
+    requests_before = server.bank.requests
+    per_thread = deposits // threads
+
+    def worker():
+        for _ in range(per_thread):
+            account.deposit(0.01)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    sent = server.bank.requests - requests_before
+    balance = account.get_balance().body
+    manager.logout(account)
+    api_client.close()
+    assert abs(balance - per_thread * threads * 0.01) < 1e-6, balance
+    return per_thread * threads / elapsed, sent
+
+
+def main():
+    deposits = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 2.0) / 1000
+    with StandInServer(latency=latency) as server:
+        print(f"deposits={deposits} threads={threads} latency={latency * 1000:.0f} ms")
+        for window in (None, 0.001, 0.005):
+            rate, sent = run(server, window, deposits, threads)
+            name = "no coalescing" if window is None else f"window {window * 1000:.0f} ms"
+            print(f"{name:<16}{rate:10.0f} deposits/sec  {sent:6d} server requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Время импорта ru.hse.client.Client по python -X importtime (накопленное, мкс) с порогом регрессии.
+# Запуск из каталога hw4: python benchmarks/bench_import_time.py [runs] [budget_ms]
+# Код возврата 1, если медиана превышает budget_ms; список самых дорогих модулей - в выводе.
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MODULE = "ru.hse.client.Client"
+BUDGET_MS = 40.0
+HEAVY_MODULES = ("requests", "javaobj", "pickle", "base64", "numpy")
+
+
+def import_times(module):
+    # {модуль: накопленное время в мкс} одного холодного импорта в отдельном процессе
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def loaded_modules(module):
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    return subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                          check=True).stdout.split()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else BUDGET_MS
+    samples = [import_times(MODULE) for _ in range(runs)]
+    median_ms = statistics.median(s[MODULE] for s in samples) / 1000
+    # модули запуска интерпретатора (site и т.п.) не относятся к импорту пакета
+    startup = import_times("sys")
+    slowest = sorted(((name, us) for name, us in samples[-1].items() if name not in startup),
+                     key=lambda item: -item[1])[:8]
+
+    print(f"import {MODULE}: median {median_ms:.1f} ms over {runs} runs (budget {budget_ms:.1f} ms)")
+    print(f"heavy modules loaded: {', '.join(loaded_modules(MODULE)) or 'none'}")
+    for name, cumulative_us in slowest:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    if median_ms > budget_ms:
+        print("FAIL: import time budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
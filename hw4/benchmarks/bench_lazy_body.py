@@ -0,0 +1,47 @@
+# Разбор ответов, у которых читается только code (logout, ветки ошибок), и ответов, у которых читается body:
+# немедленное декодирование тела против OperationResponse.decode(..., lazy=True).
+# Запуск из каталога hw4: python benchmarks/bench_lazy_body.py [repeat]
+import base64
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src")]
+
+from ru.hse.BodyCodec import BodyCodec
+from ru.hse.OperationResponse import OperationResponse
+
+DOUBLE = "0|2|" + base64.b64encode(BodyCodec.JAVA_PRIMITIVES.encode(123.45)).decode("ascii")
+# поток, который не попадает в быстрый путь BodyCodec и разбирается javaobj
+OTHER = "0|2|" + base64.b64encode(BodyCodec.JAVA_PRIMITIVES.encode(123.45) + b"\x00").decode("ascii")
+
+
+def code_only(lazy):
+    return lambda s: OperationResponse.decode(s, lazy=lazy).code
+
+
+def code_and_body(lazy):
+    def read(s):
+        response = OperationResponse.decode(s, lazy=lazy)
+        return response.body, response.code
+    return read
+
+
+def rate(func, string, number):
+    return number / min(timeit.repeat(lambda: func(string), number=number, repeat=3))
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'workload':<26}{'eager':>14}{'lazy':>14}")
+    for body_name, string, runs in (("Double", DOUBLE, number), ("javaobj class", OTHER, max(1, number // 20))):
+        for name, make in (("code only", code_only), ("code + body", code_and_body)):
+            eager, lazy = rate(make(False), string, runs), rate(make(True), string, runs)
+            print(f"{body_name + ', ' + name:<26}{eager:>10.0f}/sec{lazy:>10.0f}/sec  (x{lazy / eager:.2f})")
+
+
+if __name__ == "__main__":
+    main()
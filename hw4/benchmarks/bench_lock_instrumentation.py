@@ -0,0 +1,67 @@
+# Стоимость instrument_locks на цикле login/logout в памяти (выключено против включено)
+# и отчёт get_lock_metrics() для потоков, упирающихся в одну полосу login_locks.
+# Запуск из каталога hw4: python benchmarks/bench_lock_instrumentation.py [cycles] [threads]
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests" / "ru" / "hse" / "client")]
+
+from ru.hse.client.AccountManager import AccountManager
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class SlowAuthorizationSource(MockAuthorizationSource):
+    def login(self, login, password):
+        time.sleep(0.001)
+        return super().login(login, password)
+
+
+def cycles_per_second(instrument_locks, cycles):
+    manager = AccountManager(MockAuthorizationSource(), MockAccountDataSource(), instrument_locks=instrument_locks)
+    manager.register("user", "password")
+    manager.logout(manager.active_accounts["user"])
+    start = time.perf_counter()
+    for _ in range(cycles):
+        manager.logout(manager.login("user", "password"))
+    return cycles / (time.perf_counter() - start)
+
+
+def contention_report(threads):
+    manager = AccountManager(SlowAuthorizationSource(), MockAccountDataSource(), instrument_locks=True,
+                             login_lock_stripes=1)
+    for i in range(threads):
+        manager.register(f"user{i}", "password")
+        manager.logout(manager.active_accounts[f"user{i}"])
+
+    def worker(login):
+        for _ in range(20):
+            manager.logout(manager.login(login, "password"))
+
+    workers = [threading.Thread(target=worker, args=(f"user{i}",)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    for name, lock in manager.get_lock_metrics().items():
+        for operation, stats in sorted(lock["operations"].items()):
+            print(f"  {name:<16}{operation:<22}{stats['acquisitions']:7d} acq {stats['contended']:6d} contended"
+                  f"  wait max {stats['wait_max_us'] / 1000:8.2f} ms  hold max {stats['hold_max_us'] / 1000:8.2f} ms")
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    disabled = cycles_per_second(False, cycles)
+    enabled = cycles_per_second(True, cycles)
+    print(f"login+logout cycles/sec: instrumentation off {disabled:10.0f}   on {enabled:10.0f}"
+          f"  ({(disabled / enabled - 1) * 100:.0f}% overhead when on)")
+    print(f"lock metrics, {threads} threads on one login stripe, server latency 1 ms:")
+    contention_report(threads)
+
+
+if __name__ == "__main__":
+    main()
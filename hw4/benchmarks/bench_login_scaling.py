@@ -0,0 +1,71 @@
+# Масштабирование login по числу потоков при задержке сервера: общая блокировка
+# (login_lock_stripes=1, как прежний accounts_lock) против полос блокировок по login,
+# и AccountManager.login_many для всех login сразу.
+# Запуск из каталога hw4: python benchmarks/bench_login_scaling.py [logins] [latency_ms]
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests" / "ru" / "hse" / "client")]
+
+from ru.hse.client.AccountManager import AccountManager
+from ru.hse.client.ApiClient import ApiClient
+from StandInServer import StandInServer
+
+
+def run(server, stripes, logins, threads):
+    api_client = ApiClient(server.url, max_connections=threads)
+    manager = AccountManager(api_client, api_client, login_lock_stripes=stripes)
+    users = [f"user{i}" for i in range(logins)]
+    per_thread = [users[i::threads] for i in range(threads)]
+
+    def worker(own_users):
+        for user in own_users:
+            account = manager.login(user, "password")
+            assert account is not None, manager.get_exceptions()[-1:]
+
+    workers = [threading.Thread(target=worker, args=(own_users,)) for own_users in per_thread]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    for user in users:
+        manager.logout(manager.active_accounts[user])
+    return logins / elapsed
+
+
+def run_many(server, logins, workers):
+    api_client = ApiClient(server.url, max_connections=workers)
+    manager = AccountManager(api_client, api_client)
+    users = [f"user{i}" for i in range(logins)]
+    start = time.perf_counter()
+    accounts = manager.login_many(((user, "password") for user in users), max_workers=workers)
+    elapsed = time.perf_counter() - start
+    for account in accounts:
+        manager.logout(account)
+    return logins / elapsed
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 10.0) / 1000
+    with StandInServer(latency=latency) as server:
+        for i in range(logins):
+            server.bank.passwords[f"user{i}"] = AccountManager.get_encoded_password("password")
+            server.bank.balances[f"user{i}"] = 0.0
+        print(f"logins={logins} latency={latency * 1000:.0f} ms")
+        for threads in (1, 2, 4, 8, 16, 32):
+            global_lock = run(server, 1, logins, threads)
+            striped = run(server, AccountManager.LOGIN_LOCK_STRIPES, logins, threads)
+            print(f"threads={threads:<3} global lock {global_lock:8.0f} logins/sec   striped {striped:8.0f} logins/sec"
+                  f"  (x{striped / global_lock:.1f})")
+        for workers in (AccountManager.BULK_WORKERS, 64):
+            print(f"login_many(max_workers={workers}) {run_many(server, logins, workers):8.0f} logins/sec")
+
+
+if __name__ == "__main__":
+    main()
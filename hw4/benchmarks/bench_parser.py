@@ -0,0 +1,41 @@
+# Сравнение скорости разбора строк ответа: OperationResponse.from_string против OperationResponse.decode.
+# Запуск из каталога hw4: python benchmarks/bench_parser.py [repeat]
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests" / "ru" / "hse" / "client")]
+
+from ru.hse.OperationResponse import OperationResponse
+from StandInServer import java_result_string
+
+CORPORA = {
+    # ответы без тела и с текстом - только разбор рамки протокола
+    "codes": ["0", "2", "6", "11", "-1"],
+    "text": [java_result_string(1, "already logged"), java_result_string(3, "no such user")],
+    "nested x3": ["4|3|4|3|4|3|0|1|text"],
+    "nested x50": ["4|3|" * 50 + "6"],
+    # тело - Java Double, основная часть времени уходит на десериализацию
+    "double": [java_result_string(0, 123.45)],
+}
+
+
+def rate(parse, corpus, repeat):
+    number = max(1, repeat // len(corpus))
+    seconds = min(timeit.repeat(lambda: [parse(s) for s in corpus], number=number, repeat=3))
+    return number * len(corpus) / seconds
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'corpus':<12}{'from_string':>16}{'decode':>16}")
+    for name, corpus in CORPORA.items():
+        runs = repeat if name != "double" else max(1, repeat // 20)
+        old = rate(OperationResponse.from_string, corpus, runs)
+        new = rate(OperationResponse.decode, corpus, runs)
+        print(f"{name:<12}{old:>12.0f}/sec{new:>12.0f}/sec  (x{new / old:.2f})")
+
+
+if __name__ == "__main__":
+    main()
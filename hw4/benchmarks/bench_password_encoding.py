@@ -0,0 +1,46 @@
+# Логинов/sec с дорогим KDF (scrypt): кодирование в вызывающих потоках против ProcessPoolPasswordEncoder
+# при разном числе потоков login_many. Сервер - MockAuthorizationSource в памяти.
+# Запуск из каталога hw4: python benchmarks/bench_password_encoding.py [logins] [scrypt_n]
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests" / "ru" / "hse" / "client")]
+
+from ru.hse.client.AccountManager import AccountManager
+from ru.hse.client.ProcessPoolPasswordEncoder import ProcessPoolPasswordEncoder
+from ru.hse.client.ScryptPasswordEncoder import ScryptPasswordEncoder
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+def run(encoder, credentials, workers):
+    auth_source = MockAuthorizationSource()
+    manager = AccountManager(auth_source, MockAccountDataSource(), password_encoder=encoder)
+    start = time.perf_counter()
+    results = manager.register_many(credentials, max_workers=workers)
+    elapsed = time.perf_counter() - start
+    assert all(r is not None and not isinstance(r, Exception) for r in results), manager.get_exceptions()[-1:]
+    return len(credentials) / elapsed
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 2 ** 14
+    cores = os.cpu_count() or 1
+    kdf = ScryptPasswordEncoder(b"bench", n=n)
+    credentials = [(f"user{i}", "password") for i in range(logins)]
+    print(f"logins={logins} scrypt n={n} cores={cores}")
+    for workers in sorted({1, 2, 4, cores, 2 * cores}):
+        inline = run(kdf, credentials, workers)
+        with ProcessPoolPasswordEncoder(kdf, max_workers=min(workers, cores)) as pooled:
+            pooled.encode("warmup", "password")
+            offloaded = run(pooled, credentials, workers)
+        print(f"workers={workers:<3} inline {inline:8.1f} logins/sec   process pool {offloaded:8.1f} logins/sec"
+              f"  (x{offloaded / inline:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Ответы (код, баланс) в массивы NumPy и обратно: объект OperationResponse на запись
+# против колоночных OperationResponse.decode_many / encode_many.
+# Запуск из каталога hw4: python benchmarks/bench_response_columns.py [records]
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src")]
+
+import numpy as np
+
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.OperationResponseStream import OperationResponseStream
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def per_record_decode(data):
+    responses = list(OperationResponseStream.read(io.BytesIO(data)))
+    codes = np.fromiter((r.code for r in responses), dtype=np.int64, count=len(responses))
+    values = np.fromiter((r.body if r.body is not None else np.nan for r in responses), dtype=np.float64,
+                         count=len(responses))
+    return codes, values
+
+
+def per_record_encode(codes, values):
+    target = io.BytesIO()
+    OperationResponseStream.write((OperationResponse(int(c), None if np.isnan(v) else float(v))
+                                   for c, v in zip(codes.tolist(), values.tolist())), target)
+    return target.getvalue()
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(1)
+    responses = (OperationResponse(0, rng.uniform(0, 1e6)) if rng.random() < 0.9 else OperationResponse.NO_MONEY_RESPONSE
+                 for _ in range(records))
+    target = io.BytesIO()
+    OperationResponseStream.write(responses, target)
+    data = target.getvalue()
+
+    (codes, values), old_decode = timed(lambda: per_record_decode(data))
+    columns, new_decode = timed(lambda: OperationResponse.decode_many(data))
+    assert np.array_equal(codes, columns.codes) and np.array_equal(values, columns.values, equal_nan=True)
+    encoded_old, old_encode = timed(lambda: per_record_encode(codes, values))
+    encoded_new, new_encode = timed(lambda: OperationResponse.encode_many(columns))
+    assert encoded_old == encoded_new == data
+
+    print(f"records={records} ({len(data) / 2 ** 20:.0f} MB)")
+    print(f"decode: per record {records / old_decode:12.0f}/sec   decode_many {records / new_decode:12.0f}/sec"
+          f"  (x{old_decode / new_decode:.1f})")
+    print(f"encode: per record {records / old_encode:12.0f}/sec   encode_many {records / new_encode:12.0f}/sec"
+          f"  (x{old_encode / new_encode:.1f})")
+
+
+if __name__ == "__main__":
+    main()
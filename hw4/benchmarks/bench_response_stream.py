@@ -0,0 +1,65 @@
+# Пропускная способность OperationResponseStream на файле заданного размера (MB) и пиковая память процесса.
+# Запуск из каталога hw4: python benchmarks/bench_response_stream.py [size_mb] [dir]
+# Для архивов в несколько GB: python benchmarks/bench_response_stream.py 4096 /путь/с/местом
+import itertools
+import mmap
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src")]
+
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.OperationResponseStream import OperationResponseStream
+
+SAMPLE = [
+    OperationResponse(OperationResponse.SUCCEED, 123.45),
+    OperationResponse.SUCCEED_RESPONSE,
+    OperationResponse(OperationResponse.NO_MONEY, 10.0),
+    OperationResponse.INCORRECT_SESSION_RESPONSE,
+    OperationResponse(OperationResponse.ALREADY_LOGGED, "already logged"),
+]
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def report(name, seconds, size, count):
+    print(f"{name:<28}{size / seconds / 2 ** 20:10.1f} MB/s{count / seconds:12.0f} resp/s   peak RSS {peak_rss_mb():.0f} MB")
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    directory = sys.argv[2] if len(sys.argv) > 2 else None
+    line_size = sum(len(r.to_result_string()) + 1 for r in SAMPLE) / len(SAMPLE)
+    count = int(size_mb * 2 ** 20 / line_size)
+    fd, path = tempfile.mkstemp(suffix=".log", dir=directory)
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        with open(path, "wb") as f:
+            OperationResponseStream.write(itertools.islice(itertools.cycle(SAMPLE), count), f)
+        size = os.path.getsize(path)
+        report("write", time.perf_counter() - start, size, count)
+
+        for name, lazy, use_mmap in (("read file, eager", False, False), ("read file, lazy, code only", True, False),
+                                     ("read mmap, lazy, code only", True, True)):
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                if use_mmap:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        parsed = sum(1 for r in OperationResponseStream.read(mapped, lazy=lazy) if r.code >= 0)
+                else:
+                    parsed = sum(1 for r in OperationResponseStream.read(f, lazy=lazy) if r.code >= 0)
+            report(name, time.perf_counter() - start, size, parsed)
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
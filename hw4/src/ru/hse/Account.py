@@ -1,13 +1,23 @@
 import string
+import time
+from contextlib import contextmanager
 
+from ru.hse.AccountBatch import AccountBatch
 from ru.hse.OperationResponse import OperationResponse
 
 
 class Account:
+    # Без __dict__: в долгоживущих процессах одновременно хранятся миллионы Account
+    __slots__ = ("storage", "login", "active_session", "balance_cache", "deposit_coalescer", "last_used")
+
     def __init__(self, login):
         self.storage = None
         self.login = login
         self.active_session = None
+        self.balance_cache = None
+        self.deposit_coalescer = None
+        # время последней операции (time.monotonic) - по нему SessionEvictor находит простаивающие сессии
+        self.last_used = time.monotonic()
 
     def get_login(self) -> str:
         return self.login
@@ -15,58 +25,154 @@ class Account:
     def get_active_session(self):
         return self.active_session
 
-    def withdraw(self, amount):
+    def withdraw(self, amount, timeout=None):
+        if self.storage is None:
+            return OperationResponse.CONNECTION_ERROR_RESPONSE
+        if self.active_session is None:
+            return OperationResponse.NOT_LOGGED_RESPONSE
+        self.last_used = time.monotonic()
+
+        generation = self.cache_generation(write=True)
+        try:
+            response = self.storage.withdraw(self.login, self.active_session, amount, **self.deadline_kwargs(timeout))
+            return self.cache_response(self.map_withdraw_response(response), generation)
+        finally:
+            self.cache_write_done()
+
+    def deposit(self, amount, timeout=None):
+        if self.storage is None:
+            return OperationResponse.CONNECTION_ERROR_RESPONSE
+        if self.active_session is None:
+            return OperationResponse.NOT_LOGGED_RESPONSE
+        self.last_used = time.monotonic()
+        # пополнения с собственным timeout не объединяются: их ответ нужен к сроку
+        if self.deposit_coalescer is not None and timeout is None:
+            return self.deposit_coalescer.deposit(self.send_deposit, amount)
+        return self.send_deposit(amount, timeout)
+
+    def send_deposit(self, amount, timeout=None):
+        generation = self.cache_generation(write=True)
+        try:
+            response = self.storage.deposit(self.login, self.active_session, amount, **self.deadline_kwargs(timeout))
+            return self.cache_response(self.map_deposit_response(response), generation)
+        finally:
+            self.cache_write_done()
+
+    def get_balance(self, timeout=None):
         if self.storage is None:
             return OperationResponse.CONNECTION_ERROR_RESPONSE
         if self.active_session is None:
             return OperationResponse.NOT_LOGGED_RESPONSE
+        self.last_used = time.monotonic()
+        if self.balance_cache is not None:
+            cached = self.balance_cache.get(self.active_session)
+            if cached is not None:
+                return OperationResponse(OperationResponse.SUCCEED, cached)
+
+        generation = self.cache_generation(write=False)
+        response = self.storage.get_balance(self.login, self.active_session, **self.deadline_kwargs(timeout))
+        return self.cache_response(self.map_balance_response(response), generation)
+
+    def init_balance_cache(self, balance_cache):
+        self.balance_cache = balance_cache
+
+    def init_deposit_coalescer(self, deposit_coalescer):
+        self.deposit_coalescer = deposit_coalescer
+
+    def flush_deposits(self):
+        if self.deposit_coalescer is not None:
+            self.deposit_coalescer.flush()
+
+    def cache_generation(self, write):
+        # поколение кэша до отправки запроса: ответ, после которого отправлена другая запись, не кэшируется
+        # запись после ответа обязательно завершается cache_write_done
+        if self.balance_cache is None:
+            return None
+        return self.balance_cache.begin_write() if write else self.balance_cache.begin_read()
 
-        response = self.storage.withdraw(self.login, self.active_session, amount)
+    def cache_write_done(self):
+        if self.balance_cache is not None:
+            self.balance_cache.end_write()
+
+    def cache_response(self, response, generation=None):
+        if self.balance_cache is not None:
+            self.balance_cache.update(self.active_session, response, generation)
+        return response
+
+    @staticmethod
+    def deadline_kwargs(timeout):
+        # timeout в секундах на всю операцию; источнику данных передаётся абсолютный deadline,
+        # чтобы его соблюдали и повторные/параллельные запросы внутри источника
+        if timeout is None:
+            return {}
+        return {"deadline": time.monotonic() + timeout}
+
+    @contextmanager
+    def batch(self):
+        # with account.batch() as b: b.deposit(10); b.get_balance()  ->  b.results после выхода из блока
+        batch = AccountBatch(self)
+        yield batch
+        batch.execute()
+
+    # Преобразование ответов источника данных, общее для Account и AsyncAccount
+    @staticmethod
+    def map_withdraw_response(response):
         if response.code == OperationResponse.CONNECTION_ERROR:
             return OperationResponse.CONNECTION_ERROR_RESPONSE
+        elif response.code == OperationResponse.DEADLINE_EXCEEDED:
+            return OperationResponse.DEADLINE_EXCEEDED_RESPONSE
+        elif response.code == OperationResponse.POOL_EXHAUSTED:
+            return OperationResponse.POOL_EXHAUSTED_RESPONSE
         elif response.code == OperationResponse.INCORRECT_SESSION:
             return OperationResponse.INCORRECT_SESSION_RESPONSE
         elif response.code == OperationResponse.NOT_LOGGED:
             return OperationResponse.NOT_LOGGED_RESPONSE
         elif response.code == OperationResponse.NO_MONEY:
+            response = response.resolved()
             if isinstance(response.body, float):
                 return OperationResponse(OperationResponse.NO_MONEY, response.body)
         elif response.code == OperationResponse.UNDEFINED_ERROR:
             return response
         elif response.code == OperationResponse.SUCCEED:
+            response = response.resolved()
             if isinstance(response.body, float):
                 return OperationResponse(OperationResponse.SUCCEED, response.body)
 
+        if response.code == OperationResponse.UNDEFINED_ERROR:
+            # тело ленивого ответа (LazyOperationResponse) не декодировалось
+            return response
         return OperationResponse(OperationResponse.INCORRECT_RESPONSE, response)
 
-    def deposit(self, amount):
-        if self.storage is None:
-            return OperationResponse.CONNECTION_ERROR_RESPONSE
-        if self.active_session is None:
-            return OperationResponse.NOT_LOGGED_RESPONSE
-
-        response = self.storage.deposit(self.login, self.active_session, amount)
+    @staticmethod
+    def map_deposit_response(response):
         if response.code == OperationResponse.CONNECTION_ERROR:
             return OperationResponse.CONNECTION_ERROR_RESPONSE
+        elif response.code == OperationResponse.DEADLINE_EXCEEDED:
+            return OperationResponse.DEADLINE_EXCEEDED_RESPONSE
+        elif response.code == OperationResponse.POOL_EXHAUSTED:
+            return OperationResponse.POOL_EXHAUSTED_RESPONSE
         elif response.code == OperationResponse.NOT_LOGGED:
             return OperationResponse.NOT_LOGGED_RESPONSE
         elif response.code == OperationResponse.UNDEFINED_ERROR:
             return response
         elif response.code == OperationResponse.SUCCEED:
+            response = response.resolved()
             if isinstance(response.body, float):
                 return OperationResponse(OperationResponse.SUCCEED, response.body)
 
+        if response.code == OperationResponse.UNDEFINED_ERROR:
+            # тело ленивого ответа (LazyOperationResponse) не декодировалось
+            return response
         return OperationResponse(OperationResponse.INCORRECT_RESPONSE, response)
 
-    def get_balance(self):
-        if self.storage is None:
-            return OperationResponse.CONNECTION_ERROR_RESPONSE
-        if self.active_session is None:
-            return OperationResponse.NOT_LOGGED_RESPONSE
-
-        response = self.storage.get_balance(self.login, self.active_session)
+    @staticmethod
+    def map_balance_response(response):
         if response.code == OperationResponse.CONNECTION_ERROR:
             return OperationResponse.CONNECTION_ERROR_RESPONSE
+        elif response.code == OperationResponse.DEADLINE_EXCEEDED:
+            return OperationResponse.DEADLINE_EXCEEDED_RESPONSE
+        elif response.code == OperationResponse.POOL_EXHAUSTED:
+            return OperationResponse.POOL_EXHAUSTED_RESPONSE
         elif response.code == OperationResponse.NOT_LOGGED:
             return OperationResponse.NOT_LOGGED_RESPONSE
         elif response.code == OperationResponse.INCORRECT_SESSION:
@@ -74,9 +180,13 @@ class Account:
         elif response.code == OperationResponse.UNDEFINED_ERROR:
             return response
         elif response.code == OperationResponse.SUCCEED:
+            response = response.resolved()
             if isinstance(response.body, float):
                 return OperationResponse(OperationResponse.SUCCEED, response.body)
 
+        if response.code == OperationResponse.UNDEFINED_ERROR:
+            # тело ленивого ответа (LazyOperationResponse) не декодировалось
+            return response
         return OperationResponse(OperationResponse.INCORRECT_RESPONSE, response)
 
     def init_data_storage(self, accounts_data):
@@ -0,0 +1,58 @@
+import time
+from typing import List, Optional
+
+from ru.hse.OperationResponse import OperationResponse
+
+
+class AccountBatch:
+    # Накопитель операций Account.batch(): операции отправляются одним запросом при выходе из блока,
+    # results содержит OperationResponse в порядке добавления (с той же обработкой кодов, что у Account)
+    def __init__(self, account):
+        self.account = account
+        self.operations = []
+        self.results: Optional[List[OperationResponse]] = None
+
+    def withdraw(self, amount) -> int:
+        return self.add("withdraw", amount)
+
+    def deposit(self, amount) -> int:
+        return self.add("deposit", amount)
+
+    def get_balance(self) -> int:
+        return self.add("balance", None)
+
+    def add(self, name: str, amount) -> int:
+        if self.results is not None:
+            raise RuntimeError("Batch was already executed")
+        self.operations.append((name, amount))
+        return len(self.operations) - 1
+
+    def execute(self) -> List[OperationResponse]:
+        if self.results is not None:
+            return self.results
+        account = self.account
+        if account.storage is None:
+            self.results = [OperationResponse.CONNECTION_ERROR_RESPONSE] * len(self.operations)
+        elif account.active_session is None:
+            self.results = [OperationResponse.NOT_LOGGED_RESPONSE] * len(self.operations)
+        elif not self.operations:
+            self.results = []
+        else:
+            account.last_used = time.monotonic()
+            ops = [(name, account.login, account.active_session, amount) for name, amount in self.operations]
+            # операции пакета выполняются по порядку: последний ответ с балансом - самый новый
+            write = any(name != "balance" for name, _ in self.operations)
+            generation = account.cache_generation(write=write)
+            try:
+                responses = account.storage.execute_batch(ops)
+                mappers = {
+                    "withdraw": account.map_withdraw_response,
+                    "deposit": account.map_deposit_response,
+                    "balance": account.map_balance_response,
+                }
+                self.results = [account.cache_response(mappers[name](response), generation)
+                                for (name, _), response in zip(self.operations, responses)]
+            finally:
+                if write:
+                    account.cache_write_done()
+        return self.results
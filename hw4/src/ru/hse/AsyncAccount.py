@@ -0,0 +1,45 @@
+from ru.hse.Account import Account
+from ru.hse.OperationResponse import OperationResponse
+
+
+class AsyncAccount:
+    def __init__(self, login):
+        self.storage = None
+        self.login = login
+        self.active_session = None
+
+    def get_login(self) -> str:
+        return self.login
+
+    def get_active_session(self):
+        return self.active_session
+
+    async def withdraw(self, amount):
+        if self.storage is None:
+            return OperationResponse.CONNECTION_ERROR_RESPONSE
+        if self.active_session is None:
+            return OperationResponse.NOT_LOGGED_RESPONSE
+
+        response = await self.storage.withdraw(self.login, self.active_session, amount)
+        return Account.map_withdraw_response(response)
+
+    async def deposit(self, amount):
+        if self.storage is None:
+            return OperationResponse.CONNECTION_ERROR_RESPONSE
+        if self.active_session is None:
+            return OperationResponse.NOT_LOGGED_RESPONSE
+
+        response = await self.storage.deposit(self.login, self.active_session, amount)
+        return Account.map_deposit_response(response)
+
+    async def get_balance(self):
+        if self.storage is None:
+            return OperationResponse.CONNECTION_ERROR_RESPONSE
+        if self.active_session is None:
+            return OperationResponse.NOT_LOGGED_RESPONSE
+
+        response = await self.storage.get_balance(self.login, self.active_session)
+        return Account.map_balance_response(response)
+
+    def init_data_storage(self, accounts_data):
+        self.storage = accounts_data
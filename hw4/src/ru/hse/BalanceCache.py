@@ -0,0 +1,84 @@
+import threading
+import time
+from typing import Optional
+
+from ru.hse.Metrics import Metrics
+from ru.hse.OperationResponse import OperationResponse
+
+
+class BalanceCache:
+    # Последний известный баланс одной сессии Account.
+    # Заполняется ответами withdraw/deposit/get_balance (write-through), живёт ttl секунд,
+    # сбрасывается любым ответом с кодом ошибки, сменой сессии и logout.
+    # Поколение растёт при отправке каждой записи и при сбросе: запрос берёт номер поколения до отправки
+    # (begin_read/begin_write), и его ответ попадает в кэш, только если после него не отправлялась
+    # другая запись. Иначе ответ мог отразить состояние сервера до этой записи и затёр бы более новый баланс.
+    # Запрос, отправленный при незавершённой записи (end_write ещё не вызван), не кэшируется вовсе:
+    # сервер мог применить их в любом порядке. Пока запись не завершена, закэшированный баланс не отдаётся.
+    STALE = -1
+    def __init__(self, ttl: float, metrics: Optional[Metrics] = None, clock=time.monotonic):
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.ttl = ttl
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.session = None
+        self.balance = None
+        self.expires_at = 0.0
+        self.generation = 0
+        self.writes = 0
+
+    def get(self, session) -> Optional[float]:
+        with self.lock:
+            if self.balance is not None and self.session == session and self.clock() < self.expires_at:
+                balance = self.balance
+            else:
+                balance = None
+        self.metrics.increment("balance_cache.misses" if balance is None else "balance_cache.hits")
+        return balance
+
+    def begin_read(self) -> int:
+        with self.lock:
+            return self.generation if self.writes == 0 else self.STALE
+
+    def begin_write(self) -> int:
+        # каждому begin_write соответствует end_write после получения ответа (или исключения)
+        with self.lock:
+            overlapped = self.writes > 0
+            self.writes += 1
+            self.generation += 1
+            self.balance = None
+            return self.STALE if overlapped else self.generation
+
+    def end_write(self):
+        with self.lock:
+            self.writes -= 1
+
+    def put(self, session, balance: float, generation: Optional[int] = None) -> bool:
+        # generation - номер от begin_read/begin_write до отправки запроса (None - без проверки)
+        with self.lock:
+            stale = generation is not None and generation != self.generation
+            if not stale:
+                self.session = session
+                self.balance = balance
+                self.expires_at = self.clock() + self.ttl
+        if stale:
+            self.metrics.increment("balance_cache.stale_fills")
+        return not stale
+
+    def update(self, session, response: OperationResponse, generation: Optional[int] = None):
+        # NO_MONEY тоже несёт текущий баланс с сервера
+        if response.code in (OperationResponse.SUCCEED, OperationResponse.NO_MONEY) \
+                and isinstance(response.body, float):
+            self.put(session, response.body, generation)
+        else:
+            self.invalidate()
+
+    def invalidate(self):
+        with self.lock:
+            if self.balance is not None:
+                self.metrics.increment("balance_cache.invalidations")
+            self.session = None
+            self.balance = None
+            self.generation += 1
@@ -0,0 +1,101 @@
+import struct
+from io import BytesIO
+from typing import Any, List, Optional, Tuple
+
+# Элементы потока Java-сериализации (java.io.ObjectStreamConstants)
+STREAM_HEADER = b"\xac\xed\x00\x05"
+TC_NULL = b"\x70"
+TC_STRING = b"\x74"
+TC_LONGSTRING = b"\x7c"
+NUMBER_CLASS_DESC = b"\x72\x00\x10java.lang.Number\x86\xac\x95\x1d\x0b\x94\xe0\x8b\x02\x00\x00\x78" + TC_NULL
+
+
+def java_class_prefix(name: str, serial_version_uid: str, type_code: str, superclass: bytes) -> bytes:
+    # Начало потока с одним объектом класса name, у которого единственное примитивное поле value
+    encoded_name = name.encode("ascii")
+    return (STREAM_HEADER + b"\x73\x72" + struct.pack(">H", len(encoded_name)) + encoded_name
+            + bytes.fromhex(serial_version_uid) + b"\x02\x00\x01" + type_code.encode("ascii")
+            + b"\x00\x05value\x78" + superclass)
+
+
+class BodyCodec:
+    # Реестр кодеков тел ответов (режим 2).
+    # Для зарегистрированных классов поток Java-сериализации разбирается и строится через struct:
+    # префикс потока постоянен, за ним следует только значение поля value.
+    # Потоки остальных классов разбираются javaobj, объекты остальных типов кодируются pickle, как раньше.
+    def __init__(self):
+        self.decoders: List[Tuple[bytes, int, struct.Struct]] = []
+        self.encoders = {str: self.encode_string}
+
+    def register(self, prefix: bytes, value_format: str, python_type: Optional[type] = None):
+        # python_type=None - класс только разбирается, но не используется при кодировании
+        value_struct = struct.Struct(value_format)
+        self.decoders.append((prefix, len(prefix) + value_struct.size, value_struct))
+        if python_type is not None:
+            self.encoders[python_type] = lambda value: prefix + value_struct.pack(value)
+
+    def decode(self, data: bytes) -> Any:
+        for prefix, size, value_struct in self.decoders:
+            if len(data) == size and data.startswith(prefix):
+                return value_struct.unpack_from(data, len(prefix))[0]
+        if data[:5] in (STREAM_HEADER + TC_STRING, STREAM_HEADER + TC_LONGSTRING):
+            value = self.decode_string(data)
+            if value is not None:
+                return value
+        # javaobj загружается только при первом потоке неизвестного класса
+        from javaobj import load
+        return load(BytesIO(data)).value
+
+    def encode(self, obj: Any) -> bytes:
+        encoder = self.encoders.get(type(obj))
+        if encoder is not None:
+            try:
+                return encoder(obj)
+            except struct.error:
+                # например, int за пределами Long
+                pass
+        import pickle
+        return pickle.dumps(obj)
+
+    @staticmethod
+    def decode_string(data: bytes) -> Optional[str]:
+        # java.lang.String: TC_STRING + u2 длина или TC_LONGSTRING + u8 длина, затем modified UTF-8
+        if data[4:5] == TC_STRING:
+            start, length = 7, int.from_bytes(data[5:7], "big")
+        else:
+            start, length = 13, int.from_bytes(data[5:13], "big")
+        if len(data) != start + length:
+            return None
+        raw = data[start:]
+        if b"\xc0\x80" not in raw and b"\xed" not in raw:
+            return raw.decode("utf-8")
+        # NUL записан как C0 80, символы вне BMP - суррогатной парой по 3 байта на половину
+        text = raw.replace(b"\xc0\x80", b"\x00").decode("utf-8", "surrogatepass")
+        return text.encode("utf-16-be", "surrogatepass").decode("utf-16-be")
+
+    @staticmethod
+    def encode_string(value: str) -> bytes:
+        if not value.isascii():
+            value = "".join(c if c <= "\uffff" else BodyCodec.surrogate_pair(c) for c in value)
+        raw = value.encode("utf-8", "surrogatepass").replace(b"\x00", b"\xc0\x80")
+        if len(raw) <= 0xFFFF:
+            return STREAM_HEADER + TC_STRING + struct.pack(">H", len(raw)) + raw
+        return STREAM_HEADER + TC_LONGSTRING + struct.pack(">Q", len(raw)) + raw
+
+    @staticmethod
+    def surrogate_pair(char: str) -> str:
+        code = ord(char) - 0x10000
+        return chr(0xD800 + (code >> 10)) + chr(0xDC00 + (code & 0x3FF))
+
+
+BodyCodec.JAVA_DOUBLE_PREFIX = java_class_prefix("java.lang.Double", "80b3c24a296bfb04", "D", NUMBER_CLASS_DESC)
+BodyCodec.JAVA_LONG_PREFIX = java_class_prefix("java.lang.Long", "3b8be490cc8f23df", "J", NUMBER_CLASS_DESC)
+BodyCodec.JAVA_INTEGER_PREFIX = java_class_prefix("java.lang.Integer", "12e2a0a4f7818738", "I", NUMBER_CLASS_DESC)
+BodyCodec.JAVA_BOOLEAN_PREFIX = java_class_prefix("java.lang.Boolean", "cd207280d59cfaee", "Z", TC_NULL)
+
+# Кодек по умолчанию для OperationResponse; порядок регистрации - порядок проверки при разборе
+BodyCodec.JAVA_PRIMITIVES = BodyCodec()
+BodyCodec.JAVA_PRIMITIVES.register(BodyCodec.JAVA_DOUBLE_PREFIX, ">d", float)
+BodyCodec.JAVA_PRIMITIVES.register(BodyCodec.JAVA_LONG_PREFIX, ">q", int)
+BodyCodec.JAVA_PRIMITIVES.register(BodyCodec.JAVA_INTEGER_PREFIX, ">i")
+BodyCodec.JAVA_PRIMITIVES.register(BodyCodec.JAVA_BOOLEAN_PREFIX, ">?", bool)
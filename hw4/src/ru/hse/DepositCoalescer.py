@@ -0,0 +1,113 @@
+import atexit
+import threading
+import weakref
+from typing import Callable, List, Optional
+
+from ru.hse.Metrics import Metrics
+from ru.hse.OperationResponse import OperationResponse
+
+
+class _DepositBatch:
+    __slots__ = ("amounts", "ready", "done", "responses")
+
+    def __init__(self):
+        self.amounts: List[float] = []
+        # ready - пора отправлять (набрано max_deposits или flush), done - ответы готовы
+        self.ready = threading.Event()
+        self.done = threading.Event()
+        self.responses: Optional[List[OperationResponse]] = None
+
+
+class DepositCoalescer:
+    # Отложенная запись пополнений одного Account: deposit, пришедшие в течение window секунд
+    # (но не больше max_deposits), отправляются одним deposit на сумму. Первый вызов пакета (лидер)
+    # ждёт окно и отправляет запрос, остальные ждут его ответа. При успехе каждый получает баланс
+    # на своей позиции в пакете: итоговый баланс минус пополнения, добавленные после него;
+    # при ошибке - один и тот же ответ с ошибкой. flush() отправляет открытый пакет немедленно
+    # и ждёт отправленных; вызывается при logout и при завершении интерпретатора.
+    live = weakref.WeakSet()
+
+    def __init__(self, window: float = 0.005, max_deposits: int = 64, metrics: Optional[Metrics] = None):
+        if window < 0:
+            raise ValueError("window must not be negative")
+        if max_deposits < 1:
+            raise ValueError("max_deposits must be positive")
+        self.window = window
+        self.max_deposits = max_deposits
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.lock = threading.Lock()
+        self.open: Optional[_DepositBatch] = None
+        self.in_flight = set()
+        DepositCoalescer.live.add(self)
+
+    def deposit(self, send: Callable[[float], OperationResponse], amount: float) -> OperationResponse:
+        # send(сумма) выполняет настоящий deposit и возвращает ответ, как Account.deposit
+        with self.lock:
+            batch = self.open
+            leader = batch is None
+            if leader:
+                batch = self.open = _DepositBatch()
+                self.in_flight.add(batch)
+            position = len(batch.amounts)
+            batch.amounts.append(amount)
+            if len(batch.amounts) >= self.max_deposits:
+                self.open = None
+                batch.ready.set()
+        if not leader:
+            batch.done.wait()
+            return batch.responses[position]
+
+        batch.ready.wait(self.window)
+        with self.lock:
+            if self.open is batch:
+                self.open = None
+        amounts = batch.amounts
+        self.metrics.increment("deposit_coalesce.batches")
+        self.metrics.increment("deposit_coalesce.deposits", len(amounts))
+        error = None
+        try:
+            response = send(sum(amounts))
+            batch.responses = self.split(response, amounts)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            # ожидающие получают ответ при любом исходе лидера, в том числе KeyboardInterrupt
+            if batch.responses is None:
+                batch.responses = [OperationResponse(OperationResponse.UNDEFINED_ERROR, str(error))] * len(amounts)
+            with self.lock:
+                self.in_flight.discard(batch)
+            batch.done.set()
+        return batch.responses[0]
+
+    @staticmethod
+    def split(response: OperationResponse, amounts: List[float]) -> List[OperationResponse]:
+        if response.code != OperationResponse.SUCCEED or not isinstance(response.body, float):
+            return [response] * len(amounts)
+        responses = [response] * len(amounts)
+        balance = response.body
+        for i in range(len(amounts) - 1, 0, -1):
+            balance -= amounts[i]
+            responses[i - 1] = OperationResponse(OperationResponse.SUCCEED, balance)
+        return responses
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # False - отправленные пакеты не завершились за timeout
+        with self.lock:
+            if self.open is not None:
+                self.open.ready.set()
+                self.open = None
+            batches = list(self.in_flight)
+        for batch in batches:
+            batch.ready.set()
+            if not batch.done.wait(timeout):
+                return False
+        return True
+
+    @staticmethod
+    def flush_all(timeout: Optional[float] = 5.0):
+        for coalescer in list(DepositCoalescer.live):
+            coalescer.flush(timeout)
+
+
+atexit.register(DepositCoalescer.flush_all)
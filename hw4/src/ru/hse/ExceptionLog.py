@@ -0,0 +1,83 @@
+import threading
+from typing import List, Optional
+
+from ru.hse.InstrumentedLock import hold
+from ru.hse.Metrics import Metrics
+from ru.hse.OperationException import OperationException
+
+
+class ExceptionLog:
+    # Кольцевой буфер последних capacity исключений с возрастающими номерами.
+    # cursor() - номер следующей записи; since(cursor) возвращает только записи с номерами >= cursor,
+    # не копируя историю; release(cursor) сообщает, что читатель с этим курсором закончил.
+    # DROP_OLDEST затирает самую старую запись. DROP_NEWEST отбрасывает новую запись, только если она
+    # затёрла бы запись, ещё не прочитанную через открытый курсор; без таких читателей старые записи затираются.
+    # Потерянные (затёртые и отброшенные) записи считаются в dropped.
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    DEFAULT_CAPACITY = 1024
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, overflow: str = DROP_OLDEST,
+                 metrics: Optional[Metrics] = None, lock=None):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if overflow not in (self.DROP_OLDEST, self.DROP_NEWEST):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.capacity = capacity
+        self.overflow = overflow
+        self.metrics = metrics if metrics is not None else Metrics()
+        # lock - threading.Lock или InstrumentedLock
+        self.lock = lock if lock is not None else threading.Lock()
+        # entries[seq % capacity] = (идентификатор потока, исключение)
+        self.entries = [None] * capacity
+        self.next_seq = 0
+        self.dropped = 0
+        # открытые курсоры для DROP_NEWEST: номер -> сколько читателей держат его
+        self.readers = {}
+
+    def append(self, exception: OperationException) -> Optional[int]:
+        with hold(self.lock, "register_exception"):
+            full = self.next_seq >= self.capacity
+            if full:
+                self.dropped += 1
+            if full and self.readers and self.next_seq - min(self.readers) >= self.capacity:
+                seq = None
+            else:
+                seq = self.next_seq
+                self.entries[seq % self.capacity] = (threading.get_ident(), exception)
+                self.next_seq += 1
+        if full:
+            self.metrics.increment("exception_log.dropped")
+        return seq
+
+    def cursor(self) -> int:
+        with hold(self.lock, "exceptions_cursor"):
+            cursor = self.next_seq
+            if self.overflow == self.DROP_NEWEST:
+                self.readers[cursor] = self.readers.get(cursor, 0) + 1
+            return cursor
+
+    def release(self, cursor: int):
+        if self.overflow != self.DROP_NEWEST:
+            return
+        with hold(self.lock, "exceptions_cursor"):
+            count = self.readers.get(cursor, 0)
+            if count > 1:
+                self.readers[cursor] = count - 1
+            else:
+                self.readers.pop(cursor, None)
+
+    def since(self, cursor: int, own_thread: bool = False) -> List[OperationException]:
+        # own_thread=True - только исключения, записанные вызывающим потоком
+        thread_id = threading.get_ident() if own_thread else None
+        with hold(self.lock, "get_exceptions"):
+            start = max(cursor, self.next_seq - self.capacity, 0)
+            entries = [self.entries[seq % self.capacity] for seq in range(start, self.next_seq)]
+        return [exception for owner, exception in entries if thread_id is None or owner == thread_id]
+
+    def snapshot(self) -> List[OperationException]:
+        return self.since(0)
+
+    def __len__(self):
+        with self.lock:
+            return min(self.next_seq, self.capacity)
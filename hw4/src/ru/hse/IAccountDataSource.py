@@ -1,17 +1,37 @@
 from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
 
 from ru.hse.OperationResponse import OperationResponse
 
+# Операция пакета: ("withdraw" | "deposit" | "balance", login, session, amount или None)
+BatchOperation = Tuple[str, str, int, Optional[float]]
+
 
 class IAccountDataSource(ABC):
+    # deadline - абсолютный момент time.monotonic(), после которого ответ уже не нужен;
+    # источник данных, не уложившийся в него, возвращает DEADLINE_EXCEEDED
     @abstractmethod
-    def withdraw(self, login: str, session: int, balance: float) -> OperationResponse:
+    def withdraw(self, login: str, session: int, balance: float, deadline: Optional[float] = None) -> OperationResponse:
         pass
 
     @abstractmethod
-    def deposit(self, login: str, session: int, balance: float) -> OperationResponse:
+    def deposit(self, login: str, session: int, balance: float, deadline: Optional[float] = None) -> OperationResponse:
         pass
 
     @abstractmethod
-    def get_balance(self, login: str, session: int) -> OperationResponse:
-        pass
\ No newline at end of file
+    def get_balance(self, login: str, session: int, deadline: Optional[float] = None) -> OperationResponse:
+        pass
+
+    def execute_batch(self, ops: Sequence[BatchOperation]) -> List[OperationResponse]:
+        # Реализация по умолчанию выполняет операции по одной; ApiClient отправляет их одним запросом
+        results = []
+        for name, login, session, amount in ops:
+            if name == "withdraw":
+                results.append(self.withdraw(login, session, amount))
+            elif name == "deposit":
+                results.append(self.deposit(login, session, amount))
+            elif name == "balance":
+                results.append(self.get_balance(login, session))
+            else:
+                raise ValueError(f"Unknown batch operation: {name}")
+        return results
\ No newline at end of file
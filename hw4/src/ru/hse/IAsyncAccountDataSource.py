@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+
+from ru.hse.OperationResponse import OperationResponse
+
+
+class IAsyncAccountDataSource(ABC):
+    @abstractmethod
+    async def withdraw(self, login: str, session: int, balance: float) -> OperationResponse:
+        pass
+
+    @abstractmethod
+    async def deposit(self, login: str, session: int, balance: float) -> OperationResponse:
+        pass
+
+    @abstractmethod
+    async def get_balance(self, login: str, session: int) -> OperationResponse:
+        pass
\ No newline at end of file
@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+
+from ru.hse.OperationResponse import OperationResponse
+
+
+class IAsyncAuthorizationSource(ABC):
+    @abstractmethod
+    async def register(self, login: str, password: str) -> OperationResponse:
+        pass
+
+    @abstractmethod
+    async def login(self, login: str, password: str) -> OperationResponse:
+        pass
+
+    @abstractmethod
+    async def logout(self, login: str, active_session: int) -> OperationResponse:
+        pass
\ No newline at end of file
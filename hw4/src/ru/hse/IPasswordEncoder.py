@@ -0,0 +1,9 @@
+from abc import ABC, abstractmethod
+
+
+class IPasswordEncoder(ABC):
+    # Преобразование пароля перед отправкой на сервер; результат для одной пары (login, password)
+    # должен быть одинаковым между запусками, иначе сервер не узнает пароль при следующем login
+    @abstractmethod
+    def encode(self, login: str, password: str) -> str:
+        pass
@@ -0,0 +1,152 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Гистограммы в микросекундах: корзина i считает значения в [2 ** (i - 1), 2 ** i) мкс, последняя - всё больше
+_BUCKETS = 25
+
+
+class _OperationStats:
+    __slots__ = ("acquisitions", "contended", "wait_total", "hold_total", "wait_max", "hold_max",
+                 "wait_histogram", "hold_histogram")
+
+    def __init__(self):
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.hold_total = 0.0
+        self.wait_max = 0.0
+        self.hold_max = 0.0
+        self.wait_histogram = [0] * _BUCKETS
+        self.hold_histogram = [0] * _BUCKETS
+
+
+def _bucket(seconds: float) -> int:
+    return min(int(seconds * 1e6).bit_length(), _BUCKETS - 1)
+
+
+class _Hold:
+    __slots__ = ("lock", "operation", "acquired_at")
+
+    def __init__(self, lock: 'InstrumentedLock', operation: str):
+        self.lock = lock
+        self.operation = operation
+
+    def __enter__(self):
+        self.acquired_at = self.lock.acquire_for(self.operation)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.lock.release_for(self.operation, self.acquired_at)
+
+
+class InstrumentedLock:
+    # threading.Lock со статистикой по операциям: число захватов, сколько из них ждали,
+    # гистограммы ожидания и удержания и операция, держащая блокировку сейчас.
+    # Статистика обновляется, пока блокировка захвачена, поэтому своей синхронизации не требует.
+    # with lock.hold("login"): ... - захват от имени операции; with lock: ... - операция "other"
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.stats: Dict[str, _OperationStats] = {}
+        self.holder: Optional[str] = None
+
+    def hold(self, operation: str) -> _Hold:
+        return _Hold(self, operation)
+
+    def acquire_for(self, operation: str) -> float:
+        if self.lock.acquire(False):
+            acquired_at = time.perf_counter()
+            waited = None
+        else:
+            started = time.perf_counter()
+            self.lock.acquire()
+            acquired_at = time.perf_counter()
+            waited = acquired_at - started
+        stats = self.stats.get(operation)
+        if stats is None:
+            stats = self.stats[operation] = _OperationStats()
+        stats.acquisitions += 1
+        if waited is None:
+            stats.wait_histogram[0] += 1
+        else:
+            stats.contended += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+            stats.wait_histogram[_bucket(waited)] += 1
+        self.holder = operation
+        return acquired_at
+
+    def release_for(self, operation: str, acquired_at: float):
+        held = time.perf_counter() - acquired_at
+        stats = self.stats[operation]
+        stats.hold_total += held
+        stats.hold_max = max(stats.hold_max, held)
+        stats.hold_histogram[_bucket(held)] += 1
+        self.holder = None
+        self.lock.release()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        return self.lock.acquire(blocking, timeout)
+
+    def release(self):
+        self.lock.release()
+
+    def locked(self) -> bool:
+        return self.lock.locked()
+
+    def __enter__(self):
+        self._other_acquired_at = self.acquire_for("other")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release_for("other", self._other_acquired_at)
+
+    def snapshot(self) -> Dict[str, dict]:
+        # {операция: статистика}; копия под блокировкой, чтобы не видеть наполовину обновлённые значения
+        with self.lock:
+            return {operation: self.describe(stats) for operation, stats in self.stats.items()}
+
+    @staticmethod
+    def describe(stats: _OperationStats) -> dict:
+        return {
+            "acquisitions": stats.acquisitions,
+            "contended": stats.contended,
+            "wait_total_us": stats.wait_total * 1e6,
+            "wait_max_us": stats.wait_max * 1e6,
+            "hold_total_us": stats.hold_total * 1e6,
+            "hold_max_us": stats.hold_max * 1e6,
+            # ключ - верхняя граница корзины в мкс (None - без ограничения)
+            "wait_histogram_us": InstrumentedLock.histogram(stats.wait_histogram),
+            "hold_histogram_us": InstrumentedLock.histogram(stats.hold_histogram),
+        }
+
+    @staticmethod
+    def histogram(counts: List[int]) -> Dict[Optional[int], int]:
+        return {(2 ** i if i < _BUCKETS - 1 else None): count for i, count in enumerate(counts) if count}
+
+    @staticmethod
+    def merge(snapshots: Iterable[Dict[str, dict]]) -> Dict[str, dict]:
+        # Сумма снимков нескольких блокировок (например, полос login_locks) по операциям
+        merged: Dict[str, dict] = {}
+        for snapshot in snapshots:
+            for operation, stats in snapshot.items():
+                target = merged.get(operation)
+                if target is None:
+                    merged[operation] = {key: dict(value) if isinstance(value, dict) else value
+                                         for key, value in stats.items()}
+                    continue
+                for key, value in stats.items():
+                    if isinstance(value, dict):
+                        for bucket, count in value.items():
+                            target[key][bucket] = target[key].get(bucket, 0) + count
+                    elif key.endswith("_max_us"):
+                        target[key] = max(target[key], value)
+                    else:
+                        target[key] += value
+        return merged
+
+
+def hold(lock, operation: str):
+    # Захват блокировки от имени операции: для обычного threading.Lock - сам lock без накладных расходов
+    return lock.hold(operation) if type(lock) is InstrumentedLock else lock
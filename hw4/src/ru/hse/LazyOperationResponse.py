@@ -0,0 +1,62 @@
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+
+
+class LazyOperationResponse(OperationResponse):
+    # Ответ в режиме 2, тело которого ещё не декодировано: хранится исходная строка ответа
+    # и смещения в ней остатка уровня (после кода) и тела. При первом обращении к телу строится и запоминается
+    # обычный OperationResponse - тот же, что дал бы немедленный разбор (resolved()); если тело
+    # не декодируется, это UNDEFINED_ERROR с остатком строки в теле.
+    # code - всегда код из строки и не меняется, поэтому тело, которое не декодировалось, не отдаётся:
+    # чтение body бросает OperationException с UNDEFINED_ERROR, а resolved() возвращает этот ответ без исключения
+    __slots__ = ("_raw", "_rest_start", "_body_start", "_resolved")
+
+    def __new__(cls, code: int, raw: str, rest_start: int, body_start: int):
+        response = object.__new__(cls)
+        _set_code(response, code)
+        _set_raw(response, raw)
+        _set_rest_start(response, rest_start)
+        _set_body_start(response, body_start)
+        _set_resolved(response, None)
+        return response
+
+    @property
+    def body(self):
+        resolved = self.resolved()
+        if resolved.code != self.code:
+            raise OperationException(resolved)
+        return resolved.body
+
+    def resolved(self) -> OperationResponse:
+        resolved = self._resolved
+        if resolved is None:
+            raw = self._raw
+            if raw is None:
+                # другой поток уже разобрал тело: _resolved записывается до сброса _raw
+                return self._resolved
+            try:
+                resolved = OperationResponse(self.code, OperationResponse._response_from_string(raw[self._body_start:]))
+            except Exception:
+                resolved = OperationResponse(OperationResponse.UNDEFINED_ERROR, raw[self._rest_start:])
+            _set_resolved(self, resolved)
+            _set_raw(self, None)
+        return resolved
+
+    def is_resolved(self) -> bool:
+        return self._resolved is not None
+
+    def to_result_string(self) -> str:
+        return self.resolved().to_result_string()
+
+    def __str__(self) -> str:
+        return str(self.resolved())
+
+    def __reduce__(self):
+        return self.resolved().__reduce__()
+
+
+_set_code = OperationResponse.__dict__["code"].__set__
+_set_raw = LazyOperationResponse.__dict__["_raw"].__set__
+_set_rest_start = LazyOperationResponse.__dict__["_rest_start"].__set__
+_set_body_start = LazyOperationResponse.__dict__["_body_start"].__set__
+_set_resolved = LazyOperationResponse.__dict__["_resolved"].__set__
@@ -0,0 +1,32 @@
+import threading
+from typing import Dict, Union
+
+Number = Union[int, float]
+
+
+class Metrics:
+    # Потокобезопасные счётчики и текущие значения (gauge) для мониторинга клиента
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, Number] = {}
+        self.gauges: Dict[str, Number] = {}
+
+    def increment(self, name: str, value: Number = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: Number):
+        with self.lock:
+            self.gauges[name] = value
+
+    def get(self, name: str, default: Number = 0) -> Number:
+        with self.lock:
+            if name in self.gauges:
+                return self.gauges[name]
+            return self.counters.get(name, default)
+
+    def snapshot(self) -> Dict[str, Number]:
+        with self.lock:
+            result = dict(self.counters)
+            result.update(self.gauges)
+            return result
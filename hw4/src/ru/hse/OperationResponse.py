@@ -1,12 +1,7 @@
-import base64
-import pickle
+import binascii
 from typing import Any, Optional, Union
 
-import javaobj
-from javaobj import load
-from io import BytesIO
-
-from javaobj.v2.transformers import JavaInt
+from ru.hse.BodyCodec import BodyCodec
 
 
 class OperationResponse:
@@ -24,6 +19,9 @@ class OperationResponse:
     ALREADY_INITIATED = 9
     NULL_ARGUMENT = 10
     CONNECTION_ERROR = 11
+    DEADLINE_EXCEEDED = 12
+    # клиентская ошибка: все соединения пула заняты, запрос на сервер не отправлялся
+    POOL_EXHAUSTED = 13
 
     # Предопределенные экземпляры
     ACCOUNT_MANAGER_RESPONSE = None
@@ -37,10 +35,40 @@ class OperationResponse:
     ALREADY_INITIATED_RESPONSE = None
     NULL_ARGUMENT_EXCEPTION = None
     CONNECTION_ERROR_RESPONSE = None
+    DEADLINE_EXCEEDED_RESPONSE = None
+    POOL_EXHAUSTED_RESPONSE = None
+
+    # Кодек тел в режиме 2: Java-сериализация примитивов, javaobj/pickle для остальных типов
+    BODY_CODEC = BodyCodec.JAVA_PRIMITIVES
+
+    # Ответы неизменяемы; ответ без тела с известным кодом - один общий экземпляр на код
+    __slots__ = ("code", "body")
+    _interned = {}
+    # LazyOperationResponse, импортируется при первом ленивом разборе
+    _lazy_class = None
+
+    def __new__(cls, code: int, body: Any = None):
+        if body is None and cls is OperationResponse:
+            interned = OperationResponse._interned.get(code)
+            if interned is not None:
+                return interned
+        response = object.__new__(cls)
+        _set_code(response, code)
+        _set_body(response, body)
+        return response
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"OperationResponse is immutable, cannot set {name}")
 
-    def __init__(self, code: int, body: Any = None):
-        self.code = code
-        self.body = body
+    def __delattr__(self, name):
+        raise AttributeError(f"OperationResponse is immutable, cannot delete {name}")
+
+    def __reduce__(self):
+        return OperationResponse, (self.code, self.body)
+
+    def resolved(self) -> 'OperationResponse':
+        # ответ с декодированным телом; отличается от self только у LazyOperationResponse
+        return self
 
     def to_result_string(self) -> str:
         sb = str(self.code)
@@ -77,6 +105,89 @@ class OperationResponse:
 
         return OperationResponse(cls.UNDEFINED_ERROR, string)
 
+    @classmethod
+    def decode(cls, string: str, lazy: bool = False) -> 'OperationResponse':
+        # Быстрый разбор, результат совпадает с from_string для любой строки
+        # (см. TestOperationResponseDecode). Строка просматривается str.find от смещения pos начала уровня,
+        # срезаются только короткие поля кода и режима и итоговое тело, поэтому цепочка вложенных ответов
+        # (режим 3) разбирается за линейное время и циклом, без ограничения глубины стеком.
+        # lazy=True: тело в режиме 2 декодируется при первом чтении .body (см. LazyOperationResponse)
+        codes = None
+        pos = 0
+        while True:
+            ind = string.find("|", pos)
+            if ind == -1:
+                rest = string[pos:]
+                try:
+                    code = int(rest)
+                except ValueError:
+                    code = -1
+                response = OperationResponse(code, None) if code >= 0 else OperationResponse(cls.UNDEFINED_ERROR, rest)
+                break
+            try:
+                code = int(string[pos:ind])
+            except ValueError:
+                response = OperationResponse(cls.UNDEFINED_ERROR, string[pos:])
+                break
+            rest_start = ind + 1
+            mode_end = string.find("|", rest_start)
+            if mode_end == -1:
+                # второго разделителя нет: from_string берёт режим из rest[:-1], а телом - весь rest
+                body_start = rest_start
+                mode_text = string[rest_start:-1]
+            else:
+                body_start = mode_end + 1
+                mode_text = string[rest_start:mode_end]
+            try:
+                mode = int(mode_text)
+            except ValueError:
+                response = OperationResponse(cls.UNDEFINED_ERROR, string[rest_start:])
+                break
+            if mode == 3:
+                if codes is None:
+                    codes = []
+                codes.append(code)
+                pos = body_start
+                continue
+            if mode == 1:
+                response = OperationResponse(code, string[body_start:])
+            elif mode == 2 and lazy:
+                lazy_class = OperationResponse._lazy_class
+                if lazy_class is None:
+                    from ru.hse.LazyOperationResponse import LazyOperationResponse
+                    lazy_class = OperationResponse._lazy_class = LazyOperationResponse
+                response = lazy_class(code, string, rest_start, body_start)
+            elif mode == 2:
+                try:
+                    response = OperationResponse(code, cls._response_from_string(string[body_start:]))
+                except Exception:
+                    response = OperationResponse(cls.UNDEFINED_ERROR, string[rest_start:])
+            else:
+                # неизвестный режим: from_string пытается прочитать весь остаток как код
+                rest = string[rest_start:]
+                try:
+                    code = int(rest)
+                except ValueError:
+                    code = -1
+                response = OperationResponse(code, None) if code >= 0 else OperationResponse(cls.UNDEFINED_ERROR, rest)
+            break
+        if codes is not None:
+            for code in reversed(codes):
+                response = OperationResponse(code, response)
+        return response
+
+    @staticmethod
+    def decode_many(data) -> 'ResponseColumns':
+        # Колоночный разбор многих ответов без объекта на каждую запись; нужен numpy (см. ResponseColumns)
+        from ru.hse.ResponseColumns import ResponseColumns
+        return ResponseColumns.decode(data)
+
+    @staticmethod
+    def encode_many(columns) -> bytes:
+        # columns - ResponseColumns или кортеж (codes, values, mask, extras)
+        from ru.hse.ResponseColumns import ResponseColumns
+        return ResponseColumns(*columns).encode()
+
     @classmethod
     def code_to_error_message(cls, code: int) -> str:
         messages = {
@@ -91,7 +202,9 @@ class OperationResponse:
             cls.ENCODING_ERROR: "ENCODING CANNOT BE MADE",
             cls.ALREADY_INITIATED: "ACCOUNT WAS ALREADY INITIATED",
             cls.NULL_ARGUMENT: "Null argument is prohibited",
-            cls.CONNECTION_ERROR: "No connection to server"
+            cls.CONNECTION_ERROR: "No connection to server",
+            cls.DEADLINE_EXCEEDED: "DEADLINE EXCEEDED",
+            cls.POOL_EXHAUSTED: "CONNECTION POOL EXHAUSTED"
         }
         return messages.get(code, f"CODE_{code}")
 
@@ -104,21 +217,28 @@ class OperationResponse:
     @staticmethod
     def _response_to_string(obj: Any) -> str:
         try:
-            serialized = pickle.dumps(obj)
-            return base64.b64encode(serialized).decode('utf-8')
+            serialized = OperationResponse.BODY_CODEC.encode(obj)
+            return binascii.b2a_base64(serialized, newline=False).decode('utf-8')
         except Exception as e:
             raise RuntimeError(f"Serialization error: {e}")
 
     @staticmethod
     def _response_from_string(string: str) -> Any:
         try:
-            data = base64.b64decode(string)
-            file_like = BytesIO(data)
-            java_obj = load(file_like)
-            return java_obj.value
+            data = binascii.a2b_base64(string)
+            return OperationResponse.BODY_CODEC.decode(data)
         except Exception as e:
             raise RuntimeError(f"Deserialization error: {e}")
 
+# Запись слотов в обход запрещающего __setattr__ (быстрее object.__setattr__)
+_set_code = OperationResponse.__dict__["code"].__set__
+_set_body = OperationResponse.__dict__["body"].__set__
+
+# Общие экземпляры ответов без тела для всех известных кодов
+for _code in range(OperationResponse.SUCCEED, OperationResponse.POOL_EXHAUSTED + 1):
+    OperationResponse._interned[_code] = OperationResponse(_code)
+del _code
+
 # Инициализация статических экземпляров после определения класса
 OperationResponse.ACCOUNT_MANAGER_RESPONSE = OperationResponse(OperationResponse.ALREADY_LOGGED, None)
 OperationResponse.NO_USER_INCORRECT_PASSWORD_RESPONSE = OperationResponse(OperationResponse.NO_USER_INCORRECT_PASSWORD, None)
@@ -130,4 +250,6 @@ OperationResponse.NO_MONEY_RESPONSE = OperationResponse(OperationResponse.NO_MON
 OperationResponse.ENCODING_ERROR_RESPONSE = OperationResponse(OperationResponse.ENCODING_ERROR, None)
 OperationResponse.ALREADY_INITIATED_RESPONSE = OperationResponse(OperationResponse.ALREADY_INITIATED, None)
 OperationResponse.NULL_ARGUMENT_EXCEPTION = OperationResponse(OperationResponse.NULL_ARGUMENT, None)
-OperationResponse.CONNECTION_ERROR_RESPONSE = OperationResponse(OperationResponse.CONNECTION_ERROR, None)
\ No newline at end of file
+OperationResponse.CONNECTION_ERROR_RESPONSE = OperationResponse(OperationResponse.CONNECTION_ERROR, None)
+OperationResponse.DEADLINE_EXCEEDED_RESPONSE = OperationResponse(OperationResponse.DEADLINE_EXCEEDED, None)
+OperationResponse.POOL_EXHAUSTED_RESPONSE = OperationResponse(OperationResponse.POOL_EXHAUSTED, None)
\ No newline at end of file
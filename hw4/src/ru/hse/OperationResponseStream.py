@@ -0,0 +1,78 @@
+import io
+import mmap
+from typing import Iterable, Iterator
+
+from ru.hse.OperationResponse import OperationResponse
+
+
+class OperationResponseStream:
+    # Потоки ответов в формате "одна строка to_result_string() на ответ", строки разделены "\n" (UTF-8).
+    # read читает источник блоками по chunk_size байт и отдаёт ответы по мере разбора:
+    # в памяти одновременно находится один блок и незавершённая строка из предыдущего.
+    # Пустые строки пропускаются.
+    DEFAULT_CHUNK_SIZE = 1 << 20
+
+    @staticmethod
+    def read(source, lazy: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[OperationResponse]:
+        # source: двоичный или текстовый файл, сокет, mmap или bytes-подобный объект
+        decode = OperationResponse.decode
+        if isinstance(source, io.TextIOBase):
+            for line in source:
+                line = line.rstrip("\n")
+                if line:
+                    yield decode(line, lazy=lazy)
+            return
+        tail = b""
+        for chunk in OperationResponseStream.chunks(source, chunk_size):
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                tail += chunk
+                continue
+            text = (tail + chunk[:end]).decode("utf-8") if tail else chunk[:end].decode("utf-8")
+            tail = chunk[end + 1:]
+            for line in text.split("\n"):
+                if line:
+                    yield decode(line, lazy=lazy)
+        if tail:
+            yield decode(tail.decode("utf-8"), lazy=lazy)
+
+    @staticmethod
+    def chunks(source, chunk_size: int) -> Iterator[bytes]:
+        if isinstance(source, (mmap.mmap, bytes, bytearray, memoryview)):
+            # срезы не сдвигают позицию mmap и не читают файл целиком
+            for start in range(0, len(source), chunk_size):
+                yield bytes(source[start:start + chunk_size])
+        elif hasattr(source, "recv"):
+            yield from iter(lambda: source.recv(chunk_size), b"")
+        else:
+            yield from iter(lambda: source.read(chunk_size), b"")
+
+    @staticmethod
+    def write(responses: Iterable[OperationResponse], target, buffer_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        # target: двоичный или текстовый файл или сокет; возвращает число записанных ответов.
+        # Строки копятся в буфере и записываются одним вызовом, когда набирается buffer_size символов.
+        if isinstance(target, io.TextIOBase):
+            send = target.write
+        elif hasattr(target, "sendall"):
+            send = lambda text: target.sendall(text.encode("utf-8"))
+        else:
+            send = lambda text: target.write(text.encode("utf-8"))
+        lines = []
+        size = 0
+        count = 0
+        for response in responses:
+            line = response.to_result_string()
+            if "\n" in line:
+                raise ValueError(f"Response cannot be written as one line: {line!r}")
+            lines.append(line)
+            size += len(line) + 1
+            count += 1
+            if size >= buffer_size:
+                lines.append("")
+                send("\n".join(lines))
+                lines = []
+                size = 0
+        if lines:
+            lines.append("")
+            send("\n".join(lines))
+        return count
@@ -0,0 +1,193 @@
+import base64
+import math
+from typing import Any, Dict, Iterable, NamedTuple, Union
+
+import numpy as np
+
+from ru.hse.BodyCodec import BodyCodec
+from ru.hse.OperationResponse import OperationResponse
+
+_BASE64_ALPHABET = np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/", dtype=np.uint8)
+_BASE64_VALUES = np.full(256, 255, dtype=np.uint8)
+_BASE64_VALUES[_BASE64_ALPHABET] = np.arange(64, dtype=np.uint8)
+
+# Тело Double в base64 - 112 символов: первые 100 кодируют постоянные байты 0..74 префикса потока,
+# последние 12 - байт 75 (TC_NULL) и 8 байт значения
+_DOUBLE_HEAD = np.frombuffer(base64.b64encode(BodyCodec.JAVA_DOUBLE_PREFIX[:75]), dtype=np.uint8)
+_DOUBLE_TAIL_FIRST_BYTE = BodyCodec.JAVA_DOUBLE_PREFIX[75]
+_DOUBLE_BODY_LENGTH = 112
+_MAX_CODE_DIGITS = 18
+_BLOCK_ROWS = 1 << 15
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+_NEWLINE, _PIPE, _ZERO, _TWO = ord("\n"), ord("|"), ord("0"), ord("2")
+
+
+class ResponseColumns(NamedTuple):
+    # Колоночное представление последовательности ответов:
+    # codes[i] - код, values[i] - тело-Double или NaN, если тела нет;
+    # mask[i] - тело другого типа (строка, Long, вложенный ответ, NaN) или код вне int64:
+    # такая запись хранится целиком как OperationResponse в extras[i] (codes[i] = -1, если код не помещается).
+    codes: np.ndarray
+    values: np.ndarray
+    mask: np.ndarray
+    extras: Dict[int, Any]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def response(self, i: int) -> OperationResponse:
+        if self.mask[i]:
+            return self.extras[i]
+        value = self.values[i]
+        return OperationResponse(int(self.codes[i]), None if math.isnan(value) else float(value))
+
+    @staticmethod
+    def decode(data: Union[bytes, bytearray, memoryview, Iterable[str]]) -> 'ResponseColumns':
+        # data - строки to_result_string() или их запись в формате OperationResponseStream (UTF-8, "\n").
+        # Ответы без тела и с телом Double разбираются векторно; остальные строки - OperationResponse.decode.
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = "\n".join(data).encode("utf-8")
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        newlines = np.flatnonzero(buffer == _NEWLINE)
+        starts = np.concatenate(([0], newlines + 1))
+        ends = np.concatenate((newlines, [len(buffer)]))
+        keep = ends > starts
+        starts, ends = starts[keep], ends[keep]
+        count = len(starts)
+
+        # код - до 18 цифр от начала строки до первого "|" или конца строки; строки другого вида
+        # (знак, пробелы, длинный код) остаются не digits_ok и разбираются OperationResponse.decode
+        codes = np.zeros(count, dtype=np.int64)
+        code_end = ends.copy()
+        has_pipe = np.zeros(count, dtype=bool)
+        digits_ok = np.ones(count, dtype=bool)
+        active = np.ones(count, dtype=bool)
+        last = max(len(buffer) - 1, 0)
+        for k in range(_MAX_CODE_DIGITS + 1):
+            position = starts + k
+            active &= position < ends
+            if not active.any():
+                break
+            char = buffer[np.minimum(position, last)]
+            pipe = active & (char == _PIPE)
+            code_end[pipe] = position[pipe]
+            has_pipe |= pipe
+            active &= ~pipe
+            digit = char.astype(np.int64) - _ZERO
+            bad = active & ((digit < 0) | (digit > 9) | (k == _MAX_CODE_DIGITS))
+            digits_ok &= ~bad
+            active &= ~bad
+            codes = np.where(active, codes * 10 + digit, codes)
+        digits_ok &= code_end > starts
+
+        values = np.full(count, np.nan)
+        bodyless = digits_ok & ~has_pipe
+
+        body_start = code_end + 3
+        candidates = np.flatnonzero(digits_ok & has_pipe & (ends - body_start == _DOUBLE_BODY_LENGTH))
+        double = np.zeros(count, dtype=bool)
+        # блоками, чтобы индексные массивы (строка x 112 символов) не росли с размером входа
+        for block in range(0, len(candidates), _BLOCK_ROWS):
+            rows = candidates[block:block + _BLOCK_ROWS]
+            rows, block_values = ResponseColumns.decode_doubles(buffer, code_end[rows], body_start[rows], rows)
+            values[rows] = block_values
+            double[rows] = True
+
+        mask = ~(bodyless | double) | (double & np.isnan(values))
+        extras = {}
+        for i in np.flatnonzero(mask).tolist():
+            response = OperationResponse.decode(bytes(buffer[starts[i]:ends[i]]).decode("utf-8"))
+            body = response.body
+            if not _INT64_MIN <= response.code <= _INT64_MAX:
+                codes[i] = -1
+                extras[i] = response
+                continue
+            codes[i] = response.code
+            if body is None:
+                mask[i] = False
+                values[i] = np.nan
+            elif type(body) is float and not math.isnan(body):
+                mask[i] = False
+                values[i] = body
+            else:
+                extras[i] = response
+        return ResponseColumns(codes, values, mask, extras)
+
+    def encode(self) -> bytes:
+        # Обратное преобразование в формат OperationResponseStream: строки to_result_string() через "\n"
+        count = len(self.codes)
+        codes = np.asarray(self.codes, dtype=np.int64)
+        values = np.asarray(self.values, dtype=np.float64)
+        special = np.asarray(self.mask, dtype=bool) | (codes < 0) | (codes >= 10 ** _MAX_CODE_DIGITS)
+        has_value = ~special & ~np.isnan(values)
+
+        digits = np.ones(count, dtype=np.int64)
+        for k in range(1, _MAX_CODE_DIGITS):
+            digits += codes >= 10 ** k
+        special_lines = {i: self.response(i).to_result_string().encode("utf-8")
+                         for i in np.flatnonzero(special).tolist()}
+        lengths = np.where(has_value, digits + 3 + _DOUBLE_BODY_LENGTH, digits) + 1
+        for i, line in special_lines.items():
+            lengths[i] = len(line) + 1
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        out = np.empty(int(lengths.sum()), dtype=np.uint8)
+        out[offsets + lengths - 1] = _NEWLINE
+
+        plain = np.flatnonzero(~special)
+        for k in range(_MAX_CODE_DIGITS):
+            rows = plain[digits[plain] > k]
+            if not len(rows):
+                break
+            out[offsets[rows] + digits[rows] - 1 - k] = _ZERO + (codes[rows] // 10 ** k) % 10
+
+        rows = np.flatnonzero(has_value)
+        for block in range(0, len(rows), _BLOCK_ROWS):
+            block_rows = rows[block:block + _BLOCK_ROWS]
+            ResponseColumns.encode_doubles(out, offsets[block_rows] + digits[block_rows], values[block_rows])
+
+        for i, line in special_lines.items():
+            out[offsets[i]:offsets[i] + len(line)] = np.frombuffer(line, dtype=np.uint8)
+        return out.tobytes()
+
+    @staticmethod
+    def windows(buffer: np.ndarray, width: int) -> np.ndarray:
+        # Все подстроки buffer длины width как массив bytes-значений (без копирования):
+        # windows(buffer, width)[rows] собирает по одной подстроке на строку за один вызов
+        return np.ndarray(shape=(max(len(buffer) - width + 1, 0),), dtype=f"S{width}", buffer=buffer, strides=(1,))
+
+    @staticmethod
+    def decode_doubles(buffer: np.ndarray, code_end: np.ndarray, body_start: np.ndarray, rows: np.ndarray):
+        # Строки-кандидаты "<код>|2|<112 символов>": проверка режима и постоянной головы,
+        # base64-декодирование 12 последних символов в байт TC_NULL и 8 байт big-endian double
+        ok = (buffer[code_end + 1] == _TWO) & (buffer[code_end + 2] == _PIPE)
+        ok &= ResponseColumns.windows(buffer, len(_DOUBLE_HEAD))[body_start] == _DOUBLE_HEAD.tobytes()
+        tail_chars = ResponseColumns.windows(buffer, 12)[body_start + len(_DOUBLE_HEAD)]
+        tail = _BASE64_VALUES[tail_chars.view(np.uint8).reshape(-1, 12)]
+        ok &= (tail != 255).all(axis=1)
+        tail = tail[ok].reshape(-1, 3, 4)
+        decoded = np.empty((len(tail), 3, 3), dtype=np.uint8)
+        decoded[:, :, 0] = (tail[:, :, 0] << 2) | (tail[:, :, 1] >> 4)
+        decoded[:, :, 1] = (tail[:, :, 1] << 4) | (tail[:, :, 2] >> 2)
+        decoded[:, :, 2] = (tail[:, :, 2] << 6) | tail[:, :, 3]
+        decoded = decoded.reshape(-1, 9)
+        valid = decoded[:, 0] == _DOUBLE_TAIL_FIRST_BYTE
+        values = np.ascontiguousarray(decoded[valid, 1:]).view(">f8").ravel().astype(np.float64)
+        return rows[ok][valid], values
+
+    @staticmethod
+    def encode_doubles(out: np.ndarray, body_start: np.ndarray, values: np.ndarray):
+        out[body_start] = _PIPE
+        out[body_start + 1] = _TWO
+        out[body_start + 2] = _PIPE
+        ResponseColumns.windows(out, len(_DOUBLE_HEAD))[body_start + 3] = _DOUBLE_HEAD.tobytes()
+        raw = np.empty((len(values), 9), dtype=np.uint8)
+        raw[:, 0] = _DOUBLE_TAIL_FIRST_BYTE
+        raw[:, 1:] = values.astype(">f8").view(np.uint8).reshape(-1, 8)
+        raw = raw.reshape(-1, 3, 3)
+        tail = np.empty((len(values), 3, 4), dtype=np.uint8)
+        tail[:, :, 0] = raw[:, :, 0] >> 2
+        tail[:, :, 1] = ((raw[:, :, 0] & 3) << 4) | (raw[:, :, 1] >> 4)
+        tail[:, :, 2] = ((raw[:, :, 1] & 15) << 2) | (raw[:, :, 2] >> 6)
+        tail[:, :, 3] = raw[:, :, 2] & 63
+        chars = _BASE64_ALPHABET[tail.reshape(-1, 12)]
+        ResponseColumns.windows(out, 12)[body_start + 3 + len(_DOUBLE_HEAD)] = chars.view("S12").ravel()
@@ -1,34 +1,162 @@
 import atexit
+import sys
 import threading
+from contextlib import contextmanager
 from threading import Lock
 import collections
 from typing import Dict
 
 
 from ru.hse.Account import Account
+from ru.hse.BalanceCache import BalanceCache
+from ru.hse.DepositCoalescer import DepositCoalescer
+from ru.hse.ExceptionLog import ExceptionLog
 from ru.hse.IAccountDataSource import IAccountDataSource
 from ru.hse.IAuthorizationSource import IAuthorizationSource
+from ru.hse.IPasswordEncoder import IPasswordEncoder
+from ru.hse.InstrumentedLock import InstrumentedLock, hold
+from ru.hse.Metrics import Metrics
 from ru.hse.OperationException import OperationException
 from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.PlainPasswordEncoder import PlainPasswordEncoder
+from ru.hse.client.RestoredAccount import RestoredAccount
+from ru.hse.client.SessionSnapshot import SessionSnapshot
+from ru.hse.client.SessionEvictor import SessionEvictor
 from collections import deque
 from threading import Lock
-from typing import Collection, Optional
+from typing import Callable, Collection, Iterable, List, Optional, Tuple, Union
 
 
 class AccountManager:
-    def __init__(self, serv: IAuthorizationSource, server_accounts_data: IAccountDataSource):
+    LOGIN_LOCK_STRIPES = 64
+    BULK_WORKERS = 16
+
+    def __init__(self, serv: IAuthorizationSource, server_accounts_data: IAccountDataSource,
+                 balance_cache_ttl: Optional[float] = None, login_lock_stripes: int = LOGIN_LOCK_STRIPES,
+                 exceptions_capacity: int = ExceptionLog.DEFAULT_CAPACITY,
+                 exceptions_overflow: str = ExceptionLog.DROP_OLDEST,
+                 max_active_accounts: Optional[int] = None, session_idle_timeout: Optional[float] = None,
+                 eviction_interval: float = 1.0, eviction_batch_size: int = 100,
+                 password_encoder: Optional[IPasswordEncoder] = None, instrument_locks: bool = False,
+                 deposit_coalesce_window: Optional[float] = None, deposit_coalesce_max: int = 64):
         self.server_auth_data = None
         self.server_accounts_data = None
-        self.exceptions_list = deque()
-        self.accounts_lock = Lock()
-        self.exceptions_lock = Lock()
+        # accounts_lock защищает только active_accounts и не держится во время запросов к серверу;
+        # register/login/logout одного login сериализуются его полосой login_locks, разные login - параллельны
+        # instrument_locks: статистика ожидания и удержания блокировок по операциям (см. get_lock_metrics)
+        new_lock = (lambda name: InstrumentedLock(name)) if instrument_locks else (lambda name: Lock())
+        self.accounts_lock = new_lock("accounts_lock")
+        self.login_locks = [new_lock("login_locks") for _ in range(max(1, login_lock_stripes))]
         self.active_accounts = {}
+        # login -> Event: SessionEvictor закрывает сессию этого login на сервере (см. evict, hold_login)
+        self.evicting = {}
+        # balance_cache_ttl: время жизни кэша баланса у созданных Account (None - кэш выключен)
+        self.balance_cache_ttl = balance_cache_ttl
+        # deposit_coalesce_window: пополнения Account за это окно (не больше deposit_coalesce_max)
+        # отправляются одним deposit (None - каждое отдельно)
+        self.deposit_coalesce_window = deposit_coalesce_window
+        self.deposit_coalesce_max = deposit_coalesce_max
+        self.metrics = Metrics()
+        # password_encoder: преобразование пароля для сервера (по умолчанию - прежнее "encoded_" + password)
+        self.password_encoder = password_encoder if password_encoder is not None else PlainPasswordEncoder()
+        # password_provider(login) -> пароль для восстановления сессий из снимка (см. restore_sessions)
+        self.password_provider = None
+        self.exceptions_log = ExceptionLog(exceptions_capacity, exceptions_overflow, metrics=self.metrics,
+                                           lock=new_lock("exceptions_lock"))
         self.init(serv, server_accounts_data)
+        # max_active_accounts / session_idle_timeout: фоновое вытеснение сессий (None - без ограничения);
+        # поток запускается после init, чтобы не остаться работать при неверных аргументах
+        self.session_evictor = None
+        if max_active_accounts is not None or session_idle_timeout is not None:
+            self.session_evictor = SessionEvictor(self, max_active_accounts, session_idle_timeout,
+                                                  eviction_interval, eviction_batch_size)
+
+    def login_lock(self, login: str) -> Lock:
+        return self.login_locks[hash(login) % len(self.login_locks)]
+
+    @contextmanager
+    def hold_login(self, login: str, operation: str):
+        # Полоса login_locks для login, который сейчас не вытесняется. Вытеснение ждём вне полосы,
+        # чтобы другие login этой полосы не ждали logout вытесняемой сессии
+        while True:
+            with hold(self.login_lock(login), operation):
+                evicting = self.evicting.get(login)
+                if evicting is None:
+                    yield
+                    return
+            evicting.wait()
+
+    def get_active_account(self, login: str, operation: str = "get_active_account") -> Optional[Account]:
+        with hold(self.accounts_lock, operation):
+            return self.active_accounts.get(login)
+
+    def set_active_account(self, login: str, account: Optional[Account], operation: str = "set_active_account"):
+        with hold(self.accounts_lock, operation):
+            if account is None:
+                self.active_accounts.pop(login, None)
+            else:
+                self.active_accounts[login] = account
+            size = len(self.active_accounts)
+        self.metrics.set_gauge("sessions.active", size)
+        if self.session_evictor is not None and account is not None:
+            self.session_evictor.track(account)
+            self.session_evictor.notify(size)
+
+    def evict(self, account: Account, last_used: float) -> bool:
+        # Вытеснение SessionEvictor: logout на сервере, если account всё ещё активен и не использовался
+        # после выбора (last_used не изменился). Под полосой login_locks login только отмечается в evicting;
+        # отложенные пополнения и logout уходят на сервер уже без блокировки, чтобы другие login этой полосы
+        # не ждали сетевых запросов, а register/login/logout этого login ждут отметку в hold_login.
+        # Из active_accounts аккаунт убирается только после ответа на logout.
+        login = account.get_login()
+        with hold(self.login_lock(login), "evict"):
+            if login in self.evicting or self.get_active_account(login, "evict") is not account \
+                    or account.last_used != last_used:
+                return False
+            done = self.evicting[login] = threading.Event()
+        try:
+            account.flush_deposits()
+            response = self.call_logout(account)
+            if account.balance_cache is not None:
+                account.balance_cache.invalidate()
+            self.set_active_account(login, None, "evict")
+        finally:
+            del self.evicting[login]
+            done.set()
+        if response.code != OperationResponse.SUCCEED:
+            self.metrics.increment("sessions.evict_logout_failed")
+        return True
+
+    def get_lock_metrics(self) -> Dict[str, dict]:
+        # {имя блокировки: {"holder": операции, держащие её сейчас, "operations": {операция: статистика}}};
+        # пусто без instrument_locks. Полосы login_locks суммируются.
+        groups = {"accounts_lock": [self.accounts_lock], "login_locks": self.login_locks,
+                  "exceptions_lock": [self.exceptions_log.lock]}
+        result = {}
+        for name, locks in groups.items():
+            locks = [lock for lock in locks if isinstance(lock, InstrumentedLock)]
+            if locks:
+                result[name] = {
+                    "holder": [lock.holder for lock in locks if lock.holder is not None],
+                    "operations": InstrumentedLock.merge(lock.snapshot() for lock in locks),
+                }
+        return result
+
+    def close(self):
+        if self.session_evictor is not None:
+            self.session_evictor.stop()
 
     @staticmethod
     def get_encoded_password(password: str) -> Optional[str]:
         return f"encoded_{password}" if password else None
 
+    def encode_password(self, login: str, password: str) -> Optional[str]:
+        try:
+            return self.password_encoder.encode(login, password)
+        except Exception as e:
+            self.register_exception(OperationException(OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))))
+            return None
+
     def init(self, auth_source: IAuthorizationSource, data_source: IAccountDataSource):
         if self.server_auth_data or self.server_accounts_data:
             raise OperationException(OperationResponse(code=OperationResponse.ALREADY_INITIATED))
@@ -41,22 +169,26 @@ class AccountManager:
         if not login or not password:
             self.register_exception(OperationException(OperationResponse(code=OperationResponse.NULL_ARGUMENT)))
             return None
+        # KDF может занимать десятки миллисекунд: пароль кодируется до захвата блокировки login
+        hashed = self.encode_password(login, password)
+        if hashed is None:
+            return None
 
-        with self.accounts_lock:
-            active_account = self.active_accounts.get(login)
+        with self.hold_login(login, "register"):
+            active_account = self.get_active_account(login, "register")
             if active_account:
                 self.register_exception(OperationException(OperationResponse(code=OperationResponse.ALREADY_INITIATED)))
                 return None
 
-            hashed = self.get_encoded_password(password)
             response = self.call_register(login, hashed)
             if response.code == OperationResponse.SUCCEED:
                 account = response.body
-                self.active_accounts[login] = account
+                self.set_active_account(account.get_login(), account, "register")
                 return account
             else:
                 match response.code:
                     case OperationResponse.CONNECTION_ERROR | \
+                         OperationResponse.POOL_EXHAUSTED | \
                          OperationResponse.UNDEFINED_ERROR | \
                          OperationResponse.INCORRECT_RESPONSE | \
                          OperationResponse.ALREADY_LOGGED:
@@ -69,22 +201,26 @@ class AccountManager:
         if not login or not password:
             self.register_exception(OperationException(OperationResponse(code=OperationResponse.NULL_ARGUMENT)))
             return None
+        # KDF может занимать десятки миллисекунд: пароль кодируется до захвата блокировки login
+        hashed = self.encode_password(login, password)
+        if hashed is None:
+            return None
 
-        with self.accounts_lock:
-            active_account = self.active_accounts.get(login)
+        with self.hold_login(login, "login"):
+            active_account = self.get_active_account(login, "login")
             if active_account:
                 self.register_exception(OperationException(OperationResponse(code=OperationResponse.ALREADY_LOGGED, body=active_account.active_session)))
                 return None
 
-            hashed = self.get_encoded_password(password)
             response = self.call_login(login, hashed)
             if response.code == OperationResponse.SUCCEED:
                 account = response.body
-                self.active_accounts[login] = account
+                self.set_active_account(account.get_login(), account, "login")
                 return account
             else:
                 match response.code:
                     case OperationResponse.CONNECTION_ERROR | \
+                         OperationResponse.POOL_EXHAUSTED | \
                          OperationResponse.UNDEFINED_ERROR| \
                          OperationResponse.NO_USER_INCORRECT_PASSWORD | \
                          OperationResponse.INCORRECT_RESPONSE | \
@@ -94,29 +230,149 @@ class AccountManager:
                         self.register_exception(OperationException(OperationResponse.INCORRECT_RESPONSE, response))
             return None
 
+    def register_many(self, credentials: Iterable[Tuple[str, str]], max_workers: int = BULK_WORKERS,
+                      progress: Optional[Callable[[int, int], None]] = None) -> List[Union[Account, OperationException]]:
+        return self.run_many(self.register, credentials, max_workers, progress)
+
+    def login_many(self, credentials: Iterable[Tuple[str, str]], max_workers: int = BULK_WORKERS,
+                   progress: Optional[Callable[[int, int], None]] = None) -> List[Union[Account, OperationException]]:
+        return self.run_many(self.login, credentials, max_workers, progress)
+
+    def run_many(self, operation, credentials: Iterable[Tuple[str, str]], max_workers: int,
+                 progress: Optional[Callable[[int, int], None]]) -> List[Union[Account, OperationException]]:
+        # operation (register/login) для каждой пары (login, password) на пуле из max_workers потоков.
+        # results[i] - Account или исключение, записанное для credentials[i]; progress(done, total) -
+        # после каждой завершённой операции (вызовы не пересекаются)
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive")
+        credentials = list(credentials)
+        results = [None] * len(credentials)
+        progress_lock = Lock()
+        done = 0
+
+        def run(i: int, login: str, password: str):
+            nonlocal done
+            cursor = self.exceptions_cursor()
+            try:
+                result = operation(login, password)
+                if result is None:
+                    exceptions = self.get_exceptions_since(cursor, own_thread=True)
+                    result = exceptions[-1] if exceptions else \
+                        OperationException(OperationResponse(code=OperationResponse.UNDEFINED_ERROR))
+            finally:
+                self.release_exceptions_cursor(cursor)
+            results[i] = result
+            if progress is not None:
+                with progress_lock:
+                    done += 1
+                    progress(done, len(credentials))
+
+        if not credentials:
+            return results
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(credentials)),
+                                thread_name_prefix="account-bulk") as executor:
+            futures = [executor.submit(run, i, login, password) for i, (login, password) in enumerate(credentials)]
+            for future in futures:
+                future.result()
+        return results
+
+    @staticmethod
+    def session_from_answer(answer) -> Optional[int]:
+        # Handle both cases: where body is an int or where it might need deserialization
+        if isinstance(answer, int):
+            return answer
+        if answer is not None:
+            # Try to extract if it's wrapped or needs conversion
+            try:
+                return int(answer)
+            except (ValueError, TypeError):
+                pass
+        return None
+
+    def new_account(self, login: str, session_id: int) -> Account:
+        # login интернируется: ключ active_accounts и Account.login - одна строка на login
+        account = Account(sys.intern(login))
+        account.active_session = session_id
+        self.bind_account(account)
+        return account
+
+    def bind_account(self, account: Account):
+        account.init_data_storage(self.server_accounts_data)
+        if self.balance_cache_ttl is not None:
+            account.init_balance_cache(BalanceCache(self.balance_cache_ttl, metrics=self.metrics))
+        if self.deposit_coalesce_window is not None:
+            account.init_deposit_coalescer(DepositCoalescer(self.deposit_coalesce_window, self.deposit_coalesce_max,
+                                                            metrics=self.metrics))
+
+    def save_sessions(self, path: str) -> int:
+        # Снимок активных сессий для restore_sessions после перезапуска; возвращает число записей
+        with hold(self.accounts_lock, "save_sessions"):
+            accounts = list(self.active_accounts.values())
+        return SessionSnapshot.write(path, ((account.get_login(), account.get_active_session())
+                                            for account in accounts if account.get_active_session() is not None))
+
+    def restore_sessions(self, path: str, password_provider: Optional[Callable[[str], Optional[str]]] = None) -> int:
+        # Восстанавливает сессии из снимка без запросов к серверу; login, уже активные в менеджере, пропускаются.
+        # password_provider(login) -> пароль для повторного login, если сервер не признает сессию
+        # (None - такая сессия просто удаляется из active_accounts). Возвращает число восстановленных сессий.
+        if password_provider is not None:
+            self.password_provider = password_provider
+        restored = 0
+        for login, session in SessionSnapshot.read(path):
+            with self.hold_login(login, "restore_sessions"):
+                if self.get_active_account(login, "restore_sessions") is None:
+                    login = sys.intern(login)
+                    self.set_active_account(login, RestoredAccount(login, session, self), "restore_sessions")
+                    restored += 1
+        self.metrics.increment("sessions.restored", restored)
+        return restored
+
+    def reestablish(self, account: Account, stale_session: int) -> bool:
+        # Повторный login восстановленного аккаунта, чью сессию stale_session не признал сервер.
+        # True - у account рабочая сессия (новая или уже обновлённая другим потоком), операцию можно повторить.
+        login = account.get_login()
+        password = self.password_provider(login) if self.password_provider is not None else None
+        hashed = self.encode_password(login, password) if password else None
+        with self.hold_login(login, "reestablish"):
+            if self.get_active_account(login, "reestablish") is not account:
+                return False
+            if account.active_session != stale_session:
+                return True
+            response = self.server_auth_data.login(login, hashed) if hashed is not None else None
+            session = None
+            if response is not None and response.code in (OperationResponse.SUCCEED, OperationResponse.ALREADY_LOGGED):
+                # ALREADY_LOGGED: сервер сообщает действующую сессию этого login
+                response = response.resolved()
+                session = self.session_from_answer(response.body)
+            if session is None:
+                self.set_active_account(login, None, "reestablish")
+            else:
+                account.active_session = session
+                if account.balance_cache is not None:
+                    account.balance_cache.invalidate()
+        if session is None:
+            self.metrics.increment("sessions.reestablish_failed")
+            if response is not None:
+                self.register_exception(OperationException(response))
+            return False
+        self.metrics.increment("sessions.reestablished")
+        return True
+
     def call_register(self, login: str, password: str) -> OperationResponse:
         response = self.server_auth_data.register(login, password)
         if response.code == OperationResponse.SUCCEED:
-            answer = response.body
-            # Handle both cases: where body is an int or where it might need deserialization
-            session_id = None
-            if isinstance(answer, int):
-                session_id = answer
-            elif answer is not None:
-                # Try to extract if it's wrapped or needs conversion
-                try:
-                    session_id = int(answer)
-                except (ValueError, TypeError):
-                    pass
-            
+            response = response.resolved()
+            if response.code == OperationResponse.UNDEFINED_ERROR:
+                # тело ленивого ответа не декодировалось - как при немедленном разборе
+                return response
+            session_id = self.session_from_answer(response.body)
             if session_id is not None:
-                account = Account(login)
-                account.active_session = session_id
-                account.init_data_storage(self.server_accounts_data)
-                return OperationResponse(code=OperationResponse.SUCCEED, body=account)
+                return OperationResponse(code=OperationResponse.SUCCEED, body=self.new_account(login, session_id))
         else:
             match response.code:
                 case OperationResponse.CONNECTION_ERROR | \
+                     OperationResponse.POOL_EXHAUSTED | \
                      OperationResponse.UNDEFINED_ERROR | \
                      OperationResponse.ALREADY_INITIATED:
                     return response
@@ -127,26 +383,17 @@ class AccountManager:
     def call_login(self, login: str, password: str) -> OperationResponse:
         response = self.server_auth_data.login(login, password)
         if response.code == OperationResponse.SUCCEED:
-            answer = response.body
-            # Handle both cases: where body is an int or where it might need deserialization
-            session_id = None
-            if isinstance(answer, int):
-                session_id = answer
-            elif answer is not None:
-                # Try to extract if it's wrapped or needs conversion
-                try:
-                    session_id = int(answer)
-                except (ValueError, TypeError):
-                    pass
-            
+            response = response.resolved()
+            if response.code == OperationResponse.UNDEFINED_ERROR:
+                # тело ленивого ответа не декодировалось - как при немедленном разборе
+                return response
+            session_id = self.session_from_answer(response.body)
             if session_id is not None:
-                account = Account(login)
-                account.active_session = session_id
-                account.init_data_storage(self.server_accounts_data)
-                return OperationResponse(code=OperationResponse.SUCCEED, body=account)
+                return OperationResponse(code=OperationResponse.SUCCEED, body=self.new_account(login, session_id))
         else:
             match response.code:
                 case OperationResponse.CONNECTION_ERROR | \
+                     OperationResponse.POOL_EXHAUSTED | \
                      OperationResponse.UNDEFINED_ERROR | \
                      OperationResponse.NO_USER_INCORRECT_PASSWORD | \
                      OperationResponse.ALREADY_LOGGED:
@@ -162,6 +409,7 @@ class AccountManager:
         match response.code:
             case OperationResponse.SUCCEED | \
                  OperationResponse.CONNECTION_ERROR | \
+                 OperationResponse.POOL_EXHAUSTED | \
                  OperationResponse.UNDEFINED_ERROR | \
                  OperationResponse.NOT_LOGGED | \
                  OperationResponse.INCORRECT_SESSION:
@@ -173,17 +421,29 @@ class AccountManager:
         if not account or not account.get_login():
             self.register_exception(OperationException(OperationResponse(code=OperationResponse.NULL_ARGUMENT)))
             return False
-        active_account = self.active_accounts.get(account.get_login())
+        with self.hold_login(account.get_login(), "logout"):
+            return self.logout_locked(account)
+
+    def logout_locked(self, account: Account) -> bool:
+        active_account = self.get_active_account(account.get_login(), "logout")
         if not active_account:
             self.register_exception(OperationException(OperationResponse(code=OperationResponse.NOT_LOGGED)))
             return False
+        # отложенные пополнения должны дойти до сервера до закрытия сессии
+        for pending in (account, active_account):
+            pending.flush_deposits()
         response = self.call_logout(active_account)
+        # после logout закэшированный баланс недействителен при любом ответе сервера
+        for cached in (account, active_account):
+            if getattr(cached, "balance_cache", None) is not None:
+                cached.balance_cache.invalidate()
         if response.code == OperationResponse.SUCCEED:
-            del self.active_accounts[account.get_login()]
+            self.set_active_account(account.get_login(), None, "logout")
             return True
         else:
             match response.code:
                 case OperationResponse.CONNECTION_ERROR | \
+                     OperationResponse.POOL_EXHAUSTED | \
                      OperationResponse.UNDEFINED_ERROR | \
                      OperationResponse.NOT_LOGGED | \
                      OperationResponse.INCORRECT_SESSION | \
@@ -194,9 +454,18 @@ class AccountManager:
         return False
 
     def register_exception(self, exception: OperationException):
-        with self.exceptions_lock:
-            self.exceptions_list.append(exception)
+        self.exceptions_log.append(exception)
 
     def get_exceptions(self) -> Collection[OperationException]:
-        with self.exceptions_lock:
-            return list(self.exceptions_list)  # Return a copy to avoid modification
+        return self.exceptions_log.snapshot()  # Return a copy to avoid modification
+
+    def exceptions_cursor(self) -> int:
+        return self.exceptions_log.cursor()
+
+    def get_exceptions_since(self, cursor: int, own_thread: bool = False) -> Collection[OperationException]:
+        # исключения, записанные после exceptions_cursor(); own_thread=True - только вызывающим потоком
+        return self.exceptions_log.since(cursor, own_thread)
+
+    def release_exceptions_cursor(self, cursor: int):
+        # курсор больше не читается: при DROP_NEWEST его записи можно затирать
+        self.exceptions_log.release(cursor)
@@ -1,128 +1,279 @@
-from contextlib import closing
-from urllib.parse import urlencode
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
 
 import requests
 
-from ru.hse.IAccountDataSource import IAccountDataSource
+from ru.hse.IAccountDataSource import BatchOperation, IAccountDataSource
 from ru.hse.IAuthorizationSource import IAuthorizationSource
+from ru.hse.Metrics import Metrics
 from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.CircuitBreaker import CircuitBreaker
+from ru.hse.client.HttpTransport import HttpTransport, PoolExhaustedError, PoolTimeoutError
+from ru.hse.client.LatencyTracker import LatencyTracker
+from ru.hse.client.RetryPolicy import RetryPolicy
 
 
 class ApiClient (IAccountDataSource, IAuthorizationSource):
-    def __init__(self, url):
+    BATCH_OPERATIONS = ("withdraw", "deposit", "balance")
+    # Операции, которые безопасно повторять без ключа идемпотентности
+    RETRYABLE_OPERATIONS = ("balance", "logout")
+    # Операции, для которых задаётся политика повторов: register и login не повторяются никогда
+    RETRY_POLICY_OPERATIONS = ("withdraw", "deposit", "balance", "logout")
+
+    def __init__(self, url, transport: Optional[HttpTransport] = None, max_connections: int = 10,
+                 pool_block: bool = True, pool_timeout: Optional[float] = None, max_batch_size: int = 500,
+                 timeout: Optional[float] = None, hedge_reads: bool = False, hedge_percentile: float = 95.0,
+                 hedge_initial_delay: float = 0.05, retry_policies: Optional[Dict[str, RetryPolicy]] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, lazy_bodies: bool = False):
         self.connection_uri = url
+        self.metrics = Metrics()
+        # Политики повторов по типу операции: withdraw, deposit, balance, logout.
+        # Записи (withdraw/deposit) повторяются только при переданном idempotency_key.
+        if retry_policies is None:
+            retry_policies = {name: RetryPolicy() for name in self.RETRY_POLICY_OPERATIONS}
+        for name in retry_policies:
+            if name not in self.RETRY_POLICY_OPERATIONS:
+                raise ValueError(f"Retry policy is not supported for operation: {name}")
+        self.retry_policies = retry_policies
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker(metrics=self.metrics)
+        self.circuit_breaker = circuit_breaker
+        # timeout - ограничение по умолчанию для запросов без собственного deadline
+        self.timeout = timeout
+        # Хеджирование get_balance: если ответ не пришёл за hedge_percentile-й перцентиль
+        # наблюдаемых задержек (до накопления статистики - hedge_initial_delay),
+        # отправляется второй такой же запрос и берётся первый полученный ответ
+        self.hedge_reads = hedge_reads
+        self.hedge_percentile = hedge_percentile
+        self.hedge_initial_delay = hedge_initial_delay
+        self.read_latency = LatencyTracker()
+        self.hedge_executor = ThreadPoolExecutor(thread_name_prefix="api-hedge") if hedge_reads else None
+        self.max_batch_size = max_batch_size
+        # None - ещё неизвестно, поддерживает ли сервер /account/batch
+        self.batch_supported = None
+        # lazy_bodies: тела ответов декодируются только при чтении response.body
+        # (тело, которое не декодировалось, бросает OperationException; см. LazyOperationResponse)
+        self.lazy_bodies = lazy_bodies
+        if transport is None:
+            transport = HttpTransport(url, max_connections=max_connections,
+                                      pool_block=pool_block, pool_timeout=pool_timeout)
+        self.transport = transport
 
-    def withdraw(self, login: str, session: int, balance: float) -> OperationResponse:
-        # Формируем JSON-тело запроса (используем словарь для гарантии корректности)
-        json_body = {
-            "login": login,
-            "session": session,
-            "amount": balance
-        }
-        headers = {'Content-Type': 'application/json'}
+    def request_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        return remaining if self.timeout is None else min(remaining, self.timeout)
+
+    def _call(self, operation: str, path: str, json_body: dict, deadline: Optional[float] = None,
+              idempotency_key: Optional[str] = None) -> OperationResponse:
+        # Запрос через circuit breaker с повторами при CONNECTION_ERROR по политике операции
+        policy = self.retry_policies.get(operation, RetryPolicy.NO_RETRY)
+        if operation not in self.RETRYABLE_OPERATIONS and idempotency_key is None:
+            policy = RetryPolicy.NO_RETRY
+        headers = None if idempotency_key is None else {"Idempotency-Key": idempotency_key}
+        attempt = 1
+        while True:
+            if not self.circuit_breaker.allow_request():
+                return OperationResponse.CONNECTION_ERROR_RESPONSE
+            # исход запроса для circuit breaker записывает _post: только он знает, дошёл ли запрос до сервера
+            response = self._post(path, json_body, deadline, headers)
+            if response.code != OperationResponse.CONNECTION_ERROR:
+                return response
+            if attempt >= policy.max_attempts:
+                return response
+            delay = policy.backoff(attempt)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                return response
+            self.metrics.increment(f"retry.{operation}")
+            time.sleep(delay)
+            attempt += 1
+
+    def _post(self, path: str, json_body: dict, deadline: Optional[float] = None,
+              headers: Optional[dict] = None) -> OperationResponse:
+        # Запрос, уже разрешённый circuit breaker. Не отправленный запрос (истёкший deadline,
+        # ожидание или исчерпание локального пула) о сервере ничего не говорит - record_skipped;
+        # таймаут ответа и ошибка соединения - record_failure; любой ответ сервера - record_success
+        timeout = self.request_timeout(deadline)
+        if timeout is not None and timeout <= 0:
+            self.circuit_breaker.record_skipped()
+            return OperationResponse.DEADLINE_EXCEEDED_RESPONSE
         try:
-            response = requests.post(
-                f"{self.connection_uri}/account/withdraw",
-                json=json_body,
-                headers=headers
-            )
-            response.raise_for_status()
-            return OperationResponse.from_string(response.text)
+            answer = self.transport.post(path, json_body, timeout=timeout, headers=headers)
+        except PoolExhaustedError as pe:
+            self.circuit_breaker.record_skipped()
+            self.metrics.increment("pool.exhausted")
+            return OperationResponse(OperationResponse.POOL_EXHAUSTED, str(pe))
+        except PoolTimeoutError:
+            self.circuit_breaker.record_skipped()
+            return OperationResponse.DEADLINE_EXCEEDED_RESPONSE
+        except requests.Timeout:
+            self.circuit_breaker.record_failure()
+            return OperationResponse.DEADLINE_EXCEEDED_RESPONSE
         except requests.ConnectionError as ce:
+            self.circuit_breaker.record_failure()
             return OperationResponse(OperationResponse.CONNECTION_ERROR, str(ce))
+        except Exception as e:
+            self.circuit_breaker.record_success()
+            return OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
+        self.circuit_breaker.record_success()
+        try:
+            return OperationResponse.decode(answer, lazy=self.lazy_bodies)
         except Exception as e:
             return OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
 
+    def _timed_call(self, path: str, json_body: dict, deadline: Optional[float]) -> OperationResponse:
+        start = time.monotonic()
+        response = self._call("balance", path, json_body, deadline)
+        if response.code not in (OperationResponse.CONNECTION_ERROR, OperationResponse.DEADLINE_EXCEEDED,
+                                 OperationResponse.POOL_EXHAUSTED):
+            self.read_latency.record(time.monotonic() - start)
+        return response
 
-    def deposit(self, login, session, amount):
+    def _hedged_call(self, path: str, json_body: dict, deadline: Optional[float]) -> OperationResponse:
+        delay = self.read_latency.percentile(self.hedge_percentile)
+        if delay is None:
+            delay = self.hedge_initial_delay
+        if deadline is not None:
+            delay = min(delay, max(0.0, deadline - time.monotonic()))
+        started = threading.Event()
+
+        def primary():
+            started.set()
+            return self._timed_call(path, json_body, deadline)
+
+        first = self.hedge_executor.submit(primary)
+        if not started.wait(delay) and first.cancel():
+            # все потоки хеджирования заняты: основной запрос выполняется в потоке вызывающего,
+            # без дубля, чтобы при насыщении клиента не удваивать нагрузку
+            self.metrics.increment("hedge.saturated")
+            return self._timed_call(path, json_body, deadline)
+        # задержка хеджа отсчитывается от начала основного запроса, а не от постановки в очередь
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        self.metrics.increment("hedge.sent")
+        second = self.hedge_executor.submit(self._timed_call, path, json_body, deadline)
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        done, _ = wait([first, second], timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            second.cancel()
+            return OperationResponse.DEADLINE_EXCEEDED_RESPONSE
+        if first in done:
+            second.cancel()
+            return first.result()
+        return second.result()
+
+    def withdraw(self, login: str, session: int, balance: float, deadline: Optional[float] = None,
+                 idempotency_key: Optional[str] = None) -> OperationResponse:
+        # Формируем JSON-тело запроса (используем словарь для гарантии корректности)
+        json_body = {
+            "login": login,
+            "session": session,
+            "amount": balance
+        }
+        return self._call("withdraw", "/account/withdraw", json_body, deadline, idempotency_key)
+
+    def deposit(self, login, session, amount, deadline=None, idempotency_key=None):
         json_body = {
             "login": login,
             "session": session,
             "amount": amount
         }
-        headers = {'Content-Type': 'application/json'}
-        try:
-            response = requests.post(
-                f"{self.connection_uri}/account/deposit",
-                json=json_body,
-                headers=headers
-            )
-            response.raise_for_status()
-            return OperationResponse.from_string(response.text)
-        except requests.ConnectionError as ce:
-            return OperationResponse(OperationResponse.CONNECTION_ERROR, str(ce))
-        except Exception as e:
-            return OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
+        return self._call("deposit", "/account/deposit", json_body, deadline, idempotency_key)
 
-    def get_balance(self, login, session):
+    def get_balance(self, login, session, deadline=None):
         json_body = {
             "login": login,
             "session": session
         }
-        headers = {'Content-Type': 'application/json'}
-        try:
-            response = requests.post(
-                f"{self.connection_uri}/account/balance",
-                json=json_body,
-                headers=headers
-            )
-            response.raise_for_status()
-            return OperationResponse.from_string(response.text)
-        except requests.ConnectionError as ce:
-            return OperationResponse(OperationResponse.CONNECTION_ERROR, str(ce))
-        except Exception as e:
-            return OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
+        if self.hedge_reads:
+            return self._hedged_call("/account/balance", json_body, deadline)
+        return self._call("balance", "/account/balance", json_body, deadline)
 
     def register(self, login: str, password: str) -> OperationResponse:
         data = {"login": login, "password": password}
-        headers = {'Content-Type': 'application/json'}
-        try:
-            response = requests.post(
-                f"{self.connection_uri}/register",
-                json=data,
-                headers=headers
-            )
-            response.raise_for_status()
-            return OperationResponse.from_string(response.text)
-        except requests.ConnectionError as ce:
-            return OperationResponse(OperationResponse.CONNECTION_ERROR, str(ce))
-        except Exception as e:
-            return OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
+        return self._call("register", "/register", data)
 
     def login(self, login: str, password: str) -> OperationResponse:
         data = {"login": login, "password": password}
-        headers = {'Content-Type': 'application/json'}
-
-        try:
-            response = requests.post(
-                f"{self.connection_uri}/login",
-                json=data,
-                headers=headers
-            )
-
-            response.raise_for_status()
-            return OperationResponse.from_string(response.text)
-        except requests.ConnectionError as ce:
-            return OperationResponse(OperationResponse.CONNECTION_ERROR, str(ce))
-        except Exception as e:
-            return OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
+        return self._call("login", "/login", data)
 
     def logout(self, login, active_session):
         json_body = {
             "login": login,
             "session": active_session
         }
-        headers = {'Content-Type': 'application/json'}
+        return self._call("logout", "/account/logout", json_body)
+
+    def execute_batch(self, ops: Sequence[BatchOperation]) -> List[OperationResponse]:
+        ops = list(ops)
+        for name, _, _, _ in ops:
+            if name not in self.BATCH_OPERATIONS:
+                raise ValueError(f"Unknown batch operation: {name}")
+        if self.batch_supported is False:
+            return super().execute_batch(ops)
+        results = []
+        for start in range(0, len(ops), self.max_batch_size):
+            chunk = ops[start:start + self.max_batch_size]
+            chunk_results = self._post_batch(chunk)
+            if chunk_results is None:
+                # сервер без пакетного эндпоинта: остаток выполняется по одной операции
+                self.batch_supported = False
+                return results + super().execute_batch(ops[start:])
+            self.batch_supported = True
+            results.extend(chunk_results)
+        return results
+
+    def _post_batch(self, ops: List[BatchOperation]) -> Optional[List[OperationResponse]]:
+        json_body = {"operations": [
+            {"op": name, "login": login, "session": session, "amount": amount}
+            for name, login, session, amount in ops
+        ]}
+        if not self.circuit_breaker.allow_request():
+            return [OperationResponse.CONNECTION_ERROR_RESPONSE] * len(ops)
         try:
-            response = requests.post(
-                f"{self.connection_uri}/account/logout",
-                json=json_body,
-                headers=headers
-            )
-
-            response.raise_for_status()
-            return OperationResponse.from_string(response.text)
+            answer = self.transport.post("/account/batch", json_body, timeout=self.timeout)
+            self.circuit_breaker.record_success()
+            answers = json.loads(answer)
+            if not isinstance(answers, list) or len(answers) != len(ops):
+                raise ValueError(f"Batch response does not match {len(ops)} operations")
+            return [OperationResponse.decode(answer, lazy=self.lazy_bodies) for answer in answers]
+        except requests.HTTPError as he:
+            self.circuit_breaker.record_success()
+            if he.response is not None and he.response.status_code == 404:
+                return None
+            error = OperationResponse(OperationResponse.UNDEFINED_ERROR, str(he))
+        except PoolExhaustedError as pe:
+            self.circuit_breaker.record_skipped()
+            self.metrics.increment("pool.exhausted")
+            error = OperationResponse(OperationResponse.POOL_EXHAUSTED, str(pe))
+        except PoolTimeoutError:
+            self.circuit_breaker.record_skipped()
+            error = OperationResponse.DEADLINE_EXCEEDED_RESPONSE
+        except requests.Timeout:
+            self.circuit_breaker.record_failure()
+            error = OperationResponse.DEADLINE_EXCEEDED_RESPONSE
         except requests.ConnectionError as ce:
-            return OperationResponse(OperationResponse.CONNECTION_ERROR, str(ce))
+            self.circuit_breaker.record_failure()
+            error = OperationResponse(OperationResponse.CONNECTION_ERROR, str(ce))
         except Exception as e:
-            return OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
\ No newline at end of file
+            error = OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
+        return [error] * len(ops)
+
+    def get_metrics(self) -> Dict[str, float]:
+        # retry.<operation>, hedge.sent, hedge.saturated, pool.exhausted,
+        # circuit.state (0 - closed, 1 - half open, 2 - open),
+        # circuit.rejected, circuit.transitions.<from>_to_<to>
+        snapshot = self.metrics.snapshot()
+        if self.circuit_breaker.metrics is not self.metrics:
+            snapshot.update(self.circuit_breaker.metrics.snapshot())
+        return snapshot
+
+    def close(self):
+        if self.hedge_executor is not None:
+            self.hedge_executor.shutdown(wait=False)
+        self.transport.close()
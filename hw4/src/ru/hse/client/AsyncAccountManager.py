@@ -0,0 +1,163 @@
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Collection, List, Optional
+
+from ru.hse.AsyncAccount import AsyncAccount
+from ru.hse.IAsyncAccountDataSource import IAsyncAccountDataSource
+from ru.hse.IAsyncAuthorizationSource import IAsyncAuthorizationSource
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AccountManager import AccountManager
+
+# Исключения текущей операции; у каждой asyncio-задачи свой контекст,
+# поэтому параллельные сессии не видят исключений друг друга
+_operation_exceptions = contextvars.ContextVar("operation_exceptions", default=None)
+
+
+class AsyncAccountManager:
+    def __init__(self, serv: IAsyncAuthorizationSource, server_accounts_data: IAsyncAccountDataSource):
+        self.server_auth_data = None
+        self.server_accounts_data = None
+        self.exceptions_list = deque()
+        self.active_accounts = {}
+        # Логины, для которых запрос register/login уже отправлен, но ответ ещё не получен.
+        # Все корутины выполняются в одном event loop, поэтому проверка и вставка атомарны без блокировок.
+        self.pending_logins = set()
+        self.init(serv, server_accounts_data)
+
+    get_encoded_password = staticmethod(AccountManager.get_encoded_password)
+
+    def init(self, auth_source: IAsyncAuthorizationSource, data_source: IAsyncAccountDataSource):
+        if self.server_auth_data or self.server_accounts_data:
+            raise OperationException(OperationResponse(code=OperationResponse.ALREADY_INITIATED))
+        if not auth_source or not data_source:
+            raise OperationException(OperationResponse(code=OperationResponse.NULL_ARGUMENT))
+        self.server_auth_data = auth_source
+        self.server_accounts_data = data_source
+
+    async def register(self, login: str, password: str) -> Optional[AsyncAccount]:
+        if not login or not password:
+            self.register_exception(OperationException(OperationResponse(code=OperationResponse.NULL_ARGUMENT)))
+            return None
+        if login in self.active_accounts or login in self.pending_logins:
+            self.register_exception(OperationException(OperationResponse(code=OperationResponse.ALREADY_INITIATED)))
+            return None
+
+        self.pending_logins.add(login)
+        try:
+            hashed = self.get_encoded_password(password)
+            response = await self.call_register(login, hashed)
+        finally:
+            self.pending_logins.discard(login)
+        if response.code == OperationResponse.SUCCEED:
+            account = response.body
+            self.active_accounts[login] = account
+            return account
+        self.register_exception(OperationException(response))
+        return None
+
+    async def login(self, login: str, password: str) -> Optional[AsyncAccount]:
+        if not login or not password:
+            self.register_exception(OperationException(OperationResponse(code=OperationResponse.NULL_ARGUMENT)))
+            return None
+        active_account = self.active_accounts.get(login)
+        if active_account or login in self.pending_logins:
+            session = active_account.active_session if active_account else None
+            self.register_exception(OperationException(OperationResponse(code=OperationResponse.ALREADY_LOGGED, body=session)))
+            return None
+
+        self.pending_logins.add(login)
+        try:
+            hashed = self.get_encoded_password(password)
+            response = await self.call_login(login, hashed)
+        finally:
+            self.pending_logins.discard(login)
+        if response.code == OperationResponse.SUCCEED:
+            account = response.body
+            self.active_accounts[login] = account
+            return account
+        self.register_exception(OperationException(response))
+        return None
+
+    async def call_register(self, login: str, password: str) -> OperationResponse:
+        response = await self.server_auth_data.register(login, password)
+        if response.code == OperationResponse.SUCCEED:
+            return self.account_response(login, response)
+        match response.code:
+            case OperationResponse.CONNECTION_ERROR | \
+                 OperationResponse.UNDEFINED_ERROR | \
+                 OperationResponse.ALREADY_INITIATED:
+                return response
+        return OperationResponse(code=OperationResponse.INCORRECT_RESPONSE, body=response)
+
+    async def call_login(self, login: str, password: str) -> OperationResponse:
+        response = await self.server_auth_data.login(login, password)
+        if response.code == OperationResponse.SUCCEED:
+            return self.account_response(login, response)
+        match response.code:
+            case OperationResponse.CONNECTION_ERROR | \
+                 OperationResponse.UNDEFINED_ERROR | \
+                 OperationResponse.NO_USER_INCORRECT_PASSWORD | \
+                 OperationResponse.ALREADY_LOGGED:
+                return response
+        return OperationResponse(code=OperationResponse.INCORRECT_RESPONSE, body=response)
+
+    def account_response(self, login: str, response: OperationResponse) -> OperationResponse:
+        session_id = AccountManager.session_from_answer(response.body)
+        if session_id is None:
+            return OperationResponse(code=OperationResponse.INCORRECT_RESPONSE, body=response)
+        account = AsyncAccount(login)
+        account.active_session = session_id
+        account.init_data_storage(self.server_accounts_data)
+        return OperationResponse(code=OperationResponse.SUCCEED, body=account)
+
+    async def call_logout(self, account: AsyncAccount) -> OperationResponse:
+        if account.get_active_session() is None:
+            return OperationResponse(code=OperationResponse.NOT_LOGGED)
+        response = await self.server_auth_data.logout(account.get_login(), account.get_active_session())
+        match response.code:
+            case OperationResponse.SUCCEED | \
+                 OperationResponse.CONNECTION_ERROR | \
+                 OperationResponse.UNDEFINED_ERROR | \
+                 OperationResponse.NOT_LOGGED | \
+                 OperationResponse.INCORRECT_SESSION:
+                return response
+            case _:
+                return OperationResponse(code=OperationResponse.INCORRECT_RESPONSE, body=response)
+
+    async def logout(self, account: AsyncAccount) -> bool:
+        if not account or not account.get_login():
+            self.register_exception(OperationException(OperationResponse(code=OperationResponse.NULL_ARGUMENT)))
+            return False
+        active_account = self.active_accounts.get(account.get_login())
+        if not active_account:
+            self.register_exception(OperationException(OperationResponse(code=OperationResponse.NOT_LOGGED)))
+            return False
+        response = await self.call_logout(active_account)
+        if response.code == OperationResponse.SUCCEED:
+            # за время ожидания ответа запись могла быть удалена параллельным logout
+            self.active_accounts.pop(account.get_login(), None)
+            return True
+        self.register_exception(OperationException(response))
+        return False
+
+    def register_exception(self, exception: OperationException):
+        self.exceptions_list.append(exception)
+        current = _operation_exceptions.get()
+        if current is not None:
+            current.append(exception)
+
+    def get_exceptions(self) -> Collection[OperationException]:
+        return list(self.exceptions_list)
+
+    @staticmethod
+    @contextmanager
+    def collect_exceptions():
+        # Собирает исключения, зарегистрированные внутри блока в текущей задаче
+        collected: List[OperationException] = []
+        token = _operation_exceptions.set(collected)
+        try:
+            yield collected
+        finally:
+            _operation_exceptions.reset(token)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import ssl
+from typing import Optional
+from urllib.parse import urlsplit
+
+from ru.hse.IAsyncAccountDataSource import IAsyncAccountDataSource
+from ru.hse.IAsyncAuthorizationSource import IAsyncAuthorizationSource
+from ru.hse.OperationResponse import OperationResponse
+
+
+class HttpStatusError(Exception):
+    pass
+
+
+class AsyncApiClient (IAsyncAccountDataSource, IAsyncAuthorizationSource):
+    # Тот же протокол, что и у ApiClient, но поверх asyncio streams:
+    # HTTP/1.1 с keep-alive и пулом не более max_connections соединений
+    def __init__(self, url, max_connections: int = 100):
+        if max_connections < 1:
+            raise ValueError("max_connections must be positive")
+        self.connection_uri = url
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.max_connections = max_connections
+        self.idle_connections = []
+        self.slots = None
+        self.header_template = (f"POST {{path}} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                                "Content-Type: application/json\r\nConnection: keep-alive\r\n"
+                                "Content-Length: {length}\r\n\r\n")
+
+    async def _post(self, path: str, json_body: dict) -> OperationResponse:
+        try:
+            return OperationResponse.decode(await self.request(path, json_body))
+        except (OSError, asyncio.IncompleteReadError) as ce:
+            return OperationResponse(OperationResponse.CONNECTION_ERROR, str(ce))
+        except Exception as e:
+            return OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
+
+    async def request(self, path: str, json_body: dict) -> str:
+        body = json.dumps(json_body).encode("utf-8")
+        payload = self.header_template.format(path=self.base_path + path, length=len(body)).encode("ascii") + body
+        if self.slots is None:
+            # семафор создаётся внутри работающего event loop
+            self.slots = asyncio.Semaphore(self.max_connections)
+        async with self.slots:
+            reader = writer = None
+            while self.idle_connections:
+                reader, writer = self.idle_connections.pop()
+                if not reader.at_eof() and not writer.is_closing():
+                    break
+                # сервер закрыл простаивающее соединение
+                writer.close()
+                reader = writer = None
+            if writer is None:
+                reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+            try:
+                return await self.exchange(reader, writer, payload)
+            except BaseException:
+                writer.close()
+                raise
+
+    async def exchange(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, payload: bytes) -> str:
+        writer.write(payload)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        status = int(status_line.split(b" ", 2)[1])
+        length = None
+        chunked = False
+        keep_alive = status_line.startswith(b"HTTP/1.1")
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            value = value.strip()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding":
+                chunked = "chunked" in value.lower()
+            elif name == "connection":
+                keep_alive = value.lower() != "close"
+        if chunked:
+            data = await self.read_chunked(reader)
+        elif length is not None:
+            data = await reader.readexactly(length)
+        else:
+            data = await reader.read()
+            keep_alive = False
+        if keep_alive:
+            self.idle_connections.append((reader, writer))
+        else:
+            writer.close()
+        if not 200 <= status < 300:
+            raise HttpStatusError(f"{status} Error for url: {self.connection_uri}")
+        return data.decode("utf-8")
+
+    @staticmethod
+    async def read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await reader.readline()
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def withdraw(self, login: str, session: int, balance: float) -> OperationResponse:
+        json_body = {
+            "login": login,
+            "session": session,
+            "amount": balance
+        }
+        return await self._post("/account/withdraw", json_body)
+
+    async def deposit(self, login, session, amount):
+        json_body = {
+            "login": login,
+            "session": session,
+            "amount": amount
+        }
+        return await self._post("/account/deposit", json_body)
+
+    async def get_balance(self, login, session):
+        json_body = {
+            "login": login,
+            "session": session
+        }
+        return await self._post("/account/balance", json_body)
+
+    async def register(self, login: str, password: str) -> OperationResponse:
+        data = {"login": login, "password": password}
+        return await self._post("/register", data)
+
+    async def login(self, login: str, password: str) -> OperationResponse:
+        data = {"login": login, "password": password}
+        return await self._post("/login", data)
+
+    async def logout(self, login, active_session):
+        json_body = {
+            "login": login,
+            "session": active_session
+        }
+        return await self._post("/account/logout", json_body)
+
+    async def close(self):
+        connections, self.idle_connections = self.idle_connections, []
+        for _, writer in connections:
+            writer.close()
+        for _, writer in connections:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
@@ -0,0 +1,97 @@
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AsyncAccountManager import AsyncAccountManager
+from ru.hse.client.AsyncApiClient import AsyncApiClient
+
+
+class AsyncClient:
+    def __init__(self, auth_source, data_source, max_connections: int = 100):
+        self.api_client = None
+        if isinstance(auth_source, str) and data_source is None:
+            self.api_client = AsyncApiClient(auth_source, max_connections=max_connections)
+            self.account_manager = AsyncAccountManager(self.api_client, self.api_client)
+        else:
+            self.account_manager = AsyncAccountManager(auth_source, data_source)
+
+    # Для тестов только, не использовать в производственном коде
+    def get_account_manager(self):
+        return self.account_manager
+
+    async def register(self, login, password):
+        with self.account_manager.collect_exceptions() as exs:
+            account = await self.account_manager.register(login, password)
+        if account is None:
+            for oe in exs:
+                if oe.response.code in [
+                    OperationResponse.NULL_ARGUMENT,
+                    OperationResponse.ALREADY_INITIATED,
+                    OperationResponse.UNDEFINED_ERROR,
+                    OperationResponse.CONNECTION_ERROR
+                ]:
+                    raise oe
+                else:
+                    print(oe)
+        return account
+
+    async def login(self, login, password):
+        with self.account_manager.collect_exceptions() as exs:
+            account = await self.account_manager.login(login, password)
+        if account is None:
+            for oe in exs:
+                if oe.response.code in [
+                    OperationResponse.NULL_ARGUMENT,
+                    OperationResponse.UNDEFINED_ERROR,
+                    OperationResponse.CONNECTION_ERROR,
+                    OperationResponse.ALREADY_LOGGED,
+                    OperationResponse.NO_USER_INCORRECT_PASSWORD
+                ]:
+                    raise oe
+                else:
+                    print(oe)
+        return account
+
+    async def logout(self, account):
+        with self.account_manager.collect_exceptions() as exs:
+            result = await self.account_manager.logout(account)
+        if not result:
+            for oe in exs:
+                if oe.response.code in [
+                    OperationResponse.UNDEFINED_ERROR,
+                    OperationResponse.NULL_ARGUMENT,
+                    OperationResponse.NOT_LOGGED,
+                    OperationResponse.INCORRECT_SESSION,
+                    OperationResponse.CONNECTION_ERROR
+                ]:
+                    raise oe
+                else:
+                    print(oe)
+        return result
+
+    @staticmethod
+    async def get_balance(account):
+        response = await account.get_balance()
+        return AsyncClient.unwrap(response)
+
+    @staticmethod
+    async def withdraw(account, amount):
+        response = await account.withdraw(amount)
+        return AsyncClient.unwrap(response)
+
+    @staticmethod
+    async def deposit(account, amount):
+        response = await account.deposit(amount)
+        return AsyncClient.unwrap(response)
+
+    @staticmethod
+    def unwrap(response):
+        if response.code == OperationResponse.SUCCEED:
+            return response.body
+        if response.code == OperationResponse.INCORRECT_RESPONSE:
+            print(response)
+        else:
+            raise OperationException(response)
+        return float('nan')
+
+    async def close(self):
+        if self.api_client is not None:
+            await self.api_client.close()
@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Optional
+
+from ru.hse.Metrics import Metrics
+
+
+class CircuitBreaker:
+    # CLOSED: запросы идут на сервер, подряд идущие CONNECTION_ERROR и таймауты ответа считаются.
+    # OPEN: после failure_threshold ошибок запросы сразу отклоняются в течение reset_timeout.
+    # HALF_OPEN: пропускается не более half_open_max_calls пробных запросов;
+    # успех закрывает цепь, ошибка снова открывает её.
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 5.0, half_open_max_calls: int = 1,
+                 metrics: Optional[Metrics] = None, name: str = "circuit", clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.name = name
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.metrics.set_gauge(f"{name}.state", self.STATE_CODES[self.CLOSED])
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    self.metrics.increment(f"{self.name}.rejected")
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    self.metrics.increment(f"{self.name}.rejected")
+                    return False
+                self.half_open_calls += 1
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or \
+                    (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self._transition(self.OPEN)
+
+    def record_skipped(self):
+        # запрос, разрешённый allow_request, не дошёл до сервера (например, пул соединений исчерпан):
+        # о сервере ничего не известно, только пробный вызов HALF_OPEN возвращается
+        with self.lock:
+            if self.state == self.HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def get_state(self) -> str:
+        with self.lock:
+            return self.state
+
+    def _transition(self, state: str):
+        self.metrics.increment(f"{self.name}.transitions.{self.state}_to_{state}")
+        self.metrics.set_gauge(f"{self.name}.state", self.STATE_CODES[state])
+        self.state = state
+        self.half_open_calls = 0
+        if state == self.OPEN:
+            self.opened_at = self.clock()
+        elif state == self.CLOSED:
+            self.failures = 0
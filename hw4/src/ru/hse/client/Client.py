@@ -1,32 +1,57 @@
+import threading
+import time
+
 from ru.hse.OperationException import OperationException
 from ru.hse.OperationResponse import OperationResponse
 from ru.hse.client.AccountManager import AccountManager
-from ru.hse.client.ApiClient import ApiClient
+from ru.hse.client.CoalescingAccountDataSource import CoalescingAccountDataSource
 
 
 class Client:
-    def __init__(self, auth_source, data_source):
+    # Общий пул потоков для get_balance_async / withdraw_async / deposit_async;
+    # создаётся при первом вызове, размер и сам пул задаются configure_executor
+    ASYNC_WORKERS = 16
+    executor = None
+    executor_owned = False
+    executor_lock = threading.Lock()
+
+    def __init__(self, auth_source, data_source, coalesce_reads: bool = False, balance_cache_ttl=None,
+                 password_encoder=None):
         if isinstance(auth_source, str) and data_source is None:
+            # ApiClient (и requests) загружается только для работы с сервером
+            from ru.hse.client.ApiClient import ApiClient
             base_api_client = ApiClient(auth_source)
-            self.account_manager = AccountManager(base_api_client, base_api_client)
-        else:
-            self.account_manager = AccountManager(auth_source, data_source)
+            auth_source, data_source = base_api_client, base_api_client
+        elif isinstance(auth_source, (list, tuple)) and data_source is None:
+            # несколько узлов банка: login распределяются по ним согласованным хешированием
+            from ru.hse.client.ShardedAccountSource import ShardedAccountSource
+            sharded = ShardedAccountSource(auth_source)
+            auth_source, data_source = sharded, sharded
+        if coalesce_reads and data_source is not None:
+            # одновременные get_balance одной сессии выполняются одним запросом
+            data_source = CoalescingAccountDataSource(data_source)
+        self.account_manager = AccountManager(auth_source, data_source, balance_cache_ttl=balance_cache_ttl,
+                                              password_encoder=password_encoder)
 
     # Для тестов только, не использовать в производственном коде
     def get_account_manager(self):
         return self.account_manager
 
     def register(self, login, password):
-        size = len(self.account_manager.get_exceptions())
-        account = self.account_manager.register(login, password)
+        cursor = self.account_manager.exceptions_cursor()
+        try:
+            account = self.account_manager.register(login, password)
+            exs = self.account_manager.get_exceptions_since(cursor, own_thread=True) if account is None else []
+        finally:
+            self.account_manager.release_exceptions_cursor(cursor)
         if account is None:
-            exs = self.account_manager.get_exceptions()[size:]
             for oe in exs:
                 if oe.response.code in [
                     OperationResponse.NULL_ARGUMENT,
                     OperationResponse.ALREADY_INITIATED,
                     OperationResponse.UNDEFINED_ERROR,
-                    OperationResponse.CONNECTION_ERROR
+                    OperationResponse.CONNECTION_ERROR,
+                    OperationResponse.POOL_EXHAUSTED
                 ]:
                     raise oe
                 else:
@@ -34,15 +59,19 @@ class Client:
         return account
 
     def login(self, login, password):
-        size = len(self.account_manager.get_exceptions())
-        account = self.account_manager.login(login, password)
+        cursor = self.account_manager.exceptions_cursor()
+        try:
+            account = self.account_manager.login(login, password)
+            exs = self.account_manager.get_exceptions_since(cursor, own_thread=True) if account is None else []
+        finally:
+            self.account_manager.release_exceptions_cursor(cursor)
         if account is None:
-            exs = self.account_manager.get_exceptions()[size:]
             for oe in exs:
                 if oe.response.code in [
                     OperationResponse.NULL_ARGUMENT,
                     OperationResponse.UNDEFINED_ERROR,
                     OperationResponse.CONNECTION_ERROR,
+                    OperationResponse.POOL_EXHAUSTED,
                     OperationResponse.ALREADY_LOGGED,
                     OperationResponse.NO_USER_INCORRECT_PASSWORD
                 ]:
@@ -52,17 +81,21 @@ class Client:
         return account
 
     def logout(self, account):
-        size = len(self.account_manager.get_exceptions())
-        result = self.account_manager.logout(account)
+        cursor = self.account_manager.exceptions_cursor()
+        try:
+            result = self.account_manager.logout(account)
+            exs = self.account_manager.get_exceptions_since(cursor, own_thread=True) if not result else []
+        finally:
+            self.account_manager.release_exceptions_cursor(cursor)
         if not result:
-            exs = self.account_manager.get_exceptions()[size:]
             for oe in exs:
                 if oe.response.code in [
                     OperationResponse.UNDEFINED_ERROR,
                     OperationResponse.NULL_ARGUMENT,
                     OperationResponse.NOT_LOGGED,
                     OperationResponse.INCORRECT_SESSION,
-                    OperationResponse.CONNECTION_ERROR
+                    OperationResponse.CONNECTION_ERROR,
+                    OperationResponse.POOL_EXHAUSTED
                 ]:
                     raise oe
                 else:
@@ -70,8 +103,8 @@ class Client:
         return result
 
     @staticmethod
-    def get_balance(account):
-        response = account.get_balance()
+    def get_balance(account, timeout=None):
+        response = account.get_balance(timeout=timeout)
         if response.code == OperationResponse.SUCCEED:
             return response.body
         if response.code == OperationResponse.INCORRECT_RESPONSE:
@@ -81,8 +114,8 @@ class Client:
         return float('nan')
 
     @staticmethod
-    def withdraw(account, amount):
-        response = account.withdraw(amount)
+    def withdraw(account, amount, timeout=None):
+        response = account.withdraw(amount, timeout=timeout)
         if response.code == OperationResponse.SUCCEED:
             return response.body
         if response.code == OperationResponse.INCORRECT_RESPONSE:
@@ -92,12 +125,90 @@ class Client:
         return float('nan')
 
     @staticmethod
-    def deposit(account, amount):
-        response = account.deposit(amount)
+    def deposit(account, amount, timeout=None):
+        response = account.deposit(amount, timeout=timeout)
         if response.code == OperationResponse.SUCCEED:
             return response.body
         if response.code == OperationResponse.INCORRECT_RESPONSE:
             print(response)
         else:
             raise OperationException(response)
-        return float('nan')
\ No newline at end of file
+        return float('nan')
+
+    @staticmethod
+    def configure_executor(max_workers=ASYNC_WORKERS, executor=None):
+        # executor - готовый concurrent.futures.Executor (Client его не завершает),
+        # иначе новый ThreadPoolExecutor на max_workers потоков. Прежний собственный пул
+        # завершается после уже поставленных в него операций
+        if executor is None:
+            if max_workers < 1:
+                raise ValueError("max_workers must be positive")
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="account-async")
+            owned = True
+        else:
+            owned = False
+        with Client.executor_lock:
+            previous, previous_owned = Client.executor, Client.executor_owned
+            Client.executor, Client.executor_owned = executor, owned
+        if previous is not None and previous_owned:
+            previous.shutdown(wait=False)
+
+    @staticmethod
+    def shutdown_executor(wait=True):
+        with Client.executor_lock:
+            previous, previous_owned = Client.executor, Client.executor_owned
+            Client.executor, Client.executor_owned = None, False
+        if previous is not None and previous_owned:
+            previous.shutdown(wait=wait)
+
+    @staticmethod
+    def get_executor():
+        with Client.executor_lock:
+            if Client.executor is None:
+                # concurrent.futures загружается только при первой асинхронной операции
+                from concurrent.futures import ThreadPoolExecutor
+                Client.executor = ThreadPoolExecutor(max_workers=Client.ASYNC_WORKERS,
+                                                     thread_name_prefix="account-async")
+                Client.executor_owned = True
+            return Client.executor
+
+    # *_async возвращают concurrent.futures.Future с результатом синхронного варианта:
+    # баланс, NaN при INCORRECT_RESPONSE, OperationException из future.result() при остальных ошибках
+    @staticmethod
+    def get_balance_async(account, timeout=None):
+        return Client.get_executor().submit(Client.get_balance, account, timeout)
+
+    @staticmethod
+    def withdraw_async(account, amount, timeout=None):
+        return Client.get_executor().submit(Client.withdraw, account, amount, timeout)
+
+    @staticmethod
+    def deposit_async(account, amount, timeout=None):
+        return Client.get_executor().submit(Client.deposit, account, amount, timeout)
+
+    @staticmethod
+    def gather(futures, timeout=None, return_exceptions=False):
+        # Результаты futures в порядке передачи; timeout - общий срок в секундах на все.
+        # Без return_exceptions первое (по порядку) исключение пробрасывается; по истечении срока
+        # невыполненные futures отменяются (ещё не начатые не выполнятся) и возникает TimeoutError.
+        # С return_exceptions=True исключения, в том числе TimeoutError невыполненных, стоят на месте результатов
+        futures = list(futures)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = []
+        for future in futures:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                results.append(future.result(remaining))
+            except Exception as e:
+                if not future.done():
+                    e = TimeoutError(f"Operation did not complete in {timeout} seconds")
+                    if not return_exceptions:
+                        for pending in futures:
+                            pending.cancel()
+                        raise e
+                    future.cancel()
+                elif not return_exceptions:
+                    raise
+                results.append(e)
+        return results
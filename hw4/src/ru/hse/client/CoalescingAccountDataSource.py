@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import List, Optional, Sequence
+
+from ru.hse.IAccountDataSource import BatchOperation, IAccountDataSource
+from ru.hse.Metrics import Metrics
+from ru.hse.OperationResponse import OperationResponse
+
+
+class _Flight:
+    __slots__ = ("event", "response")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+
+
+class CoalescingAccountDataSource(IAccountDataSource):
+    # Одновременные get_balance с одинаковыми (login, session) разделяют один запрос к source
+    # и получают один и тот же OperationResponse. Завершившаяся запись (withdraw/deposit)
+    # отцепляет текущий запрос чтения: чтения, начатые после неё, уходят на сервер заново
+    # и не могут вернуть баланс старше этой записи.
+    def __init__(self, source: IAccountDataSource, metrics: Optional[Metrics] = None):
+        self.source = source
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.lock = threading.Lock()
+        self.flights = {}
+
+    def get_balance(self, login: str, session: int, deadline: Optional[float] = None) -> OperationResponse:
+        key = (login, session)
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self.flights[key] = flight
+        if not leader:
+            self.metrics.increment("coalesce.joined")
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not flight.event.wait(timeout):
+                return OperationResponse.DEADLINE_EXCEEDED_RESPONSE
+            return flight.response
+
+        self.metrics.increment("coalesce.leader")
+        try:
+            if deadline is None:
+                flight.response = self.source.get_balance(login, session)
+            else:
+                flight.response = self.source.get_balance(login, session, deadline=deadline)
+        except BaseException as e:
+            # присоединившиеся читатели получают ответ при любом исходе лидера, в том числе KeyboardInterrupt
+            flight.response = OperationResponse(OperationResponse.UNDEFINED_ERROR, str(e))
+            raise
+        finally:
+            self.detach(key, flight)
+            flight.event.set()
+        return flight.response
+
+    def withdraw(self, login: str, session: int, balance: float, deadline: Optional[float] = None) -> OperationResponse:
+        try:
+            if deadline is None:
+                return self.source.withdraw(login, session, balance)
+            return self.source.withdraw(login, session, balance, deadline=deadline)
+        finally:
+            self.detach((login, session))
+
+    def deposit(self, login: str, session: int, balance: float, deadline: Optional[float] = None) -> OperationResponse:
+        try:
+            if deadline is None:
+                return self.source.deposit(login, session, balance)
+            return self.source.deposit(login, session, balance, deadline=deadline)
+        finally:
+            self.detach((login, session))
+
+    def execute_batch(self, ops: Sequence[BatchOperation]) -> List[OperationResponse]:
+        ops = list(ops)
+        try:
+            return self.source.execute_batch(ops)
+        finally:
+            for name, login, session, _ in ops:
+                if name != "balance":
+                    self.detach((login, session))
+
+    def detach(self, key, flight: Optional[_Flight] = None):
+        with self.lock:
+            current = self.flights.get(key)
+            if current is not None and (flight is None or current is flight):
+                del self.flights[key]
@@ -0,0 +1,59 @@
+import bisect
+import hashlib
+import threading
+from typing import Dict, Generic, Hashable, List, Tuple, TypeVar
+
+Node = TypeVar("Node", bound=Hashable)
+
+
+class ConsistentHashRing(Generic[Node]):
+    # Кольцо согласованного хеширования: каждый узел занимает virtual_nodes точек кольца,
+    # ключ принадлежит узлу первой точки не меньше hash(key). Добавление или удаление
+    # одного из N узлов переносит только ~1/N ключей. Хеш (blake2b) не зависит от PYTHONHASHSEED,
+    # поэтому разные процессы направляют один login на один узел.
+    def __init__(self, nodes=(), virtual_nodes: int = 160):
+        if virtual_nodes < 1:
+            raise ValueError("virtual_nodes must be positive")
+        self.virtual_nodes = virtual_nodes
+        self.lock = threading.Lock()
+        # (точки, владельцы) - одна пара, чтобы node_for не увидел точки нового кольца с владельцами старого
+        self.table: Tuple[List[int], List[Node]] = ([], [])
+        self.nodes: Dict[Node, List[int]] = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def add(self, node: Node):
+        with self.lock:
+            if node in self.nodes:
+                raise ValueError(f"Node {node!r} is already in the ring")
+            points = [self.hash(f"{node}#{i}") for i in range(self.virtual_nodes)]
+            self.nodes[node] = points
+            self.rebuild()
+
+    def remove(self, node: Node):
+        with self.lock:
+            if self.nodes.pop(node, None) is None:
+                raise KeyError(node)
+            self.rebuild()
+
+    def rebuild(self):
+        # новые списки подменяются целиком: node_for читает их без блокировки
+        ring = sorted((point, node) for node, points in self.nodes.items() for point in points)
+        self.table = ([point for point, _ in ring], [node for _, node in ring])
+
+    def node_for(self, key: str) -> Node:
+        points, owners = self.table
+        if not points:
+            raise LookupError("Hash ring is empty")
+        index = bisect.bisect_left(points, self.hash(key))
+        return owners[index if index < len(points) else 0]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        return node in self.nodes
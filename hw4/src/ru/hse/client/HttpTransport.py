@@ -0,0 +1,98 @@
+import threading
+import weakref
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PoolExhaustedError(requests.ConnectionError):
+    pass
+
+
+class PoolTimeoutError(requests.Timeout):
+    pass
+
+
+class ThreadSession:
+    # Session потока в threading.local: когда поток завершается, держатель освобождается
+    # и финализатор убирает его Session из HttpTransport.sessions
+    __slots__ = ("session", "__weakref__")
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+
+def forget_session(sessions: set, lock: threading.Lock, session: requests.Session):
+    # Соединения Session лежат в общем адаптере и остаются в пуле; session.close() закрыл бы и его
+    with lock:
+        sessions.discard(session)
+
+
+class HttpTransport:
+    # Пул keep-alive соединений к одному серверу (base_url).
+    # Сам пул urllib3 общий для всех потоков, а requests.Session у каждого потока своя,
+    # поскольку Session не гарантирует потокобезопасность. Session завершившегося потока
+    # забывается, так что короткоживущие потоки (ThreadPoolExecutor) их не накапливают.
+    DEFAULT_HEADERS = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+
+    def __init__(self, base_url: str, max_connections: int = 10, pool_block: bool = True,
+                 pool_timeout: Optional[float] = None, keep_alive: bool = True):
+        if max_connections < 1:
+            raise ValueError("max_connections must be positive")
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.pool_block = pool_block
+        self.pool_timeout = pool_timeout
+        self.keep_alive = keep_alive
+        self.headers = dict(self.DEFAULT_HEADERS)
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        # pool_block=False: при исчерпании пула открываются дополнительные соединения,
+        # которые закрываются после ответа (поведение urllib3).
+        # pool_block=True: запрос ждёт свободное соединение не дольше pool_timeout,
+        # после чего завершается PoolExhaustedError (POOL_EXHAUSTED для клиента).
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, pool_block=False)
+        self.slots = threading.BoundedSemaphore(max_connections) if pool_block else None
+        self.local = threading.local()
+        self.sessions = set()
+        self.sessions_lock = threading.Lock()
+
+    def get_session(self) -> requests.Session:
+        holder = getattr(self.local, "session", None)
+        if holder is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            holder = ThreadSession(session)
+            weakref.finalize(holder, forget_session, self.sessions, self.sessions_lock, session)
+            self.local.session = holder
+            with self.sessions_lock:
+                self.sessions.add(session)
+        return holder.session
+
+    def post(self, path: str, json_body: dict, timeout: Optional[float] = None,
+             headers: Optional[dict] = None) -> str:
+        if self.slots is not None:
+            # ожидание соединения тоже расходует время запроса
+            limited_by_request = timeout is not None and (self.pool_timeout is None or timeout < self.pool_timeout)
+            if not self.slots.acquire(timeout=timeout if limited_by_request else self.pool_timeout):
+                if limited_by_request:
+                    raise PoolTimeoutError(f"Timed out waiting for connection to {self.base_url}")
+                raise PoolExhaustedError(f"Connection pool to {self.base_url} is exhausted")
+        try:
+            response = self.get_session().post(self.base_url + path, json=json_body, timeout=timeout, headers=headers)
+            response.raise_for_status()
+            return response.text
+        finally:
+            if self.slots is not None:
+                self.slots.release()
+
+    def close(self):
+        with self.sessions_lock:
+            sessions = list(self.sessions)
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+        self.adapter.close()
@@ -0,0 +1,24 @@
+import threading
+from collections import deque
+from typing import Optional
+
+
+class LatencyTracker:
+    # Скользящее окно последних задержек (секунды) для вычисления перцентилей
+    def __init__(self, window: int = 256, min_samples: int = 16):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        # None, пока данных слишком мало для оценки
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100.0))
+        return ordered[index]
@@ -0,0 +1,19 @@
+import hashlib
+
+from ru.hse.IPasswordEncoder import IPasswordEncoder
+
+
+class Pbkdf2PasswordEncoder(IPasswordEncoder):
+    # PBKDF2-HMAC с солью из salt и login; результат - hex-строка длины 2 * key_length
+    def __init__(self, salt: bytes, iterations: int = 600_000, hash_name: str = "sha256", key_length: int = 32):
+        if iterations < 1:
+            raise ValueError("iterations must be positive")
+        self.salt = salt
+        self.iterations = iterations
+        self.hash_name = hash_name
+        self.key_length = key_length
+
+    def encode(self, login: str, password: str) -> str:
+        salt = self.salt + login.encode("utf-8")
+        return hashlib.pbkdf2_hmac(self.hash_name, password.encode("utf-8"), salt, self.iterations,
+                                   self.key_length).hex()
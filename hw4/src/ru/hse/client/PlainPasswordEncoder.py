@@ -0,0 +1,7 @@
+from ru.hse.IPasswordEncoder import IPasswordEncoder
+
+
+class PlainPasswordEncoder(IPasswordEncoder):
+    # Прежнее преобразование AccountManager.get_encoded_password: "encoded_" + password
+    def encode(self, login: str, password: str) -> str:
+        return f"encoded_{password}"
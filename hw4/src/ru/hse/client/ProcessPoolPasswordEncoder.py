@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from ru.hse.IPasswordEncoder import IPasswordEncoder
+
+
+class ProcessPoolPasswordEncoder(IPasswordEncoder):
+    # Выполняет encoder.encode в пуле процессов, чтобы CPU-ёмкие KDF параллельных login
+    # занимали все ядра, а не делили GIL одного процесса. encoder передаётся в процессы через pickle.
+    # Пул создаётся при первом encode; close() его останавливает.
+    def __init__(self, encoder: IPasswordEncoder, max_workers: Optional[int] = None, mp_context=None):
+        self.encoder = encoder
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def encode(self, login: str, password: str) -> str:
+        return self.get_executor().submit(self.encoder.encode, login, password).result()
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        executor = self.executor
+        if executor is None:
+            with self.lock:
+                if self.executor is None:
+                    self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context)
+                executor = self.executor
+        return executor
+
+    def close(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
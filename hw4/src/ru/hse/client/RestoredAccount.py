@@ -0,0 +1,55 @@
+from ru.hse.Account import Account
+from ru.hse.OperationResponse import OperationResponse
+
+
+class RestoredAccount(Account):
+    # Account из снимка сессий (AccountManager.restore_sessions).
+    # Источник данных и кэш баланса подключаются при первом обращении к storage;
+    # если при первом использовании сервер отвечает INCORRECT_SESSION или NOT_LOGGED,
+    # сессия восстанавливается через AccountManager.reestablish и операция повторяется один раз.
+    STALE_SESSION_CODES = (OperationResponse.INCORRECT_SESSION, OperationResponse.NOT_LOGGED)
+    __slots__ = ("manager", "bound_storage", "verified")
+
+    def __init__(self, login, session, manager):
+        self.manager = manager
+        self.bound_storage = None
+        self.verified = False
+        super().__init__(login)
+        self.active_session = session
+
+    @property
+    def storage(self):
+        if self.bound_storage is None:
+            self.manager.bind_account(self)
+        return self.bound_storage
+
+    @storage.setter
+    def storage(self, accounts_data):
+        self.bound_storage = accounts_data
+
+    def withdraw(self, amount, timeout=None):
+        return self.first_use(super().withdraw, amount, timeout=timeout)
+
+    def deposit(self, amount, timeout=None):
+        return self.first_use(super().deposit, amount, timeout=timeout)
+
+    def get_balance(self, timeout=None):
+        return self.first_use(super().get_balance, timeout=timeout)
+
+    def first_use(self, operation, *args, **kwargs):
+        if self.verified:
+            return operation(*args, **kwargs)
+        session = self.active_session
+        response = operation(*args, **kwargs)
+        if self.is_stale(response) and self.manager.reestablish(self, session):
+            response = operation(*args, **kwargs)
+        if not self.is_stale(response):
+            self.verified = True
+        return response
+
+    @classmethod
+    def is_stale(cls, response) -> bool:
+        # map_deposit_response оборачивает INCORRECT_SESSION в INCORRECT_RESPONSE
+        if response.code == OperationResponse.INCORRECT_RESPONSE and isinstance(response.body, OperationResponse):
+            response = response.body
+        return response.code in cls.STALE_SESSION_CODES
@@ -0,0 +1,22 @@
+import random
+
+
+class RetryPolicy:
+    # Повторы при CONNECTION_ERROR с экспоненциальной задержкой и "full jitter":
+    # задержка перед попыткой n+1 случайна в [0, min(max_delay, base_delay * multiplier ** (n - 1))]
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.05, max_delay: float = 1.0,
+                 multiplier: float = 2.0, jitter: bool = True):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be positive")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+RetryPolicy.NO_RETRY = RetryPolicy(max_attempts=1)
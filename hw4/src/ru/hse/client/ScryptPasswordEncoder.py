@@ -0,0 +1,20 @@
+import hashlib
+
+from ru.hse.IPasswordEncoder import IPasswordEncoder
+
+
+class ScryptPasswordEncoder(IPasswordEncoder):
+    # scrypt (memory-hard: около 128 * n * r байт на вызов) с солью из salt и login; результат - hex-строка
+    def __init__(self, salt: bytes, n: int = 2 ** 14, r: int = 8, p: int = 1, key_length: int = 32):
+        if n < 2 or n & (n - 1):
+            raise ValueError("n must be a power of 2 greater than 1")
+        self.salt = salt
+        self.n = n
+        self.r = r
+        self.p = p
+        self.key_length = key_length
+
+    def encode(self, login: str, password: str) -> str:
+        salt = self.salt + login.encode("utf-8")
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=self.n, r=self.r, p=self.p,
+                              maxmem=256 * self.n * self.r * self.p, dklen=self.key_length).hex()
@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+from ru.hse.Account import Account
+
+
+class SessionEvictor:
+    # Фоновый поток вытеснения сессий AccountManager.active_accounts:
+    # сессии без операций дольше idle_timeout и, сверх max_accounts, давно не использованные (LRU по last_used).
+    # Вытесненные аккаунты выходят через AccountManager.evict (call_logout) пачками по batch_size,
+    # logout пачки отправляются параллельно; вызывающий поток только будит поток через notify().
+    # Порядок LRU хранится в куче (last_used при постановке, номер, аккаунт), которую меняет только этот поток:
+    # активированные аккаунты приходят через очередь track() без блокировки, устаревшая запись
+    # (аккаунт использован позже) переставляется при выходе на вершину, неактивная - выбрасывается.
+    # Поэтому выбор жертв не перебирает все сессии под accounts_lock, а при max_accounts без idle_timeout
+    # и заполнении не выше max_accounts куча не просматривается вовсе.
+    def __init__(self, manager, max_accounts: Optional[int] = None, idle_timeout: Optional[float] = None,
+                 interval: float = 1.0, batch_size: int = 100):
+        if max_accounts is not None and max_accounts < 1:
+            raise ValueError("max_accounts must be positive")
+        if idle_timeout is not None and idle_timeout <= 0:
+            raise ValueError("idle_timeout must be positive")
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.manager = manager
+        self.max_accounts = max_accounts
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self.batch_size = batch_size
+        self.tracked = deque()
+        self.heap = []
+        self.counter = itertools.count()
+        self.select_lock = threading.Lock()
+        self.executor = None
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="session-evictor", daemon=True)
+        self.thread.start()
+
+    def track(self, account: Account):
+        # deque.append потокобезопасен: вызывается из set_active_account без дополнительной блокировки
+        self.tracked.append(account)
+
+    def notify(self, size: int):
+        if self.max_accounts is not None and size > self.max_accounts:
+            self.wakeup.set()
+
+    def run(self):
+        while not self.stopped:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            if not self.stopped:
+                self.evict()
+
+    def is_active(self, account: Account) -> bool:
+        return self.manager.get_active_account(account.get_login(), "evict") is account
+
+    def drain(self):
+        while self.tracked:
+            account = self.tracked.popleft()
+            heapq.heappush(self.heap, (account.last_used, next(self.counter), account))
+
+    def compact(self):
+        # записи вытесненных и вышедших аккаунтов копятся, пока не дойдут до вершины: при избытке куча
+        # пересобирается по одному запросу active_accounts на запись
+        seen = set()
+        entries = []
+        for _, _, account in self.heap:
+            if id(account) not in seen and self.is_active(account):
+                seen.add(id(account))
+                entries.append((account.last_used, next(self.counter), account))
+        heapq.heapify(entries)
+        self.heap = entries
+
+    def select(self, now: float) -> List[Tuple[Account, float, str]]:
+        # (аккаунт, last_used при выборе, причина); аккаунт, использованный после выбора, не вытесняется
+        with self.select_lock:
+            self.drain()
+            size = len(self.manager.active_accounts)
+            if len(self.heap) > 2 * size + self.batch_size:
+                self.compact()
+            excess = size - self.max_accounts if self.max_accounts is not None else 0
+            if self.idle_timeout is None and excess <= 0:
+                return []
+            victims, seen = [], set()
+            while self.heap:
+                used, _, account = self.heap[0]
+                if id(account) in seen or not self.is_active(account):
+                    heapq.heappop(self.heap)
+                    continue
+                if account.last_used != used:
+                    heapq.heapreplace(self.heap, (account.last_used, next(self.counter), account))
+                    continue
+                if self.idle_timeout is not None and now - used >= self.idle_timeout:
+                    reason = "idle"
+                elif excess > 0:
+                    reason = "capacity"
+                else:
+                    break
+                heapq.heappop(self.heap)
+                seen.add(id(account))
+                victims.append((account, used, reason))
+                excess -= 1
+            # жертвы остаются в куче: вытесненные выбросятся при следующем выборе, а использованные
+            # после выбора встанут на место по новому last_used
+            for account, used, _ in victims:
+                heapq.heappush(self.heap, (used, next(self.counter), account))
+            return victims
+
+    def evict(self, now: Optional[float] = None) -> int:
+        metrics = self.manager.metrics
+        victims = self.select(time.monotonic() if now is None else now)
+        if not victims:
+            return 0
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(max_workers=min(self.batch_size, self.manager.BULK_WORKERS),
+                                               thread_name_prefix="session-evictor-logout")
+        evicted = 0
+        for start in range(0, len(victims), self.batch_size):
+            batch = victims[start:start + self.batch_size]
+            results = self.executor.map(lambda victim: self.manager.evict(victim[0], victim[1]), batch)
+            for (_, _, reason), done in zip(batch, results):
+                if done:
+                    evicted += 1
+                    metrics.increment(f"sessions.evicted.{reason}")
+            metrics.set_gauge("sessions.active", len(self.manager.active_accounts))
+        return evicted
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+        if self.thread is not threading.current_thread():
+            self.thread.join()
+        if self.executor is not None:
+            self.executor.shutdown()
@@ -0,0 +1,59 @@
+import mmap
+import os
+import struct
+import tempfile
+from typing import Iterable, Iterator, Tuple
+
+# Файл: заголовок MAGIC + число записей (uint32), затем записи
+# session (int64) + длина login в байтах UTF-8 (uint16) + login; все числа big-endian
+_HEADER = struct.Struct(">8sI")
+_RECORD = struct.Struct(">qH")
+
+
+class SessionSnapshot:
+    # Снимок активных сессий AccountManager (login, active_session) для тёплого перезапуска.
+    # write пишет во временный файл рядом с path и атомарно подменяет path (os.replace),
+    # поэтому при сбое остаётся прежний снимок целиком; read разбирает файл через mmap.
+    MAGIC = b"HSESESS1"
+
+    @staticmethod
+    def write(path: str, sessions: Iterable[Tuple[str, int]]) -> int:
+        records = []
+        for login, session in sessions:
+            encoded = login.encode("utf-8")
+            records.append(_RECORD.pack(session, len(encoded)) + encoded)
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temporary = tempfile.mkstemp(prefix=".sessions-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(SessionSnapshot.MAGIC, len(records)))
+                f.write(b"".join(records))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return len(records)
+
+    @staticmethod
+    def read(path: str) -> Iterator[Tuple[str, int]]:
+        # ValueError - файл не является снимком или обрезан
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{path} is not a session snapshot")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, count = _HEADER.unpack_from(data, 0)
+                if magic != SessionSnapshot.MAGIC:
+                    raise ValueError(f"{path} is not a session snapshot")
+                offset = _HEADER.size
+                for _ in range(count):
+                    if offset + _RECORD.size > size:
+                        raise ValueError(f"{path} is truncated")
+                    session, length = _RECORD.unpack_from(data, offset)
+                    offset += _RECORD.size
+                    if offset + length > size:
+                        raise ValueError(f"{path} is truncated")
+                    yield data[offset:offset + length].decode("utf-8"), session
+                    offset += length
@@ -0,0 +1,122 @@
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from ru.hse.IAccountDataSource import BatchOperation, IAccountDataSource
+from ru.hse.IAuthorizationSource import IAuthorizationSource
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.ConsistentHashRing import ConsistentHashRing
+
+
+class ShardedAccountSource(IAccountDataSource, IAuthorizationSource):
+    # Источник авторизации и данных поверх нескольких узлов банка: каждый login обслуживается
+    # узлом, выбранным согласованным хешированием (ConsistentHashRing), - там же живёт его сессия.
+    # shards - список URL (для каждого свой ApiClient со своим пулом соединений)
+    # или словарь {имя: источник}. После add_shard/remove_shard около 1/N login переходит
+    # на другой узел, и их сессии на прежнем узле для клиента теряются (NOT_LOGGED).
+    # Маршрутизация - неизменяемая пара routing = (кольцо, {имя: источник}): add_shard/remove_shard
+    # под lock строят новую пару и подменяют её целиком, запросы читают её один раз без блокировки.
+    def __init__(self, shards: Union[Sequence[str], Mapping[str, IAccountDataSource]], virtual_nodes: int = 160,
+                 **api_client_kwargs):
+        self.api_client_kwargs = api_client_kwargs
+        self.virtual_nodes = virtual_nodes
+        self.lock = threading.Lock()
+        self.routing: Tuple[ConsistentHashRing, Dict[str, IAccountDataSource]] = \
+            (ConsistentHashRing(virtual_nodes=virtual_nodes), {})
+        if not isinstance(shards, Mapping):
+            shards = {url: self.new_api_client(url) for url in shards}
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.publish(dict(shards))
+
+    @property
+    def ring(self) -> ConsistentHashRing:
+        return self.routing[0]
+
+    @property
+    def shards(self) -> Dict[str, IAccountDataSource]:
+        return self.routing[1]
+
+    def publish(self, shards: Dict[str, IAccountDataSource]):
+        self.routing = (ConsistentHashRing(shards, virtual_nodes=self.virtual_nodes), shards)
+
+    def new_api_client(self, url: str) -> IAccountDataSource:
+        from ru.hse.client.ApiClient import ApiClient
+        return ApiClient(url, **self.api_client_kwargs)
+
+    def add_shard(self, name: str, source: Optional[IAccountDataSource] = None):
+        # source=None - ApiClient для URL name
+        with self.lock:
+            shards = dict(self.shards)
+            if name in shards:
+                raise ValueError(f"Shard {name} already exists")
+            shards[name] = source if source is not None else self.new_api_client(name)
+            self.publish(shards)
+
+    def remove_shard(self, name: str) -> IAccountDataSource:
+        # Возвращает источник удалённого узла; закрыть его - забота вызывающего
+        with self.lock:
+            shards = dict(self.shards)
+            if len(shards) == 1 and name in shards:
+                raise ValueError("Cannot remove the last shard")
+            source = shards.pop(name)
+            self.publish(shards)
+            return source
+
+    def shard_for(self, login: str) -> str:
+        return self.ring.node_for(login or "")
+
+    def source_for(self, login: str):
+        ring, shards = self.routing
+        return shards[ring.node_for(login or "")]
+
+    def register(self, login: str, password: str) -> OperationResponse:
+        return self.source_for(login).register(login, password)
+
+    def login(self, login: str, password: str) -> OperationResponse:
+        return self.source_for(login).login(login, password)
+
+    def logout(self, login: str, active_session: int) -> OperationResponse:
+        return self.source_for(login).logout(login, active_session)
+
+    def withdraw(self, login: str, session: int, balance: float, deadline: Optional[float] = None,
+                 **kwargs) -> OperationResponse:
+        if deadline is not None:
+            kwargs["deadline"] = deadline
+        return self.source_for(login).withdraw(login, session, balance, **kwargs)
+
+    def deposit(self, login: str, session: int, balance: float, deadline: Optional[float] = None,
+                **kwargs) -> OperationResponse:
+        if deadline is not None:
+            kwargs["deadline"] = deadline
+        return self.source_for(login).deposit(login, session, balance, **kwargs)
+
+    def get_balance(self, login: str, session: int, deadline: Optional[float] = None) -> OperationResponse:
+        if deadline is None:
+            return self.source_for(login).get_balance(login, session)
+        return self.source_for(login).get_balance(login, session, deadline=deadline)
+
+    def execute_batch(self, ops: Sequence[BatchOperation]) -> List[OperationResponse]:
+        # Операции группируются по узлам (по пакету на узел), ответы возвращаются в исходном порядке
+        ring, shards = self.routing
+        groups: Dict[str, List[int]] = {}
+        for i, (_, login, _, _) in enumerate(ops):
+            groups.setdefault(ring.node_for(login or ""), []).append(i)
+        results = [None] * len(ops)
+        for name, indexes in groups.items():
+            responses = shards[name].execute_batch([ops[i] for i in indexes])
+            for i, response in zip(indexes, responses):
+                results[i] = response
+        return results
+
+    def get_metrics(self) -> Dict[str, float]:
+        # метрики узлов с префиксом "shard.<имя>."
+        snapshot = {}
+        for name, source in self.shards.items():
+            if hasattr(source, "get_metrics"):
+                snapshot.update({f"shard.{name}.{key}": value for key, value in source.get_metrics().items()})
+        return snapshot
+
+    def close(self):
+        for source in self.shards.values():
+            if hasattr(source, "close"):
+                source.close()
@@ -7,7 +7,7 @@ class MockAccountDataSource(IAccountDataSource):
         self.balances = {}
         self.active_sessions = {}
 
-    def withdraw(self, login: str, session: int, delta: float) -> OperationResponse:
+    def withdraw(self, login: str, session: int, delta: float, deadline=None) -> OperationResponse:
         if login not in self.active_sessions:
             return OperationResponse(OperationResponse.NOT_LOGGED)
 
@@ -27,7 +27,7 @@ class MockAccountDataSource(IAccountDataSource):
 
         return OperationResponse(OperationResponse.SUCCEED, new_balance)
 
-    def deposit(self, login: str, session: int, delta: float) -> OperationResponse:
+    def deposit(self, login: str, session: int, delta: float, deadline=None) -> OperationResponse:
         if login not in self.active_sessions:
             return OperationResponse(OperationResponse.NOT_LOGGED)
 
@@ -42,7 +42,7 @@ class MockAccountDataSource(IAccountDataSource):
 
         return OperationResponse(OperationResponse.SUCCEED, new_balance)
 
-    def get_balance(self, login: str, session: int) -> OperationResponse:
+    def get_balance(self, login: str, session: int, deadline=None) -> OperationResponse:
         if login not in self.active_sessions:
             return OperationResponse(OperationResponse.NOT_LOGGED)
 
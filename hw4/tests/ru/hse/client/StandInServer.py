@@ -0,0 +1,252 @@
+import asyncio
+import base64
+import json
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ru.hse.OperationResponse import OperationResponse
+
+
+# Java-сериализация java.lang.Long / java.lang.Double, как их отдаёт сервер HomeTask04Java
+_NUMBER_CLASS = b"\x72\x00\x10java.lang.Number\x86\xac\x95\x1d\x0b\x94\xe0\x8b\x02\x00\x00\x78\x70"
+_LONG_PREFIX = (b"\xac\xed\x00\x05\x73\x72\x00\x0ejava.lang.Long\x3b\x8b\xe4\x90\xcc\x8f\x23\xdf"
+                b"\x02\x00\x01\x4a\x00\x05value\x78" + _NUMBER_CLASS)
+_DOUBLE_PREFIX = (b"\xac\xed\x00\x05\x73\x72\x00\x10java.lang.Double\x80\xb3\xc2\x4a\x29\x6b\xfb\x04"
+                  b"\x02\x00\x01\x44\x00\x05value\x78" + _NUMBER_CLASS)
+
+
+def java_result_string(code: int, body=None) -> str:
+    if body is None:
+        return str(code)
+    if isinstance(body, str):
+        return f"{code}|1|{body}"
+    if isinstance(body, float):
+        data = _DOUBLE_PREFIX + struct.pack(">d", body)
+    else:
+        data = _LONG_PREFIX + struct.pack(">q", body)
+    return f"{code}|2|{base64.b64encode(data).decode('ascii')}"
+
+
+class StandInBank:
+    # Серверная логика протокола /register, /login, /account/* в памяти
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.passwords = {}
+        self.sessions = {}
+        self.balances = {}
+        self.session_counter = 1
+        self.batch_enabled = True
+        self.requests = 0
+        # Ответы на запросы с заголовком Idempotency-Key запоминаются и повторно не выполняются
+        self.idempotent_results = {}
+        # Сколько следующих запросов выполнить, но оборвать соединение вместо ответа
+        self.drop_responses = 0
+
+    BATCH_PATHS = {"withdraw": "/account/withdraw", "deposit": "/account/deposit", "balance": "/account/balance"}
+
+    def handle(self, path: str, request: dict) -> str:
+        if path == "/account/batch":
+            if not self.batch_enabled:
+                raise KeyError(path)
+            return json.dumps([self.handle(self.BATCH_PATHS[op["op"]], op) for op in request["operations"]])
+        login = request.get("login")
+        with self.lock:
+            if path == "/register":
+                if not login or not request.get("password"):
+                    return java_result_string(OperationResponse.NOT_LOGGED, "Username и password обязательны")
+                if login in self.passwords:
+                    return java_result_string(OperationResponse.ALREADY_INITIATED)
+                self.passwords[login] = request["password"]
+                self.balances[login] = 0.0
+                return java_result_string(OperationResponse.SUCCEED, self.new_session(login))
+            if path == "/login":
+                if self.passwords.get(login) is None or self.passwords[login] != request.get("password"):
+                    return java_result_string(OperationResponse.NO_USER_INCORRECT_PASSWORD)
+                if login in self.sessions:
+                    return java_result_string(OperationResponse.ALREADY_LOGGED, self.sessions[login])
+                return java_result_string(OperationResponse.SUCCEED, self.new_session(login))
+
+            if login not in self.sessions:
+                return java_result_string(OperationResponse.NOT_LOGGED, "Сессия не существует")
+            if self.sessions[login] != request.get("session"):
+                return java_result_string(OperationResponse.INCORRECT_SESSION)
+            if path == "/account/logout":
+                del self.sessions[login]
+                return java_result_string(OperationResponse.SUCCEED)
+            if path == "/account/balance":
+                return java_result_string(OperationResponse.SUCCEED, self.balances[login])
+            if path == "/account/deposit":
+                self.balances[login] += float(request["amount"])
+                return java_result_string(OperationResponse.SUCCEED, self.balances[login])
+            if path == "/account/withdraw":
+                amount = float(request["amount"])
+                if self.balances[login] < amount:
+                    return java_result_string(OperationResponse.NO_MONEY, self.balances[login])
+                self.balances[login] -= amount
+                return java_result_string(OperationResponse.SUCCEED, self.balances[login])
+        raise KeyError(path)
+
+    def handle_idempotent(self, key, path: str, request: dict) -> str:
+        if key is None:
+            return self.handle(path, request)
+        with self.lock:
+            if key in self.idempotent_results:
+                return self.idempotent_results[key]
+        result = self.handle(path, request)
+        with self.lock:
+            return self.idempotent_results.setdefault(key, result)
+
+    def take_dropped_response(self) -> bool:
+        with self.lock:
+            if self.drop_responses > 0:
+                self.drop_responses -= 1
+                return True
+            return False
+
+    def new_session(self, login: str) -> int:
+        session = self.session_counter
+        self.session_counter += 1
+        self.sessions[login] = session
+        return session
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.connections.add(self.client_address)
+        with self.server.bank.lock:
+            self.server.bank.requests += 1
+        # latency - задержка ответа в секундах или функция, возвращающая её для каждого запроса
+        latency = self.server.latency() if callable(self.server.latency) else self.server.latency
+        if latency:
+            time.sleep(latency)
+        try:
+            payload = self.server.bank.handle_idempotent(self.headers.get("Idempotency-Key"), self.path, request)
+            payload = payload.encode("utf-8")
+            status = 200
+        except KeyError:
+            payload, status = b"Not found", 404
+        if self.server.bank.take_dropped_response():
+            self.close_connection = True
+            return
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except ConnectionError:
+            # клиент не дождался ответа (deadline)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    # очередь listen() по умолчанию (5) теряет одновременные подключения десятков потоков бенчмарков
+    request_queue_size = 128
+
+
+class StandInServer:
+    # Локальный HTTP-сервер, заменяющий HomeTask04Java.jar в тестах и бенчмарках
+    def __init__(self, latency: float = 0.0, bank: StandInBank = None):
+        self.bank = bank or StandInBank()
+        self.httpd = _StandInHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.bank = self.bank
+        self.httpd.latency = latency
+        self.httpd.connections = set()
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def connection_count(self) -> int:
+        # Количество различных TCP-соединений клиентов за время работы сервера
+        return len(self.httpd.connections)
+
+    def start(self) -> 'StandInServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class AsyncStandInServer:
+    # Тот же StandInBank поверх asyncio.start_server (HTTP/1.1 keep-alive)
+    def __init__(self, latency: float = 0.0, bank: StandInBank = None):
+        self.bank = bank or StandInBank()
+        self.latency = latency
+        self.server = None
+        self.connection_count = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self) -> 'AsyncStandInServer':
+        self.server = await asyncio.start_server(self.handle_connection, "127.0.0.1", 0, backlog=4096)
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connection_count += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                path = request_line.split(b" ")[1].decode("ascii")
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                request = json.loads(await reader.readexactly(length) or b"{}")
+                self.bank.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                try:
+                    payload = self.bank.handle(path, request).encode("utf-8")
+                    status = b"200 OK"
+                except KeyError:
+                    payload, status = b"Not found", b"404 Not Found"
+                writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain; charset=utf-8\r\n"
+                             b"Content-Length: " + str(len(payload)).encode("ascii") + b"\r\n\r\n" + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,53 @@
+import sys
+
+import pytest
+
+from ru.hse.Account import Account
+from ru.hse.client.AccountManager import AccountManager
+from ru.hse.client.RestoredAccount import RestoredAccount
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class TestAccountMemory:
+    def setup_method(self):
+        self.data_source = MockAccountDataSource()
+        self.manager = AccountManager(MockAuthorizationSource(), self.data_source)
+
+    def teardown_method(self):
+        self.manager.close()
+
+    def test_account_has_no_instance_dict(self):
+        #arrange
+        account = Account("user")
+
+        #act
+        with pytest.raises(AttributeError):
+            account.unknown_attribute = 1
+
+        #assert
+        assert not hasattr(account, "__dict__"), "Account carries a per-instance __dict__"
+        assert not hasattr(RestoredAccount("user", 1, self.manager), "__dict__"), \
+            "RestoredAccount carries a per-instance __dict__"
+
+    def test_logged_in_accounts_share_data_source(self):
+        #act
+        first = self.manager.register("first", "password")
+        second = self.manager.register("second", "password")
+
+        #assert
+        assert first.storage is self.data_source, "Account does not reference the shared data source"
+        assert second.storage is first.storage, "Accounts do not share the data source"
+
+    def test_active_accounts_key_is_interned_login(self):
+        #arrange
+        login = "".join(["inter", "ned"])
+
+        #act
+        account = self.manager.register(login, "password")
+
+        #assert
+        key = next(iter(self.manager.active_accounts))
+        assert key is account.get_login(), "active_accounts key and Account.login are different strings"
+        assert key is sys.intern("interned"), "active_accounts key is not interned"
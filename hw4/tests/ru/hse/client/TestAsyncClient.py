@@ -0,0 +1,144 @@
+import asyncio
+import math
+import socket
+import time
+
+import pytest
+from unittest import mock
+
+from ru.hse.AsyncAccount import AsyncAccount
+from ru.hse.IAsyncAccountDataSource import IAsyncAccountDataSource
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AsyncApiClient import AsyncApiClient
+from ru.hse.client.AsyncClient import AsyncClient
+
+from StandInServer import AsyncStandInServer
+
+
+class TestAsyncClient:
+    def test_api_client_protocol_round_trip(self):
+        async def scenario():
+            async with AsyncStandInServer() as server:
+                api_client = AsyncApiClient(server.url)
+                session = (await api_client.register("user", "somePassword")).body
+                deposit = await api_client.deposit("user", session, 50.0)
+                withdraw = await api_client.withdraw("user", session, 80.0)
+                balance = await api_client.get_balance("user", session)
+                logout = await api_client.logout("user", session)
+                await api_client.close()
+                return session, deposit, withdraw, balance, logout, server.connection_count
+
+        #act
+        session, deposit, withdraw, balance, logout, connections = asyncio.run(scenario())
+
+        #assert
+        assert isinstance(session, int), "Register did not return session id"
+        assert deposit.code == OperationResponse.SUCCEED and math.isclose(deposit.body, 50.0), "Deposit failed"
+        assert withdraw.code == OperationResponse.NO_MONEY and math.isclose(withdraw.body, 50.0), "Withdraw over balance is not NO MONEY"
+        assert balance.code == OperationResponse.SUCCEED and math.isclose(balance.body, 50.0), "Balance is incorrect"
+        assert logout.code == OperationResponse.SUCCEED, "Logout failed"
+        assert connections == 1, "Keep-alive connection was not reused"
+
+    def test_thousands_of_sessions_on_one_loop(self):
+        #arrange
+        sessions = 2000
+
+        async def session_flow(client, i):
+            account = await client.register(f"user_{i}", "somePassword")
+            await AsyncClient.deposit(account, float(i))
+            balance = await AsyncClient.get_balance(account)
+            await client.logout(account)
+            return balance
+
+        async def scenario():
+            async with AsyncStandInServer() as server:
+                client = AsyncClient(server.url, None, max_connections=64)
+                balances = await asyncio.gather(*(session_flow(client, i) for i in range(sessions)))
+                await client.close()
+                return balances, client.get_account_manager().active_accounts
+
+        #act
+        balances, active_accounts = asyncio.run(scenario())
+
+        #assert
+        assert balances == [float(i) for i in range(sessions)], "Concurrent sessions returned wrong balances"
+        assert not active_accounts, "Some sessions were not logged out"
+
+    def test_requests_run_concurrently(self):
+        #arrange
+        latency = 0.1
+        sessions = 100
+
+        async def scenario():
+            async with AsyncStandInServer(latency=latency) as server:
+                client = AsyncClient(server.url, None)
+                start = time.perf_counter()
+                await asyncio.gather(*(client.register(f"user_{i}", "somePassword") for i in range(sessions)))
+                elapsed = time.perf_counter() - start
+                await client.close()
+                return elapsed
+
+        #act
+        elapsed = asyncio.run(scenario())
+
+        #assert
+        assert elapsed < sessions * latency / 4, "Registrations were not executed concurrently"
+
+    def test_client_errors_are_raised(self):
+        async def scenario():
+            async with AsyncStandInServer() as server:
+                client = AsyncClient(server.url, None)
+                account = await client.register("user", "somePassword")
+                with pytest.raises(OperationException) as already_logged:
+                    await client.login("user", "somePassword")
+                await client.logout(account)
+                with pytest.raises(OperationException) as wrong_password:
+                    await client.login("user", "wrongPassword")
+                await client.close()
+                return already_logged.value, wrong_password.value
+
+        #act
+        already_logged, wrong_password = asyncio.run(scenario())
+
+        #assert
+        assert already_logged.response.code == OperationResponse.ALREADY_LOGGED, "Duplicate login is not ALREADY LOGGED"
+        assert wrong_password.response.code == OperationResponse.NO_USER_INCORRECT_PASSWORD, "Wrong password is not reported"
+
+    def test_connection_refused_is_connection_error(self):
+        #arrange
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        client = AsyncClient(f"http://127.0.0.1:{port}", None)
+
+        #act
+        with pytest.raises(OperationException) as excinfo:
+            asyncio.run(client.login("user", "somePassword"))
+
+        #assert
+        assert excinfo.value.response.code == OperationResponse.CONNECTION_ERROR, "Refused connection is not CONNECTION_ERROR"
+
+    @pytest.mark.parametrize("exception_code", [
+        OperationResponse.NOT_LOGGED,
+        OperationResponse.CONNECTION_ERROR,
+        OperationResponse.INCORRECT_SESSION,
+    ])
+    def test_async_account_maps_data_source_codes(self, exception_code):
+        #arrange
+        data_source = mock.create_autospec(IAsyncAccountDataSource)
+
+        #record
+        data_source.withdraw.return_value = OperationResponse(exception_code)
+
+        #arrange_2
+        account = AsyncAccount("user")
+        account.init_data_storage(data_source)
+        account.active_session = 1
+
+        #act
+        response = asyncio.run(account.withdraw(10.0))
+
+        #assert
+        assert response.code == exception_code, "AsyncAccount does not keep data source error code"
+        data_source.withdraw.assert_awaited_once_with("user", 1, 10.0)
@@ -0,0 +1,151 @@
+import math
+
+import pytest
+from unittest import mock
+
+from ru.hse.Account import Account
+from ru.hse.IAccountDataSource import IAccountDataSource
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.ApiClient import ApiClient
+from ru.hse.client.Client import Client
+
+from MockAccountDataSource import MockAccountDataSource
+from StandInServer import StandInServer
+
+
+class TestBatchOperations:
+    def setup_method(self):
+        self.server = StandInServer().start()
+        self.client = Client(self.server.url, None)
+
+    def teardown_method(self):
+        self.server.stop()
+
+    def test_execute_batch_single_request_keeps_codes(self):
+        #arrange
+        api_client = ApiClient(self.server.url)
+        session = api_client.register("user", "somePassword").body
+        requests_before = self.server.bank.requests
+        ops = [
+            ("deposit", "user", session, 100.0),
+            ("withdraw", "user", session, 30.0),
+            ("withdraw", "user", session, 500.0),
+            ("balance", "user", session, None),
+            ("balance", "user", session + 1, None),
+            ("deposit", "nobody", session, 1.0),
+        ]
+
+        #act
+        results = api_client.execute_batch(ops)
+
+        #assert
+        assert self.server.bank.requests - requests_before == 1, "Batch was not sent as a single request"
+        assert [r.code for r in results] == [
+            OperationResponse.SUCCEED,
+            OperationResponse.SUCCEED,
+            OperationResponse.NO_MONEY,
+            OperationResponse.SUCCEED,
+            OperationResponse.INCORRECT_SESSION,
+            OperationResponse.NOT_LOGGED,
+        ], "Per-operation codes are lost or reordered in batch"
+        assert [r.body for r in results[:4]] == [100.0, 70.0, 70.0, 70.0], "Per-operation balances are incorrect"
+
+    def test_execute_batch_splits_by_max_batch_size(self):
+        #arrange
+        api_client = ApiClient(self.server.url, max_batch_size=4)
+        session = api_client.register("user", "somePassword").body
+        requests_before = self.server.bank.requests
+
+        #act
+        results = api_client.execute_batch([("deposit", "user", session, 1.0)] * 10)
+
+        #assert
+        assert self.server.bank.requests - requests_before == 3, "Batch was not split into max_batch_size chunks"
+        assert [r.body for r in results] == [float(i) for i in range(1, 11)], "Chunked batch results are out of order"
+
+    def test_execute_batch_falls_back_without_endpoint(self):
+        #arrange
+        self.server.bank.batch_enabled = False
+        api_client = ApiClient(self.server.url)
+        session = api_client.register("user", "somePassword").body
+
+        #act
+        first = api_client.execute_batch([("deposit", "user", session, 5.0), ("balance", "user", session, None)])
+        second = api_client.execute_batch([("withdraw", "user", session, 10.0)])
+
+        #assert
+        assert [r.body for r in first] == [5.0, 5.0], "Fallback execution returned incorrect results"
+        assert second[0].code == OperationResponse.NO_MONEY, "Fallback execution lost NO MONEY code"
+        assert api_client.batch_supported is False, "Missing batch endpoint was not remembered"
+
+    def test_account_batch_context_manager(self):
+        #arrange
+        account = self.client.register("user", "somePassword")
+
+        #act
+        with account.batch() as batch:
+            batch.deposit(50.0)
+            batch.withdraw(80.0)
+            batch.withdraw(20.0)
+            balance_index = batch.get_balance()
+
+        #assert
+        results = batch.results
+        assert [r.code for r in results] == [
+            OperationResponse.SUCCEED,
+            OperationResponse.NO_MONEY,
+            OperationResponse.SUCCEED,
+            OperationResponse.SUCCEED,
+        ], "Account batch results do not match individual operation semantics"
+        assert math.isclose(results[balance_index].body, 30.0), "Balance in batch is incorrect"
+
+    def test_account_batch_incorrect_session(self):
+        #arrange
+        account = self.client.register("user", "somePassword")
+        account.active_session += 100
+
+        #act
+        with account.batch() as batch:
+            batch.withdraw(1.0)
+            batch.get_balance()
+
+        #assert
+        assert [r.code for r in batch.results] == [OperationResponse.INCORRECT_SESSION] * 2, \
+            "INCORRECT SESSION is not kept for batched operations"
+
+    def test_account_batch_not_logged_locally(self):
+        #arrange
+        account = Account("user")
+        account.init_data_storage(mock.create_autospec(IAccountDataSource))
+
+        #act
+        with account.batch() as batch:
+            batch.deposit(1.0)
+
+        #assert
+        assert batch.results == [OperationResponse.NOT_LOGGED_RESPONSE], "Local NOT LOGGED is not returned for batch"
+        account.storage.execute_batch.assert_not_called()
+
+
+class TestServerlessBatchOperations:
+    def test_default_execute_batch_runs_sequentially(self):
+        #arrange
+        data_source = MockAccountDataSource()
+        data_source.active_sessions["user"] = 1
+        account = Account("user")
+        account.init_data_storage(data_source)
+        account.active_session = 1
+
+        #act
+        with account.batch() as batch:
+            batch.deposit(10.0)
+            batch.withdraw(15.0)
+
+        #assert
+        assert [r.code for r in batch.results] == [OperationResponse.SUCCEED, OperationResponse.NO_MONEY], \
+            "Default execute_batch returned incorrect codes"
+
+    def test_unknown_operation_rejected(self):
+        #act & assert
+        with pytest.raises(ValueError):
+            MockAccountDataSource().execute_batch([("transfer", "user", 1, 1.0)])
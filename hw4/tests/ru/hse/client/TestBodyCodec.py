@@ -0,0 +1,107 @@
+import base64
+import math
+import pickle
+import struct
+from io import BytesIO
+
+import pytest
+from javaobj import load
+
+from ru.hse.BodyCodec import BodyCodec
+from ru.hse.OperationResponse import OperationResponse
+
+from StandInServer import java_result_string
+
+
+def javaobj_value(data):
+    obj = load(BytesIO(data))
+    return obj.value if hasattr(obj, "value") else str(obj)
+
+
+class TestBodyCodec:
+    def setup_method(self):
+        self.codec = BodyCodec.JAVA_PRIMITIVES
+
+    @pytest.mark.parametrize("value", [0.0, -0.0, 123.45, -1e300, math.inf, 5, -(2 ** 63), 2 ** 63 - 1, True, False,
+                                       "", "balance", "héllo", "nul\x00byte", "한국어"])
+    def test_encoded_stream_is_java_compatible(self, value):
+        #act
+        data = self.codec.encode(value)
+
+        #assert
+        assert javaobj_value(data) == value, "javaobj reads a different value from encoded stream"
+        assert self.codec.decode(data) == value, "Fast path does not invert its encoder"
+        assert type(self.codec.decode(data)) is type(value), "Decoded value has a different type"
+
+    def test_integer_stream_decoded_without_javaobj(self):
+        #arrange
+        data = BodyCodec.JAVA_INTEGER_PREFIX + struct.pack(">i", -7)
+
+        #act
+        value = self.codec.decode(data)
+
+        #assert
+        assert value == -7 and value == javaobj_value(data), "java.lang.Integer stream decoded incorrectly"
+
+    def test_supplementary_characters_use_surrogate_pairs(self):
+        #arrange
+        value = "emoji \U0001F600"
+
+        #act
+        data = self.codec.encode(value)
+
+        #assert
+        assert data == b"\xac\xed\x00\x05\x74\x00\x0cemoji \xed\xa0\xbd\xed\xb8\x80", \
+            "Character outside BMP is not encoded as Java surrogate pair"
+        assert self.codec.decode(data) == value, "Surrogate pair is not decoded back"
+
+    def test_long_string_uses_tc_longstring(self):
+        #arrange
+        value = "x" * 70000
+
+        #act
+        data = self.codec.encode(value)
+
+        #assert
+        assert data[4] == 0x7c, "String longer than 65535 bytes is not TC_LONGSTRING"
+        assert self.codec.decode(data) == value, "Long string round trip failed"
+
+    def test_unknown_stream_falls_back_to_javaobj(self):
+        #arrange
+        data = BodyCodec.JAVA_DOUBLE_PREFIX + struct.pack(">d", 2.5) + b"\x00"
+
+        #act
+        value = self.codec.decode(data)
+
+        #assert
+        assert value == 2.5, "Stream outside of fast path was not decoded by javaobj"
+
+    def test_unknown_type_falls_back_to_pickle(self):
+        #arrange
+        value = [1, 2, 3]
+
+        #act
+        data = self.codec.encode(value)
+
+        #assert
+        assert pickle.loads(data) == value, "Unknown type is not pickled"
+        assert pickle.loads(self.codec.encode(2 ** 70)) == 2 ** 70, "int outside of Long is not pickled"
+
+    def test_result_string_matches_java_server(self):
+        #act
+        double_string = OperationResponse(OperationResponse.SUCCEED, 10.5).to_result_string()
+        long_string = OperationResponse(OperationResponse.SUCCEED, 42).to_result_string()
+
+        #assert
+        assert double_string == java_result_string(OperationResponse.SUCCEED, 10.5), "Double body differs from Java"
+        assert long_string == java_result_string(OperationResponse.SUCCEED, 42), "Long body differs from Java"
+
+    def test_string_body_in_mode_2_is_decoded(self):
+        #arrange
+        string = "0|2|" + base64.b64encode(self.codec.encode("text")).decode("ascii")
+
+        #act
+        response = OperationResponse.decode(string)
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED and response.body == "text", "java.lang.String body is not decoded"
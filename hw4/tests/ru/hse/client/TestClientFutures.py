@@ -0,0 +1,115 @@
+import math
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+from unittest import mock
+
+from ru.hse.IAccountDataSource import IAccountDataSource
+from ru.hse.IAuthorizationSource import IAuthorizationSource
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.Client import Client
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class TestClientFutures:
+    def setup_method(self):
+        Client.configure_executor(max_workers=4)
+
+    def teardown_method(self):
+        Client.shutdown_executor()
+
+    def client(self):
+        auth_source, data_source = MockAuthorizationSource(), MockAccountDataSource()
+        data_source.active_sessions = auth_source.active_sessions
+        return Client(auth_source, data_source)
+
+    def test_deposit_async_fans_out_over_accounts(self):
+        #arrange
+        client = self.client()
+        accounts = [client.register(f"user{i}", "password") for i in range(20)]
+
+        #act
+        futures = [Client.deposit_async(account, float(i)) for i, account in enumerate(accounts)]
+        deposits = Client.gather(futures, timeout=5)
+        balances = Client.gather((Client.get_balance_async(account) for account in accounts), timeout=5)
+
+        #assert
+        assert all(isinstance(future, Future) for future in futures), "deposit_async did not return Future"
+        assert deposits == [float(i) for i in range(20)], "Deposit results are not in submission order"
+        assert balances == deposits, "Balances do not match deposits"
+
+    def test_async_errors_are_mapped_like_sync_path(self):
+        #arrange
+        data_source = mock.create_autospec(IAccountDataSource)
+        auth_source = mock.create_autospec(IAuthorizationSource)
+        auth_source.login.return_value = OperationResponse(OperationResponse.SUCCEED, 1)
+        data_source.withdraw.return_value = OperationResponse(OperationResponse.NO_MONEY, 0.0)
+        data_source.get_balance.return_value = OperationResponse(12345)
+        account = Client(auth_source, data_source).login("someLogin", "somePassword")
+
+        #act
+        withdraw = Client.withdraw_async(account, 10.0)
+        balance = Client.get_balance_async(account)
+
+        #assert
+        with pytest.raises(OperationException) as exc_info:
+            withdraw.result(timeout=5)
+        assert exc_info.value.response.code == OperationResponse.NO_MONEY, "Withdraw error code is not NO MONEY"
+        assert math.isnan(balance.result(timeout=5)), "INCORRECT RESPONSE is not mapped to NaN"
+
+    def test_gather_return_exceptions(self):
+        #arrange
+        client = self.client()
+        account = client.register("user", "password")
+
+        #act
+        results = Client.gather([Client.deposit_async(account, 50.0), Client.withdraw_async(account, 80.0)],
+                                timeout=5, return_exceptions=True)
+
+        #assert
+        assert results[0] == 50.0, "Deposit result is incorrect"
+        assert isinstance(results[1], OperationException), "Withdraw exception was not returned"
+        assert results[1].response.code == OperationResponse.NO_MONEY, "Withdraw error code is not NO MONEY"
+
+    def test_gather_deadline_cancels_pending(self):
+        #arrange
+        release = threading.Event()
+        data_source = mock.create_autospec(IAccountDataSource)
+        auth_source = mock.create_autospec(IAuthorizationSource)
+        auth_source.login.return_value = OperationResponse(OperationResponse.SUCCEED, 1)
+        data_source.get_balance.side_effect = \
+            lambda *args, **kwargs: release.wait(5) and OperationResponse(OperationResponse.SUCCEED, 1.0)
+        account = Client(auth_source, data_source).login("someLogin", "somePassword")
+        Client.configure_executor(max_workers=1)
+        futures = [Client.get_balance_async(account) for _ in range(3)]
+
+        #act
+        try:
+            with pytest.raises(TimeoutError):
+                Client.gather(futures, timeout=0.05)
+        finally:
+            release.set()
+
+        #assert
+        assert futures[0].result(timeout=5) == 1.0, "Running operation was interrupted"
+        assert futures[1].cancelled() and futures[2].cancelled(), "Pending operations were not cancelled"
+
+    def test_configure_executor_uses_given_executor(self):
+        #arrange
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="own")
+        client = self.client()
+        account = client.register("user", "password")
+
+        #act
+        Client.configure_executor(executor=executor)
+        balance = Client.get_balance_async(account).result(timeout=5)
+        Client.shutdown_executor()
+
+        #assert
+        assert balance == 0.0, "Balance is incorrect"
+        assert executor.submit(lambda: 1).result(timeout=5) == 1, "Client shut down an executor it does not own"
+        executor.shutdown()
@@ -0,0 +1,188 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest import mock
+
+from ru.hse.Account import Account
+from ru.hse.IAccountDataSource import IAccountDataSource
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.ApiClient import ApiClient
+from ru.hse.client.Client import Client
+
+from StandInServer import StandInServer
+
+
+class TestServerlessDeadlines:
+    def setup_method(self):
+        self.data_source = mock.create_autospec(IAccountDataSource)
+
+    def test_account_passes_absolute_deadline(self):
+        #arrange
+        self.data_source.get_balance.return_value = OperationResponse(OperationResponse.SUCCEED, 1.0)
+        account = Account("user")
+        account.init_data_storage(self.data_source)
+        account.active_session = 1
+
+        #act
+        before = time.monotonic()
+        account.get_balance(timeout=2.0)
+
+        #assert
+        deadline = self.data_source.get_balance.call_args.kwargs["deadline"]
+        assert before + 2.0 <= deadline <= time.monotonic() + 2.0, "Deadline is not derived from call timeout"
+
+    @pytest.mark.parametrize("operation", ["withdraw", "deposit", "get_balance"])
+    def test_deadline_exceeded_is_raised_by_client(self, operation):
+        #arrange
+        getattr(self.data_source, operation).return_value = OperationResponse(OperationResponse.DEADLINE_EXCEEDED)
+        account = Account("user")
+        account.init_data_storage(self.data_source)
+        account.active_session = 1
+        args = () if operation == "get_balance" else (10.0,)
+
+        #act
+        with pytest.raises(OperationException) as excinfo:
+            getattr(Client, operation)(account, *args, timeout=1.0)
+
+        #assert
+        assert excinfo.value.response.code == OperationResponse.DEADLINE_EXCEEDED, \
+            "Deadline expiry is not reported as DEADLINE EXCEEDED"
+
+
+class TestDeadlinesAndHedging:
+    def setup_method(self):
+        self.delays = []
+        self.server = StandInServer(latency=lambda: self.delays.pop(0) if self.delays else 0.0).start()
+        setup_client = ApiClient(self.server.url)
+        self.session = setup_client.register("user", "somePassword").body
+        setup_client.deposit("user", self.session, 10.0)
+        setup_client.close()
+
+    def teardown_method(self):
+        self.server.stop()
+
+    def test_slow_response_returns_deadline_exceeded(self):
+        #arrange
+        api_client = ApiClient(self.server.url)
+        self.delays.append(1.0)
+
+        #act
+        start = time.monotonic()
+        response = api_client.get_balance("user", self.session, deadline=start + 0.2)
+        elapsed = time.monotonic() - start
+
+        #assert
+        assert response.code == OperationResponse.DEADLINE_EXCEEDED, "Slow response is not DEADLINE EXCEEDED"
+        assert elapsed < 0.8, "Call was not interrupted at its deadline"
+
+    def test_expired_deadline_sends_nothing(self):
+        #arrange
+        api_client = ApiClient(self.server.url)
+        requests_before = self.server.bank.requests
+
+        #act
+        response = api_client.deposit("user", self.session, 1.0, deadline=time.monotonic() - 1)
+
+        #assert
+        assert response is OperationResponse.DEADLINE_EXCEEDED_RESPONSE, "Expired deadline is not reported"
+        assert self.server.bank.requests == requests_before, "Request was sent after its deadline"
+
+    def test_default_timeout_applies_without_deadline(self):
+        #arrange
+        api_client = ApiClient(self.server.url, timeout=0.2)
+        self.delays.append(1.0)
+
+        #act
+        response = api_client.withdraw("user", self.session, 1.0)
+
+        #assert
+        assert response.code == OperationResponse.DEADLINE_EXCEEDED, "Default timeout is not applied"
+
+    def test_hedged_read_takes_fastest_answer(self):
+        #arrange
+        api_client = ApiClient(self.server.url, hedge_reads=True, hedge_initial_delay=0.05)
+        self.delays.append(2.0)
+
+        #act
+        start = time.monotonic()
+        response = api_client.get_balance("user", self.session)
+        elapsed = time.monotonic() - start
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED, "Hedged read failed"
+        assert math.isclose(response.body, 10.0), "Hedged read returned incorrect balance"
+        assert elapsed < 1.0, "Hedged request did not win over slow first request"
+        api_client.close()
+
+    def test_hedge_delay_follows_observed_percentile(self):
+        #arrange
+        api_client = ApiClient(self.server.url, hedge_reads=True, hedge_initial_delay=10.0)
+        for _ in range(20):
+            api_client.get_balance("user", self.session)
+        self.delays.append(2.0)
+
+        #act
+        start = time.monotonic()
+        response = api_client.get_balance("user", self.session)
+        elapsed = time.monotonic() - start
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED, "Hedged read failed"
+        assert elapsed < 1.0, "Hedge delay is not taken from observed latency percentile"
+        api_client.close()
+
+    def test_saturated_hedge_pool_sends_no_duplicate(self):
+        #arrange
+        api_client = ApiClient(self.server.url, hedge_reads=True, hedge_initial_delay=0.05)
+        api_client.hedge_executor.shutdown()
+        api_client.hedge_executor = ThreadPoolExecutor(max_workers=1)
+        release = threading.Event()
+        busy = api_client.hedge_executor.submit(release.wait, 5)
+        self.delays.append(0.3)
+        requests_before = self.server.bank.requests
+
+        #act
+        try:
+            response = api_client.get_balance("user", self.session)
+        finally:
+            release.set()
+            busy.result(timeout=5)
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED, "Read failed while hedge pool was busy"
+        assert math.isclose(response.body, 10.0), "Read returned incorrect balance"
+        assert self.server.bank.requests == requests_before + 1, "Queued read triggered a duplicate request"
+        assert api_client.get_metrics().get("hedge.sent", 0) == 0, "Hedge was sent for a queued read"
+        api_client.close()
+
+    def test_hedged_read_respects_deadline(self):
+        #arrange
+        api_client = ApiClient(self.server.url, hedge_reads=True, hedge_initial_delay=0.05)
+        self.delays.extend([1.0, 1.0])
+
+        #act
+        response = api_client.get_balance("user", self.session, deadline=time.monotonic() + 0.3)
+
+        #assert
+        assert response.code == OperationResponse.DEADLINE_EXCEEDED, "Hedged read ignored deadline"
+        api_client.close()
+
+    def test_client_timeout_end_to_end(self):
+        #arrange
+        client = Client(self.server.url, None)
+        account = Account("user")
+        account.init_data_storage(client.get_account_manager().server_accounts_data)
+        account.active_session = self.session
+        self.delays.append(1.0)
+
+        #act
+        with pytest.raises(OperationException) as excinfo:
+            Client.get_balance(account, timeout=0.2)
+
+        #assert
+        assert excinfo.value.response.code == OperationResponse.DEADLINE_EXCEEDED, \
+            "Client call timeout is not mapped to DEADLINE EXCEEDED"
@@ -0,0 +1,207 @@
+import threading
+import time
+
+import pytest
+
+from ru.hse.DepositCoalescer import DepositCoalescer
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AccountManager import AccountManager
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class RecordingBank(MockAuthorizationSource, MockAccountDataSource):
+    # Сервер в памяти, записывающий порядок deposit и logout
+    def __init__(self):
+        MockAuthorizationSource.__init__(self)
+        MockAccountDataSource.__init__(self)
+        self.lock = threading.Lock()
+        self.calls = []
+        self.failure = None
+
+    def deposit(self, login, session, amount, deadline=None):
+        with self.lock:
+            self.calls.append(("deposit", amount))
+            if self.failure is not None:
+                raise self.failure
+            return MockAccountDataSource.deposit(self, login, session, amount)
+
+    def logout(self, login, active_session):
+        with self.lock:
+            self.calls.append(("logout", None))
+        return MockAuthorizationSource.logout(self, login, active_session)
+
+
+def run_deposits(account, amounts):
+    results = [None] * len(amounts)
+    errors = []
+
+    def deposit(i):
+        try:
+            results[i] = account.deposit(amounts[i])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=deposit, args=(i,)) for i in range(len(amounts))]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+class TestDepositCoalescing:
+    def setup_method(self):
+        self.bank = RecordingBank()
+
+    def account(self, window, max_deposits=64):
+        manager = AccountManager(self.bank, self.bank, deposit_coalesce_window=window,
+                                 deposit_coalesce_max=max_deposits)
+        return manager, manager.register("user", "password")
+
+    def test_concurrent_deposits_are_summed(self):
+        #arrange
+        manager, account = self.account(window=0.2)
+        amounts = [float(i) for i in range(1, 11)]
+
+        #act
+        threads, results, errors = run_deposits(account, amounts)
+        for t in threads:
+            t.join()
+
+        #assert
+        deposits = [amount for name, amount in self.bank.calls if name == "deposit"]
+        assert not errors and sum(deposits) == 55.0, "Deposits were lost"
+        assert len(deposits) < len(amounts), "Deposits were not coalesced"
+        balances = sorted(r.body for r in results)
+        assert all(r.code == OperationResponse.SUCCEED for r in results), "Coalesced deposit failed"
+        assert balances[-1] == 55.0 and len(set(balances)) == 10, "Callers got the same balance"
+        for amount, response in zip(amounts, results):
+            assert response.body - amount in [0.0] + balances, "Balance does not match the caller's position"
+        assert manager.metrics.get("deposit_coalesce.deposits") == 10, "Coalescing metrics are missing"
+
+    def test_size_threshold_sends_without_waiting_for_window(self):
+        #arrange
+        _, account = self.account(window=30, max_deposits=3)
+
+        #act
+        started = time.monotonic()
+        threads, results, _ = run_deposits(account, [1.0, 2.0, 3.0])
+        for t in threads:
+            t.join(5)
+
+        #assert
+        assert time.monotonic() - started < 5, "Full batch waited for the window"
+        assert self.bank.calls == [("deposit", 6.0)], "Full batch was not sent as one deposit"
+        balances = sorted(r.body for r in results)
+        assert balances[-1] == 6.0 and all(r.body - amount in [0.0] + balances
+                                           for amount, r in zip([1.0, 2.0, 3.0], results)), \
+            "Per-position balances are wrong"
+
+    def test_error_is_returned_to_every_caller(self):
+        #arrange
+        _, account = self.account(window=30, max_deposits=4)
+        self.bank.active_sessions.clear()
+
+        #act
+        threads, results, _ = run_deposits(account, [1.0] * 4)
+        for t in threads:
+            t.join(5)
+
+        #assert
+        assert [r.code for r in results] == [OperationResponse.NOT_LOGGED] * 4, "Error did not reach every caller"
+
+    def test_exception_is_raised_by_sender_and_reported_to_others(self):
+        #arrange
+        _, account = self.account(window=30, max_deposits=3)
+        self.bank.failure = ConnectionResetError("reset")
+
+        #act
+        threads, results, errors = run_deposits(account, [1.0] * 3)
+        for t in threads:
+            t.join(5)
+
+        #assert
+        assert len(errors) == 1 and isinstance(errors[0], ConnectionResetError), "Sender did not raise"
+        codes = [r.code for r in results if r is not None]
+        assert codes == [OperationResponse.UNDEFINED_ERROR] * 2, "Waiting callers did not get the error"
+
+    def test_base_exception_in_sender_is_reported_to_others(self):
+        #arrange
+        coalescer = DepositCoalescer(window=30, max_deposits=3)
+        raised, results, errors = [], [], []
+
+        def interrupted(amount):
+            raise KeyboardInterrupt()
+
+        def leader():
+            try:
+                coalescer.deposit(interrupted, 1.0)
+            except BaseException as e:
+                raised.append(e)
+
+        def follower():
+            try:
+                results.append(coalescer.deposit(interrupted, 1.0))
+            except Exception as e:
+                errors.append(e)
+
+        first = threading.Thread(target=leader)
+        first.start()
+        while coalescer.open is None:
+            time.sleep(0.001)
+        others = [threading.Thread(target=follower) for _ in range(2)]
+
+        #act
+        for t in others:
+            t.start()
+        for t in [first] + others:
+            t.join(5)
+
+        #assert
+        assert len(raised) == 1 and isinstance(raised[0], KeyboardInterrupt), "Sender did not raise"
+        assert not errors, f"Waiting callers failed instead of getting the error: {errors!r}"
+        assert [r.code for r in results] == [OperationResponse.UNDEFINED_ERROR] * 2, "Waiting callers did not get the error"
+
+    def test_logout_flushes_pending_deposits(self):
+        #arrange
+        manager, account = self.account(window=30)
+        threads, results, _ = run_deposits(account, [5.0])
+        while not account.deposit_coalescer.in_flight:
+            time.sleep(0.001)
+
+        #act
+        logged_out = manager.logout(account)
+        threads[0].join(5)
+
+        #assert
+        assert logged_out and results[0].body == 5.0, "Pending deposit was not flushed"
+        assert self.bank.calls == [("deposit", 5.0), ("logout", None)], "Deposit was sent after logout"
+
+    def test_flush_all_at_exit(self):
+        #arrange
+        _, account = self.account(window=30)
+        threads, results, _ = run_deposits(account, [2.0])
+        while not account.deposit_coalescer.in_flight:
+            time.sleep(0.001)
+
+        #act
+        DepositCoalescer.flush_all()
+        threads[0].join(5)
+
+        #assert
+        assert results[0].code == OperationResponse.SUCCEED, "flush_all did not send pending deposits"
+
+    def test_timeout_bypasses_coalescing(self):
+        #arrange
+        _, account = self.account(window=30)
+
+        #act
+        response = account.deposit(1.0, timeout=1)
+
+        #assert
+        assert response.body == 1.0 and account.deposit_coalescer.in_flight == set(), "Deposit with timeout waited"
+
+    def test_invalid_configuration(self):
+        #act & assert
+        with pytest.raises(ValueError):
+            DepositCoalescer(max_deposits=0)
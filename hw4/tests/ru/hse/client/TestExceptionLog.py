@@ -0,0 +1,148 @@
+import threading
+
+import pytest
+
+from ru.hse.ExceptionLog import ExceptionLog
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AccountManager import AccountManager
+from ru.hse.client.Client import Client
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+def exception(code):
+    return OperationException(OperationResponse(code))
+
+
+def codes(exceptions):
+    return [e.response.code for e in exceptions]
+
+
+class TestExceptionLog:
+    def test_since_returns_only_new_exceptions(self):
+        #arrange
+        log = ExceptionLog(capacity=8)
+        log.append(exception(OperationResponse.NOT_LOGGED))
+        cursor = log.cursor()
+
+        #act
+        log.append(exception(OperationResponse.NULL_ARGUMENT))
+        log.append(exception(OperationResponse.CONNECTION_ERROR))
+
+        #assert
+        assert codes(log.since(cursor)) == [OperationResponse.NULL_ARGUMENT, OperationResponse.CONNECTION_ERROR], \
+            "since() returned exceptions older than cursor"
+        assert log.since(log.cursor()) == [], "since() at the latest cursor should be empty"
+
+    def test_drop_oldest_keeps_last_capacity_entries(self):
+        #arrange
+        log = ExceptionLog(capacity=3)
+
+        #act
+        sequence = [log.append(exception(code)) for code in range(5)]
+
+        #assert
+        assert sequence == [0, 1, 2, 3, 4], "Sequence numbers are not monotonic"
+        assert codes(log.snapshot()) == [2, 3, 4] and len(log) == 3, "Ring buffer kept wrong entries"
+        assert codes(log.since(0)) == [2, 3, 4], "Overwritten entries returned for an old cursor"
+        assert log.dropped == 2 and log.metrics.get("exception_log.dropped") == 2, "Dropped entries are not counted"
+
+    def test_drop_newest_keeps_entries_unread_by_open_cursor(self):
+        #arrange
+        log = ExceptionLog(capacity=3, overflow=ExceptionLog.DROP_NEWEST)
+        cursor = log.cursor()
+
+        #act
+        sequence = [log.append(exception(code)) for code in range(5)]
+        unread = codes(log.since(cursor))
+        log.release(cursor)
+        after_release = log.append(exception(5))
+
+        #assert
+        assert sequence == [0, 1, 2, None, None], "Rejected entries should have no sequence number"
+        assert unread == [0, 1, 2] and log.dropped == 3, "DROP_NEWEST kept wrong entries"
+        assert after_release == 3 and codes(log.snapshot()) == [1, 2, 5], "Released cursor still blocks the log"
+
+    def test_drop_newest_without_readers_overwrites_oldest(self):
+        #arrange
+        log = ExceptionLog(capacity=3, overflow=ExceptionLog.DROP_NEWEST)
+
+        #act
+        sequence = [log.append(exception(code)) for code in range(5)]
+
+        #assert
+        assert sequence == [0, 1, 2, 3, 4], "Entries were rejected although nobody reads the log"
+        assert codes(log.snapshot()) == [2, 3, 4] and log.readers == {}, "Ring buffer kept wrong entries"
+
+    @pytest.mark.parametrize("overflow", [ExceptionLog.DROP_OLDEST, ExceptionLog.DROP_NEWEST])
+    def test_client_raises_after_more_than_capacity_errors(self, overflow):
+        #arrange
+        auth_source, data_source = MockAuthorizationSource(), MockAccountDataSource()
+        client = Client(auth_source, data_source)
+        client.account_manager = AccountManager(auth_source, data_source, exceptions_capacity=3,
+                                                exceptions_overflow=overflow)
+        raised = []
+
+        #act
+        for _ in range(10):
+            try:
+                client.login("nobody", "password")
+            except OperationException as e:
+                raised.append(e.response.code)
+
+        #assert
+        assert raised == [OperationResponse.NO_USER_INCORRECT_PASSWORD] * 10, "Client stopped raising errors"
+        assert client.account_manager.exceptions_log.readers == {}, "Client did not release its cursors"
+
+    def test_invalid_configuration(self):
+        #act & assert
+        with pytest.raises(ValueError):
+            ExceptionLog(capacity=0)
+        with pytest.raises(ValueError):
+            ExceptionLog(overflow="block")
+
+    def test_own_thread_view(self):
+        #arrange
+        log = ExceptionLog()
+        cursor = log.cursor()
+        other = threading.Thread(target=lambda: log.append(exception(OperationResponse.NOT_LOGGED)))
+
+        #act
+        log.append(exception(OperationResponse.NULL_ARGUMENT))
+        other.start()
+        other.join()
+
+        #assert
+        assert codes(log.since(cursor, own_thread=True)) == [OperationResponse.NULL_ARGUMENT], \
+            "Per-thread view contains exceptions of another thread"
+        assert len(log.since(cursor)) == 2, "Shared view misses exceptions"
+
+    def test_client_raises_only_own_exception_under_concurrency(self):
+        #arrange
+        client = Client(MockAuthorizationSource(), MockAccountDataSource())
+        raised = []
+
+        def worker():
+            for _ in range(200):
+                try:
+                    client.login("", "password")
+                except OperationException as e:
+                    raised.append(e.response.code)
+            try:
+                client.logout(None)
+            except OperationException as e:
+                raised.append(e.response.code)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+
+        #act
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        #assert
+        assert raised == [OperationResponse.NULL_ARGUMENT] * 804, "Client raised another thread's exception or none"
+        assert len(client.get_account_manager().get_exceptions()) == 804, "Account manager lost exceptions"
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import ru
+
+SRC = str(Path(ru.__path__[0]).parent)
+# Запас на медленные машины CI: без ленивых импортов (requests, javaobj) импорт занимает ~80 мс
+IMPORT_BUDGET_US = 40_000
+
+
+def run_python(*args):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    return subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+
+
+def cumulative_import_us(module):
+    for line in run_python("-X", "importtime", "-c", f"import {module}").stderr.splitlines():
+        if line.startswith("import time:") and line.split("|")[2].strip() == module:
+            return int(line.split("|")[1])
+    raise AssertionError(f"{module} is missing from -X importtime output")
+
+
+class TestImportTime:
+    def test_heavy_dependencies_are_not_imported(self):
+        #act
+        loaded = run_python("-c", "import sys, ru.hse.client.Client; "
+                                  "print(' '.join(m for m in ('requests', 'javaobj', 'pickle', 'base64', 'numpy') "
+                                  "if m in sys.modules))").stdout.split()
+
+        #assert
+        assert loaded == [], f"Heavy modules are imported eagerly: {loaded}"
+
+    def test_dependencies_load_on_first_use(self):
+        #act
+        loaded = run_python("-c", "import sys\n"
+                                  "from ru.hse.OperationResponse import OperationResponse\n"
+                                  "from ru.hse.client.Client import Client\n"
+                                  "# тело-список кодируется pickle, а его разбор уходит в javaobj\n"
+                                  "OperationResponse.decode(OperationResponse(1, [1]).to_result_string())\n"
+                                  "Client('http://localhost:1', None)\n"
+                                  "print(' '.join(m for m in ('pickle', 'javaobj', 'requests') if m in sys.modules))").stdout
+
+        #assert
+        assert loaded.split() == ["pickle", "javaobj", "requests"], "Lazily imported dependencies are not loaded on use"
+
+    def test_client_import_time_budget(self):
+        #act
+        elapsed = min(cumulative_import_us("ru.hse.client.Client") for _ in range(3))
+
+        #assert
+        assert elapsed < IMPORT_BUDGET_US, f"import ru.hse.client.Client took {elapsed} us"
@@ -0,0 +1,131 @@
+import pickle
+import random
+
+import pytest
+from unittest import mock
+
+from ru.hse.Account import Account
+from ru.hse.IAccountDataSource import IAccountDataSource
+from ru.hse.IAuthorizationSource import IAuthorizationSource
+from ru.hse.LazyOperationResponse import LazyOperationResponse
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.ApiClient import ApiClient
+from ru.hse.client.Client import Client
+
+from StandInServer import StandInServer, java_result_string
+from TestOperationResponseDecode import describe, framed_string, nested_string, random_string
+
+
+def resolve_all(response):
+    # ответ, который дал бы немедленный разбор: resolved() на каждом уровне вложенности
+    response = response.resolved()
+    if isinstance(response.body, OperationResponse):
+        return OperationResponse(response.code, resolve_all(response.body))
+    return response
+
+
+class TestLazyOperationResponse:
+    def test_body_decoded_once_on_first_read(self):
+        #arrange
+        response = OperationResponse.decode(java_result_string(OperationResponse.SUCCEED, 12.5), lazy=True)
+
+        #act
+        with mock.patch.object(OperationResponse, "_response_from_string",
+                               wraps=OperationResponse._response_from_string) as decoder:
+            code = response.code
+            calls_after_code = decoder.call_count
+            first, second = response.body, response.body
+
+        #assert
+        assert isinstance(response, LazyOperationResponse), "Mode 2 response is not lazy"
+        assert code == OperationResponse.SUCCEED and calls_after_code == 0, "Reading code decoded the body"
+        assert first == second == 12.5, "Lazy body is decoded incorrectly"
+        assert decoder.call_count == 1 and response.is_resolved(), "Decoded body is not cached"
+
+    def test_broken_body_becomes_undefined_error_when_read(self):
+        #arrange
+        response = OperationResponse.decode("0|2|!!", lazy=True)
+
+        #act
+        code_before = response.code
+        with pytest.raises(OperationException) as exc_info:
+            response.body
+        resolved = response.resolved()
+
+        #assert
+        assert code_before == response.code == OperationResponse.SUCCEED, "Reading body changed the code"
+        assert exc_info.value.response is resolved, "Broken body did not raise its UNDEFINED ERROR response"
+        assert resolved.code == OperationResponse.UNDEFINED_ERROR and resolved.body == "2|!!", \
+            "Broken lazy body does not follow from_string UNDEFINED_ERROR semantics"
+
+    def test_differential_with_eager_parser(self):
+        #arrange
+        rng = random.Random(7)
+        strings = [random_string(rng) for _ in range(3000)] + [framed_string(rng) for _ in range(3000)]
+        strings += [nested_string(rng, rng.randint(1, 10)) for _ in range(300)]
+
+        #act
+        mismatches = []
+        for s in strings:
+            lazy = resolve_all(OperationResponse.decode(s, lazy=True))
+            if describe(lazy) != describe(OperationResponse.from_string(s)):
+                mismatches.append(s)
+
+        #assert
+        assert not mismatches, f"Lazy parse differs from from_string for {mismatches[:5]!r}"
+
+    def test_account_maps_broken_lazy_body_to_undefined_error(self):
+        #arrange
+        data_source = mock.create_autospec(IAccountDataSource)
+        data_source.get_balance.return_value = OperationResponse.decode("0|2|!!", lazy=True)
+        account = Account("user")
+        account.init_data_storage(data_source)
+        account.active_session = 1
+
+        #act
+        response = account.get_balance()
+
+        #assert
+        assert response.code == OperationResponse.UNDEFINED_ERROR, "Broken lazy body is not UNDEFINED ERROR for Account"
+
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_client_login_broken_body_is_undefined_error(self, lazy):
+        #arrange
+        auth_source = mock.create_autospec(IAuthorizationSource)
+        auth_source.login.return_value = OperationResponse.decode("0|2|!!", lazy=lazy)
+        client = Client(auth_source, mock.create_autospec(IAccountDataSource))
+
+        #act
+        with pytest.raises(OperationException) as exc_info:
+            client.login("user", "somePassword")
+
+        #assert
+        assert exc_info.value.response.code == OperationResponse.UNDEFINED_ERROR, \
+            "Broken session body is not UNDEFINED ERROR for Client.login"
+
+    def test_pickle_resolves_body(self):
+        #arrange
+        response = OperationResponse.decode(java_result_string(OperationResponse.NO_MONEY, 3.0), lazy=True)
+
+        #act
+        restored = pickle.loads(pickle.dumps(response))
+
+        #assert
+        assert type(restored) is OperationResponse, "Unpickled response is still lazy"
+        assert restored.code == OperationResponse.NO_MONEY and restored.body == 3.0, "Unpickled lazy response is incorrect"
+
+    def test_api_client_lazy_bodies(self):
+        #arrange
+        with StandInServer() as server:
+            api_client = ApiClient(server.url, lazy_bodies=True)
+            session = api_client.register("user", "somePassword").body
+
+            #act
+            deposit = api_client.deposit("user", session, 10.0)
+            logout = api_client.logout("user", session)
+            api_client.close()
+
+        #assert
+        assert isinstance(deposit, LazyOperationResponse) and deposit.body == 10.0, "ApiClient did not return lazy body"
+        assert logout.code == OperationResponse.SUCCEED, "Code-only response through lazy ApiClient failed"
@@ -0,0 +1,93 @@
+import threading
+import time
+from threading import Lock
+
+from ru.hse.InstrumentedLock import InstrumentedLock, hold
+from ru.hse.client.AccountManager import AccountManager
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class SlowAuthorizationSource(MockAuthorizationSource):
+    def login(self, login, password):
+        time.sleep(0.02)
+        return super().login(login, password)
+
+
+class TestLockInstrumentation:
+    def test_wait_and_hold_are_recorded_per_operation(self):
+        #arrange
+        lock = InstrumentedLock("test")
+        holding = threading.Event()
+
+        def holder():
+            with lock.hold("slow"):
+                holding.set()
+                time.sleep(0.02)
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        holding.wait()
+
+        #act
+        with lock.hold("fast"):
+            holder_seen = lock.holder
+        thread.join()
+        snapshot = lock.snapshot()
+
+        #assert
+        assert holder_seen == "fast" and lock.holder is None, "Current holder is not tracked"
+        assert snapshot["slow"]["acquisitions"] == 1 and snapshot["slow"]["contended"] == 0, "Slow stats are wrong"
+        assert snapshot["slow"]["hold_max_us"] >= 15000, "Hold time is not recorded"
+        assert snapshot["fast"]["contended"] == 1 and snapshot["fast"]["wait_max_us"] >= 5000, \
+            "Wait time of a contended acquisition is not recorded"
+        assert sum(snapshot["slow"]["hold_histogram_us"].values()) == 1, "Hold histogram is empty"
+        assert max(snapshot["slow"]["hold_histogram_us"]) >= 16384, "Hold histogram bucket is wrong"
+
+    def test_hold_returns_plain_lock_when_disabled(self):
+        #arrange
+        lock = Lock()
+
+        #act
+        context = hold(lock, "login")
+
+        #assert
+        assert context is lock, "Plain locks should be used without a wrapper"
+
+    def test_account_manager_reports_lock_metrics(self):
+        #arrange
+        manager = AccountManager(SlowAuthorizationSource(), MockAccountDataSource(), instrument_locks=True,
+                                 login_lock_stripes=1)
+        manager.register("user", "password")
+        manager.logout(manager.active_accounts["user"])
+        threads = [threading.Thread(target=manager.login, args=("user", "password")) for _ in range(3)]
+
+        #act
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        metrics = manager.get_lock_metrics()
+
+        #assert
+        assert sorted(metrics) == ["accounts_lock", "exceptions_lock", "login_locks"], "Locks are missing"
+        login_stats = metrics["login_locks"]["operations"]["login"]
+        assert login_stats["acquisitions"] == 3 and login_stats["contended"] >= 1, "Login contention is not seen"
+        assert login_stats["hold_max_us"] >= 15000, "Server call is not inside the login lock hold time"
+        assert set(metrics["accounts_lock"]["operations"]) == {"register", "login", "logout"}, \
+            "accounts_lock operations are not labelled"
+        assert metrics["exceptions_lock"]["operations"]["register_exception"]["acquisitions"] == 2, \
+            "register_exception is not recorded"
+        assert metrics["login_locks"]["holder"] == [], "Released locks still report a holder"
+
+    def test_metrics_are_empty_when_disabled(self):
+        #arrange
+        manager = AccountManager(MockAuthorizationSource(), MockAccountDataSource())
+
+        #act
+        manager.register("user", "password")
+
+        #assert
+        assert manager.get_lock_metrics() == {}, "Lock metrics are collected without instrument_locks"
+        assert type(manager.accounts_lock) is not InstrumentedLock, "Disabled instrumentation wraps locks"
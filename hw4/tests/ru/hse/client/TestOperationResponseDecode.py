@@ -0,0 +1,110 @@
+import random
+import time
+
+import pytest
+
+from ru.hse.OperationResponse import OperationResponse
+
+from StandInServer import java_result_string
+
+
+def describe(response):
+    # Полное структурное представление ответа для сравнения двух парсеров
+    body = response.body
+    if isinstance(body, OperationResponse):
+        return response.code, "response", describe(body)
+    return response.code, type(body).__name__, body
+
+
+def java_payload(value):
+    return java_result_string(0, value).split("|", 2)[2]
+
+
+FRAGMENTS = ["0", "1", "2", "3", "4", "7", "11", "-1", "-0", "+2", " 3", "1_0", "12345678901234567890",
+             "|", "||", "|1|", "|2|", "|3|", "|9|", "abc", "", " ", "٣", "x|y",
+             java_payload(1.5), java_payload(-0.25), java_payload(42), java_payload(0.0)[:-4], "AAAA", "!!"]
+
+
+def random_string(rng):
+    return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 8)))
+
+
+def framed_string(rng):
+    return "|".join(rng.choice(FRAGMENTS) for _ in range(3))
+
+
+def nested_string(rng, depth):
+    tail = rng.choice(["5", "0|1|text", "0|2|" + java_payload(3.0), "0|2|broken", "0|7|1", "-2", "0|x|1", ""])
+    return "".join(f"{rng.choice(['0', '4', '-3', '9'])}|3|" for _ in range(depth)) + tail
+
+
+class TestOperationResponseDecode:
+    @pytest.mark.parametrize("string", [
+        "0", "6", "-1", "abc", "", "|", "0|", "0|1", "0|11", "0|3", "0|31", "0|9", "0|95", "0|9-5",
+        "0|1|", "0|1|a|b", "x|1|a", "-4|1|a", "0|x|1", "0|3|", "0|3|6", "0|3|0|3|0|1|deep",
+        "0|7|12", " 1 |1|a", "0|2|", "0|2|!!", "0|2|" + java_payload(100.0), "7|2|" + java_payload(15),
+        "4|3|0|2|" + java_payload(2.5),
+    ])
+    def test_known_cases_match_from_string(self, string):
+        #act
+        expected = OperationResponse.from_string(string)
+        actual = OperationResponse.decode(string)
+
+        #assert
+        assert describe(actual) == describe(expected), f"decode differs from from_string for {string!r}"
+
+    def test_differential_fuzz(self):
+        #arrange
+        rng = random.Random(20240501)
+        strings = [random_string(rng) for _ in range(5000)]
+        strings += [framed_string(rng) for _ in range(3000)]
+        strings += [nested_string(rng, rng.randint(1, 40)) for _ in range(500)]
+
+        #act
+        mismatches = [s for s in strings
+                      if describe(OperationResponse.decode(s)) != describe(OperationResponse.from_string(s))]
+
+        #assert
+        assert not mismatches, f"decode differs from from_string for {mismatches[:5]!r}"
+
+    def test_deep_nesting_without_recursion_limit(self):
+        #arrange
+        depth = 100000
+        string = "4|3|" * depth + "0|1|deep"
+
+        #act
+        response = OperationResponse.decode(string)
+
+        #assert
+        for _ in range(depth):
+            assert response.code == OperationResponse.INCORRECT_RESPONSE, "Nested response code is incorrect"
+            response = response.body
+        assert response.code == OperationResponse.SUCCEED and response.body == "deep", "Innermost response is incorrect"
+
+    def test_nested_chain_decodes_in_linear_time(self):
+        #arrange
+        def decode_time(depth):
+            string = "4|3|" * depth + "0|1|deep"
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                OperationResponse.decode(string)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        #act
+        short, long = decode_time(20000), decode_time(160000)
+
+        #assert
+        assert long < 20 * short, f"8x deeper chain took {long / short:.1f}x longer: levels are copied"
+
+    def test_round_trip_of_to_result_string(self):
+        #arrange
+        original = OperationResponse(OperationResponse.INCORRECT_RESPONSE,
+                                     OperationResponse(OperationResponse.NOT_LOGGED, "message"))
+
+        #act
+        response = OperationResponse.decode(original.to_result_string())
+
+        #assert
+        assert describe(response) == describe(original), "decode does not invert to_result_string"
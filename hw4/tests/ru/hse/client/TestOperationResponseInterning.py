@@ -0,0 +1,86 @@
+import copy
+import pickle
+import tracemalloc
+
+import pytest
+
+from ru.hse.Account import Account
+from ru.hse.OperationResponse import OperationResponse
+
+
+def retained_blocks_per_million(strings):
+    # Число блоков памяти, выделенных в OperationResponse.py и живых, пока живы разобранные ответы
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        responses = [OperationResponse.decode(s) for s in strings]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    source_filter = [tracemalloc.Filter(True, OperationResponse.decode.__code__.co_filename)]
+    stats = after.filter_traces(source_filter).compare_to(before.filter_traces(source_filter), "filename")
+    blocks = sum(max(stat.count_diff, 0) for stat in stats)
+    assert len(responses) == len(strings)
+    return blocks * 1_000_000 // len(strings)
+
+
+class TestOperationResponseInterning:
+    def test_bodyless_responses_are_interned(self):
+        #act
+        parsed = OperationResponse.decode("6")
+        constructed = OperationResponse(OperationResponse.INCORRECT_SESSION)
+
+        #assert
+        assert parsed is OperationResponse.INCORRECT_SESSION_RESPONSE, "Parsed bodyless response is not interned"
+        assert constructed is OperationResponse.INCORRECT_SESSION_RESPONSE, "Constructed bodyless response is not interned"
+        assert OperationResponse.decode("0|3|2").body is OperationResponse.NOT_LOGGED_RESPONSE, \
+            "Nested bodyless response is not interned"
+
+    def test_account_mapping_returns_interned_instance(self):
+        #act
+        response = Account.map_balance_response(OperationResponse.decode("6"))
+
+        #assert
+        assert response is OperationResponse.INCORRECT_SESSION_RESPONSE, "Account mapping allocated a new response"
+
+    def test_unknown_code_and_body_are_not_interned(self):
+        #act
+        first, second = OperationResponse.decode("1000"), OperationResponse.decode("1000")
+
+        #assert
+        assert first is not second, "Unknown codes must not fill the intern table"
+        assert OperationResponse(OperationResponse.SUCCEED, 1.0) is not OperationResponse.SUCCEED_RESPONSE, \
+            "Response with body was interned"
+
+    def test_response_is_immutable_and_slotted(self):
+        #arrange
+        response = OperationResponse(OperationResponse.SUCCEED, 1.0)
+
+        #act & assert
+        with pytest.raises(AttributeError):
+            response.code = OperationResponse.NO_MONEY
+        with pytest.raises(AttributeError):
+            OperationResponse.SUCCEED_RESPONSE.body = 1.0
+        assert not hasattr(response, "__dict__"), "OperationResponse still has instance __dict__"
+
+    def test_pickle_and_copy_keep_interning(self):
+        #act
+        restored = pickle.loads(pickle.dumps(OperationResponse.NOT_LOGGED_RESPONSE))
+        copied = copy.deepcopy(OperationResponse(OperationResponse.SUCCEED, 5.0))
+
+        #assert
+        assert restored is OperationResponse.NOT_LOGGED_RESPONSE, "Unpickled bodyless response is not interned"
+        assert copied.code == OperationResponse.SUCCEED and copied.body == 5.0, "Copy of response is incorrect"
+
+    def test_allocations_per_million_parsed_responses(self):
+        #arrange
+        bodyless = ["0", "2", "6", "11", "12"] * 20000
+        with_body = ["0|1|text"] * 100000
+
+        #act
+        bodyless_blocks = retained_blocks_per_million(bodyless)
+        body_blocks = retained_blocks_per_million(with_body)
+
+        #assert
+        assert bodyless_blocks < 1000, f"{bodyless_blocks} blocks per million bodyless responses"
+        assert body_blocks >= 900_000, f"Only {body_blocks} blocks per million responses with body"
@@ -0,0 +1,139 @@
+import io
+import itertools
+import mmap
+import socket
+import threading
+
+import pytest
+
+from ru.hse.LazyOperationResponse import LazyOperationResponse
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.OperationResponseStream import OperationResponseStream
+
+from TestOperationResponseDecode import describe
+
+
+def sample_responses():
+    return [
+        OperationResponse.SUCCEED_RESPONSE,
+        OperationResponse(OperationResponse.SUCCEED, 10.5),
+        OperationResponse(OperationResponse.SUCCEED, 42),
+        OperationResponse(OperationResponse.ALREADY_LOGGED, "уже в системе"),
+        OperationResponse(OperationResponse.INCORRECT_RESPONSE, OperationResponse(OperationResponse.NO_MONEY, 3.0)),
+        OperationResponse.CONNECTION_ERROR_RESPONSE,
+    ]
+
+
+class EndlessRaw(io.RawIOBase):
+    # Бесконечный источник одинаковых строк: read() не может прочитать его целиком
+    def __init__(self, line: bytes):
+        self.line = line
+        self.served = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = (self.line * (len(buffer) // len(self.line) + 1))[:len(buffer)]
+        buffer[:len(data)] = data
+        self.served += len(data)
+        return len(data)
+
+
+class TestOperationResponseStream:
+    def test_round_trip_through_binary_file(self):
+        #arrange
+        target = io.BytesIO()
+
+        #act
+        written = OperationResponseStream.write(sample_responses(), target, buffer_size=16)
+        target.seek(0)
+        restored = list(OperationResponseStream.read(target))
+
+        #assert
+        assert written == len(sample_responses()), "Writer returned wrong count"
+        assert [describe(r) for r in restored] == [describe(r) for r in sample_responses()], "Round trip changed responses"
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+    def test_lines_split_across_chunks(self, chunk_size):
+        #arrange
+        target = io.BytesIO()
+        OperationResponseStream.write(sample_responses() * 3, target)
+
+        #act
+        restored = list(OperationResponseStream.read(io.BytesIO(target.getvalue()), chunk_size=chunk_size))
+
+        #assert
+        assert [describe(r) for r in restored] == [describe(r) for r in sample_responses() * 3], \
+            f"Chunk size {chunk_size} broke line or UTF-8 boundaries"
+
+    def test_text_file_and_missing_final_newline(self):
+        #arrange
+        source = io.StringIO("0\n\n0|1|text\n6")
+
+        #act
+        restored = list(OperationResponseStream.read(source))
+
+        #assert
+        assert [describe(r) for r in restored] == [(0, "NoneType", None), (0, "str", "text"), (6, "NoneType", None)], \
+            "Text stream parsed incorrectly"
+
+    def test_mmap_source(self, tmp_path):
+        #arrange
+        path = tmp_path / "responses.log"
+        with open(path, "wb") as f:
+            OperationResponseStream.write(sample_responses(), f)
+
+        #act
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            restored = list(OperationResponseStream.read(mapped, chunk_size=5))
+
+        #assert
+        assert [describe(r) for r in restored] == [describe(r) for r in sample_responses()], "mmap stream parsed incorrectly"
+
+    def test_socket_source_and_target(self):
+        #arrange
+        reader, writer = socket.socketpair()
+
+        def send():
+            OperationResponseStream.write(sample_responses() * 100, writer, buffer_size=128)
+            writer.close()
+
+        sender = threading.Thread(target=send)
+
+        #act
+        sender.start()
+        restored = list(OperationResponseStream.read(reader, chunk_size=100))
+        sender.join()
+        reader.close()
+
+        #assert
+        assert len(restored) == 600, "Not all responses arrived through socket"
+        assert describe(restored[-2]) == describe(sample_responses()[-2]), "Socket stream parsed incorrectly"
+
+    def test_read_is_incremental(self):
+        #arrange
+        source = io.BufferedReader(EndlessRaw(b"0|1|text\n"), buffer_size=64)
+
+        #act
+        first = list(itertools.islice(OperationResponseStream.read(source, chunk_size=1024), 1000))
+
+        #assert
+        assert len(first) == 1000 and first[-1].body == "text", "Stream did not yield responses incrementally"
+        assert source.raw.served < 64 * 1024, "Reader consumed far more input than needed"
+
+    def test_lazy_stream(self):
+        #arrange
+        target = io.BytesIO()
+        OperationResponseStream.write([OperationResponse(OperationResponse.SUCCEED, 1.5)], target)
+
+        #act
+        response = next(OperationResponseStream.read(io.BytesIO(target.getvalue()), lazy=True))
+
+        #assert
+        assert isinstance(response, LazyOperationResponse) and response.body == 1.5, "lazy flag is not passed to decode"
+
+    def test_newline_in_body_is_rejected(self):
+        #act & assert
+        with pytest.raises(ValueError):
+            OperationResponseStream.write([OperationResponse(OperationResponse.SUCCEED, "two\nlines")], io.BytesIO())
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from ru.hse.IPasswordEncoder import IPasswordEncoder
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AccountManager import AccountManager
+from ru.hse.client.Pbkdf2PasswordEncoder import Pbkdf2PasswordEncoder
+from ru.hse.client.PlainPasswordEncoder import PlainPasswordEncoder
+from ru.hse.client.ProcessPoolPasswordEncoder import ProcessPoolPasswordEncoder
+from ru.hse.client.ScryptPasswordEncoder import ScryptPasswordEncoder
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class PidPasswordEncoder(IPasswordEncoder):
+    def encode(self, login, password):
+        return f"{os.getpid()}:{login}:{password}"
+
+
+class GatedPasswordEncoder(IPasswordEncoder):
+    def __init__(self):
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def encode(self, login, password):
+        self.entered.set()
+        self.gate.wait()
+        return password
+
+
+class FailingPasswordEncoder(IPasswordEncoder):
+    def encode(self, login, password):
+        raise RuntimeError("kdf failed")
+
+
+class TestPasswordEncoders:
+    def test_plain_encoder_matches_legacy_encoding(self):
+        #act
+        encoded = PlainPasswordEncoder().encode("user", "password")
+
+        #assert
+        assert encoded == AccountManager.get_encoded_password("password"), "Plain encoder changed the legacy format"
+
+    def test_kdf_encoders_are_deterministic_and_salted_by_login(self):
+        #arrange
+        pbkdf2 = Pbkdf2PasswordEncoder(b"salt", iterations=1000)
+        scrypt = ScryptPasswordEncoder(b"salt", n=2 ** 10)
+
+        #act & assert
+        for encoder in (pbkdf2, scrypt):
+            assert encoder.encode("user", "password") == encoder.encode("user", "password"), "Encoding is not stable"
+            assert encoder.encode("user", "password") != encoder.encode("other", "password"), "Login is not in salt"
+        assert pbkdf2.encode("user", "password") == \
+            hashlib.pbkdf2_hmac("sha256", b"password", b"saltuser", 1000, 32).hex(), "PBKDF2 parameters are wrong"
+        assert scrypt.encode("user", "password") == \
+            hashlib.scrypt(b"password", salt=b"saltuser", n=2 ** 10, r=8, p=1, dklen=32).hex(), \
+            "scrypt parameters are wrong"
+        with pytest.raises(ValueError):
+            ScryptPasswordEncoder(b"salt", n=1000)
+
+    def test_process_pool_encoder_runs_in_other_process(self):
+        #arrange
+        with ProcessPoolPasswordEncoder(PidPasswordEncoder(), max_workers=2) as encoder:
+            #act
+            encoded = [encoder.encode(f"user{i}", "password") for i in range(4)]
+
+        #assert
+        pids = {int(e.split(":")[0]) for e in encoded}
+        assert os.getpid() not in pids, "Encoder ran in the calling process"
+        assert [e.split(":", 1)[1] for e in encoded] == [f"user{i}:password" for i in range(4)], "Wrong results"
+        assert encoder.executor is None, "Pool is not shut down on exit"
+
+    def test_manager_sends_encoded_password(self):
+        #arrange
+        auth_source = MockAuthorizationSource()
+        encoder = Pbkdf2PasswordEncoder(b"salt", iterations=1000)
+        manager = AccountManager(auth_source, MockAccountDataSource(), password_encoder=encoder)
+
+        #act
+        account = manager.register("user", "password")
+
+        #assert
+        assert account is not None, "Register failed with a custom encoder"
+        assert auth_source.registered_users["user"] == encoder.encode("user", "password"), "Encoder was not used"
+
+    def test_no_lock_is_held_while_encoding(self):
+        #arrange
+        encoder = GatedPasswordEncoder()
+        manager = AccountManager(MockAuthorizationSource(), MockAccountDataSource(), password_encoder=encoder)
+        thread = threading.Thread(target=manager.register, args=("user", "password"))
+        thread.start()
+        assert encoder.entered.wait(5), "Encoder was not called"
+
+        #act
+        locked = manager.login_lock("user").locked() or manager.accounts_lock.locked()
+        encoder.gate.set()
+        thread.join()
+
+        #assert
+        assert not locked, "AccountManager lock is held while the password is encoded"
+        assert "user" in manager.active_accounts, "Register did not finish after encoding"
+
+    def test_encoder_failure_is_recorded(self):
+        #arrange
+        manager = AccountManager(MockAuthorizationSource(), MockAccountDataSource(),
+                                 password_encoder=FailingPasswordEncoder())
+
+        #act
+        account = manager.login("user", "password")
+
+        #assert
+        exceptions = manager.get_exceptions()
+        assert account is None and len(exceptions) == 1, "Encoder failure is not reported"
+        assert exceptions[0].response.code == OperationResponse.UNDEFINED_ERROR, "Encoder failure has wrong code"
@@ -0,0 +1,191 @@
+import gc
+import math
+import socket
+import threading
+import time
+
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.ApiClient import ApiClient
+from ru.hse.client.CircuitBreaker import CircuitBreaker
+from ru.hse.client.Client import Client
+from ru.hse.client.RetryPolicy import RetryPolicy
+
+from StandInServer import StandInServer
+
+
+class TestPooledApiClient:
+    def setup_method(self):
+        self.server = StandInServer().start()
+
+    def teardown_method(self):
+        self.server.stop()
+
+    def test_operations_reuse_single_connection(self):
+        #arrange
+        api_client = ApiClient(self.server.url)
+        session = api_client.register("user", "somePassword").body
+
+        #act
+        for _ in range(20):
+            api_client.deposit("user", session, 1.0)
+        response = api_client.get_balance("user", session)
+        logout = api_client.logout("user", session)
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED, "Balance request failed on pooled transport"
+        assert math.isclose(response.body, 20.0), "Balance is not equal to sum of deposits"
+        assert logout.code == OperationResponse.SUCCEED, "Logout failed on pooled transport"
+        assert self.server.connection_count == 1, "Keep-alive connection was not reused between operations"
+        api_client.close()
+
+    def test_concurrent_operations_bounded_by_max_connections(self):
+        #arrange
+        api_client = ApiClient(self.server.url, max_connections=2)
+        session = api_client.register("user", "somePassword").body
+        errors = []
+
+        def worker():
+            for _ in range(25):
+                if api_client.deposit("user", session, 1.0).code != OperationResponse.SUCCEED:
+                    errors.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+
+        #act
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        response = api_client.get_balance("user", session)
+
+        #assert
+        assert not errors, "Some concurrent deposits failed"
+        assert math.isclose(response.body, 200.0), "Concurrent deposits were lost"
+        assert self.server.connection_count <= 2, "Transport opened more connections than max_connections"
+        api_client.close()
+
+    def test_finished_threads_do_not_accumulate_sessions(self):
+        #arrange
+        api_client = ApiClient(self.server.url, max_connections=2)
+        session = api_client.register("user", "somePassword").body
+
+        #act
+        for _ in range(10):
+            threads = [threading.Thread(target=api_client.deposit, args=("user", session, 1.0)) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        gc.collect()
+        response = api_client.get_balance("user", session)
+
+        #assert
+        assert math.isclose(response.body, 40.0), "Deposits from short-lived threads were lost"
+        assert len(api_client.transport.sessions) == 1, "Sessions of finished threads were not released"
+        assert self.server.connection_count <= 2, "Finished threads left their connections open"
+        api_client.close()
+
+    def test_pool_exhaustion_returns_pool_exhausted(self):
+        #arrange
+        self.server.stop()
+        self.server = StandInServer(latency=0.5).start()
+        api_client = ApiClient(self.server.url, max_connections=1, pool_timeout=0.05)
+        results = []
+        slow = threading.Thread(target=lambda: results.append(api_client.register("slow", "somePassword")))
+        slow.start()
+        while self.server.connection_count == 0:
+            time.sleep(0.01)
+
+        #act
+        response = api_client.register("fast", "somePassword")
+        slow.join()
+
+        #assert
+        assert response.code == OperationResponse.POOL_EXHAUSTED, "Exhausted pool did not fail with POOL EXHAUSTED"
+        assert results[0].code == OperationResponse.SUCCEED, "Request holding the connection failed"
+        api_client.close()
+
+    def burst(self, api_client, session, threads):
+        responses = []
+        workers = [threading.Thread(target=lambda: responses.append(api_client.get_balance("user", session)))
+                   for _ in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        return responses
+
+    def test_pool_exhaustion_does_not_open_circuit_or_retry(self):
+        #arrange
+        setup_client = ApiClient(self.server.url)
+        session = setup_client.register("user", "somePassword").body
+        setup_client.close()
+        bank = self.server.bank
+        self.server.stop()
+        self.server = StandInServer(latency=0.2, bank=bank).start()
+        api_client = ApiClient(self.server.url, max_connections=1, pool_timeout=0.01,
+                               retry_policies={"balance": RetryPolicy(max_attempts=3, base_delay=0.001)},
+                               circuit_breaker=CircuitBreaker(failure_threshold=1))
+
+        #act
+        responses = self.burst(api_client, session, 8)
+        codes = sorted(response.code for response in responses)
+        metrics = api_client.get_metrics()
+
+        #assert
+        assert codes.count(OperationResponse.SUCCEED) >= 1, "No request got the connection"
+        assert codes.count(OperationResponse.POOL_EXHAUSTED) >= 1, "Burst did not overflow the pool"
+        assert set(codes) <= {OperationResponse.SUCCEED, OperationResponse.POOL_EXHAUSTED}, \
+            "Pool exhaustion is reported as another error"
+        assert api_client.circuit_breaker.get_state() == CircuitBreaker.CLOSED, "Pool exhaustion opened the circuit"
+        assert "retry.balance" not in metrics, "Pool exhaustion was retried"
+        assert metrics["pool.exhausted"] == codes.count(OperationResponse.POOL_EXHAUSTED), "Exhaustion is not counted"
+        api_client.close()
+
+    def test_non_blocking_pool_absorbs_burst(self):
+        #arrange
+        setup_client = ApiClient(self.server.url)
+        session = setup_client.register("user", "somePassword").body
+        setup_client.close()
+        bank = self.server.bank
+        self.server.stop()
+        self.server = StandInServer(latency=0.1, bank=bank).start()
+        api_client = ApiClient(self.server.url, max_connections=1, pool_block=False,
+                               circuit_breaker=CircuitBreaker(failure_threshold=1))
+
+        #act
+        responses = self.burst(api_client, session, 8)
+
+        #assert
+        assert all(response.code == OperationResponse.SUCCEED for response in responses), \
+            "Overflowing burst failed with non-blocking pool"
+        assert api_client.circuit_breaker.get_state() == CircuitBreaker.CLOSED, "Burst opened the circuit"
+        assert "pool.exhausted" not in api_client.get_metrics(), "Non-blocking pool reported exhaustion"
+        api_client.close()
+
+    def test_client_over_url_uses_pooled_transport(self):
+        #arrange
+        client = Client(self.server.url, None)
+
+        #act
+        account = client.register("user", "somePassword")
+        balance = Client.deposit(account, 15.5)
+        result = client.logout(account)
+
+        #assert
+        assert math.isclose(balance, 15.5), "Deposit through Client returned incorrect balance"
+        assert result, "Logout through Client failed"
+        assert self.server.connection_count == 1, "Client did not reuse keep-alive connection"
+
+    def test_connection_refused_is_connection_error(self):
+        #arrange
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        api_client = ApiClient(f"http://127.0.0.1:{port}")
+
+        #act
+        response = api_client.login("user", "somePassword")
+
+        #assert
+        assert response.code == OperationResponse.CONNECTION_ERROR, "Refused connection is not mapped to CONNECTION_ERROR"
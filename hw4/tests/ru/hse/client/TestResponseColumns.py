@@ -0,0 +1,102 @@
+import io
+import math
+import random
+
+import pytest
+
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.OperationResponseStream import OperationResponseStream
+
+from TestOperationResponseDecode import describe, framed_string
+
+np = pytest.importorskip("numpy")
+
+
+def stream_of(responses):
+    target = io.BytesIO()
+    OperationResponseStream.write(responses, target)
+    return target.getvalue()
+
+
+def mixed_responses(rng, count):
+    responses = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            responses.append(OperationResponse(rng.choice([0, 7]), rng.uniform(-1e6, 1e6)))
+        elif kind < 0.8:
+            responses.append(OperationResponse(rng.choice([0, 2, 6, 11, 12, 1000])))
+        elif kind < 0.9:
+            responses.append(OperationResponse(1, "текст"))
+        else:
+            responses.append(OperationResponse(4, OperationResponse(7, 1.0)))
+    return responses
+
+
+class TestResponseColumns:
+    def test_decode_many_matches_per_record_decode(self):
+        #arrange
+        responses = mixed_responses(random.Random(3), 5000)
+        data = stream_of(responses)
+
+        #act
+        columns = OperationResponse.decode_many(data)
+
+        #assert
+        expected = list(OperationResponseStream.read(io.BytesIO(data)))
+        assert len(columns) == len(expected), "Number of decoded records is incorrect"
+        assert [describe(columns.response(i)) for i in range(len(columns))] == [describe(r) for r in expected], \
+            "Columnar decode differs from OperationResponse.decode"
+
+    def test_columns_layout(self):
+        #arrange
+        data = stream_of([OperationResponse(0, 10.5), OperationResponse.NOT_LOGGED_RESPONSE,
+                          OperationResponse(1, "text"), OperationResponse(0, 42)])
+
+        #act
+        columns = OperationResponse.decode_many(data)
+
+        #assert
+        assert columns.codes.tolist() == [0, 2, 1, 0], "Codes column is incorrect"
+        assert columns.values[0] == 10.5 and np.isnan(columns.values[1]), "Values column is incorrect"
+        assert columns.mask.tolist() == [False, False, True, True], "Mask column is incorrect"
+        assert sorted(columns.extras) == [2, 3], "Non-primitive records are not kept in extras"
+        assert columns.extras[2].body == "text" and columns.extras[3].body == 42, "Extras hold wrong responses"
+
+    def test_encode_many_round_trips_string_format(self):
+        #arrange
+        responses = mixed_responses(random.Random(5), 5000)
+        responses += [OperationResponse(0, math.inf), OperationResponse(0, -0.0), OperationResponse(0, math.nan),
+                      OperationResponse(-5, 2.0), OperationResponse(10 ** 19, 1.0)]
+        data = stream_of(responses)
+
+        #act
+        encoded = OperationResponse.encode_many(OperationResponse.decode_many(data))
+
+        #assert
+        assert encoded == data, "encode_many does not reproduce to_result_string lines"
+
+    def test_encode_many_from_plain_arrays(self):
+        #arrange
+        codes = np.array([0, 7, 6])
+        values = np.array([1.25, 3.0, np.nan])
+
+        #act
+        encoded = OperationResponse.encode_many((codes, values, np.zeros(3, dtype=bool), {}))
+
+        #assert
+        expected = stream_of([OperationResponse(0, 1.25), OperationResponse(7, 3.0), OperationResponse(6)])
+        assert encoded == expected, "Arrays are not encoded as Java Double bodies"
+
+    def test_arbitrary_lines_match_decode(self):
+        #arrange
+        rng = random.Random(11)
+        lines = [line for line in (framed_string(rng) for _ in range(3000)) if "\n" not in line and line]
+
+        #act
+        columns = OperationResponse.decode_many(lines)
+
+        #assert
+        expected = [OperationResponse.decode(line) for line in lines]
+        assert [describe(columns.response(i)) for i in range(len(columns))] == [describe(r) for r in expected], \
+            "Columnar decode differs on irregular lines"
@@ -0,0 +1,204 @@
+import math
+import time
+
+import pytest
+
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.ApiClient import ApiClient
+from ru.hse.client.CircuitBreaker import CircuitBreaker
+from ru.hse.client.Client import Client
+from ru.hse.client.RetryPolicy import RetryPolicy
+
+from StandInServer import StandInServer
+
+
+class TestRetryAndCircuitBreaker:
+    def setup_method(self):
+        self.server = StandInServer().start()
+        setup_client = ApiClient(self.server.url)
+        self.session = setup_client.register("user", "somePassword").body
+        setup_client.close()
+        self.now = [0.0]
+        self.fast_retry = RetryPolicy(max_attempts=3, base_delay=0.001)
+
+    def teardown_method(self):
+        self.server.stop()
+
+    def make_client(self, **kwargs):
+        retry_policies = {name: self.fast_retry for name in ("withdraw", "deposit", "balance", "logout")}
+        return ApiClient(self.server.url, retry_policies=kwargs.pop("retry_policies", retry_policies), **kwargs)
+
+    def test_read_retried_after_connection_error(self):
+        #arrange
+        api_client = self.make_client()
+        self.server.bank.drop_responses = 2
+
+        #act
+        response = api_client.get_balance("user", self.session)
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED, "Balance read was not retried after connection errors"
+        assert api_client.get_metrics()["retry.balance"] == 2, "Retry count is not exposed in metrics"
+
+    def test_write_without_idempotency_key_not_retried(self):
+        #arrange
+        api_client = self.make_client()
+        self.server.bank.drop_responses = 1
+
+        #act
+        response = api_client.deposit("user", self.session, 10.0)
+
+        #assert
+        assert response.code == OperationResponse.CONNECTION_ERROR, "Deposit without idempotency key was retried"
+        assert "retry.deposit" not in api_client.get_metrics(), "Retry recorded for non-idempotent deposit"
+
+    def test_write_with_idempotency_key_retried_once_applied(self):
+        #arrange
+        api_client = self.make_client()
+        self.server.bank.drop_responses = 1
+
+        #act
+        response = api_client.deposit("user", self.session, 10.0, idempotency_key="deposit-1")
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED, "Deposit with idempotency key was not retried"
+        assert math.isclose(response.body, 10.0), "Retried deposit was applied twice"
+        assert api_client.get_metrics()["retry.deposit"] == 1, "Retry count for deposit is incorrect"
+
+    def test_retry_policy_is_per_operation(self):
+        #arrange
+        api_client = self.make_client(retry_policies={"balance": RetryPolicy.NO_RETRY, "logout": self.fast_retry})
+        self.server.bank.drop_responses = 1
+
+        #act
+        balance = api_client.get_balance("user", self.session)
+        self.server.bank.drop_responses = 1
+        logout = api_client.logout("user", self.session)
+
+        #assert
+        assert balance.code == OperationResponse.CONNECTION_ERROR, "Balance retried despite NO_RETRY policy"
+        assert logout.code != OperationResponse.CONNECTION_ERROR, "Logout was not retried by its own policy"
+        assert api_client.get_metrics()["retry.logout"] == 1, "Logout retry is not counted"
+        assert "user" not in self.server.bank.sessions, "Retried logout left session active"
+
+    def test_circuit_opens_and_fails_fast(self):
+        #arrange
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0, clock=lambda: self.now[0])
+        api_client = self.make_client(retry_policies={}, circuit_breaker=breaker)
+        self.server.bank.drop_responses = 3
+        for _ in range(3):
+            api_client.get_balance("user", self.session)
+        requests_before = self.server.bank.requests
+
+        #act
+        response = api_client.get_balance("user", self.session)
+
+        #assert
+        assert response is OperationResponse.CONNECTION_ERROR_RESPONSE, "Open circuit did not fail fast"
+        assert self.server.bank.requests == requests_before, "Open circuit still sent request to server"
+        metrics = api_client.get_metrics()
+        assert metrics["circuit.state"] == CircuitBreaker.STATE_CODES[CircuitBreaker.OPEN], "Circuit state metric is not open"
+        assert metrics["circuit.transitions.closed_to_open"] == 1, "Transition to open is not counted"
+        assert metrics["circuit.rejected"] == 1, "Rejected request is not counted"
+
+    def test_circuit_half_open_trial_closes(self):
+        #arrange
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=lambda: self.now[0])
+        api_client = self.make_client(retry_policies={}, circuit_breaker=breaker)
+        self.server.bank.drop_responses = 2
+        for _ in range(2):
+            api_client.get_balance("user", self.session)
+        self.now[0] += 11.0
+
+        #act
+        response = api_client.get_balance("user", self.session)
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED, "Half-open trial request failed"
+        assert breaker.get_state() == CircuitBreaker.CLOSED, "Successful trial did not close circuit"
+        assert breaker.metrics.get("circuit.transitions.open_to_half_open") == 1, "Half-open transition is not counted"
+        assert breaker.metrics.get("circuit.transitions.half_open_to_closed") == 1, "Closing transition is not counted"
+
+    def test_circuit_half_open_failure_reopens(self):
+        #arrange
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: self.now[0])
+        breaker.record_failure()
+        self.now[0] += 11.0
+
+        #act
+        first = breaker.allow_request()
+        second = breaker.allow_request()
+        breaker.record_failure()
+
+        #assert
+        assert first and not second, "Half-open state allowed more than one trial request"
+        assert breaker.get_state() == CircuitBreaker.OPEN, "Failed trial did not reopen circuit"
+
+    def test_expired_deadline_keeps_half_open_trial(self):
+        #arrange
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: self.now[0])
+        api_client = self.make_client(circuit_breaker=breaker)
+        breaker.record_failure()
+        self.now[0] += 11.0
+
+        #act
+        expired = api_client.get_balance("user", self.session, deadline=time.monotonic() - 1)
+        state_after_expired = breaker.get_state()
+        trial = api_client.get_balance("user", self.session)
+
+        #assert
+        assert expired is OperationResponse.DEADLINE_EXCEEDED_RESPONSE, "Expired deadline is not reported"
+        assert state_after_expired == CircuitBreaker.HALF_OPEN, "Unsent request closed the circuit"
+        assert trial.code == OperationResponse.SUCCEED, "Half-open trial request failed"
+        assert breaker.get_state() == CircuitBreaker.CLOSED, "Real trial did not close circuit"
+
+    def test_read_timeouts_open_circuit(self):
+        #arrange
+        self.server.stop()
+        self.server = StandInServer(latency=0.3, bank=self.server.bank).start()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+        api_client = self.make_client(circuit_breaker=breaker, timeout=0.05)
+
+        #act
+        responses = [api_client.get_balance("user", self.session) for _ in range(2)]
+        requests_before = self.server.bank.requests
+        rejected = api_client.get_balance("user", self.session)
+
+        #assert
+        assert all(r.code == OperationResponse.DEADLINE_EXCEEDED for r in responses), "Slow reads did not time out"
+        assert breaker.get_state() == CircuitBreaker.OPEN, "Hung backend that only times out did not open circuit"
+        assert rejected is OperationResponse.CONNECTION_ERROR_RESPONSE, "Open circuit did not fail fast"
+        assert self.server.bank.requests == requests_before, "Open circuit still sent request to server"
+
+    def test_client_raises_connection_error_while_open(self):
+        #arrange
+        client = Client(self.server.url, None)
+        api_client = client.get_account_manager().server_auth_data
+        api_client.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+        api_client.circuit_breaker.record_failure()
+
+        #act
+        with pytest.raises(OperationException) as excinfo:
+            client.register("other", "somePassword")
+
+        #assert
+        assert excinfo.value.response.code == OperationResponse.CONNECTION_ERROR, "Client did not raise CONNECTION ERROR"
+
+    @pytest.mark.parametrize("operation", ["login", "register", "unknown"])
+    def test_policy_for_non_retryable_operation_rejected(self, operation):
+        #act
+        with pytest.raises(ValueError):
+            self.make_client(retry_policies={operation: self.fast_retry})
+
+    def test_backoff_is_jittered_and_bounded(self):
+        #arrange
+        policy = RetryPolicy(base_delay=0.1, max_delay=0.3, multiplier=2.0)
+
+        #act
+        delays = [policy.backoff(attempt) for attempt in (1, 2, 3, 4) for _ in range(50)]
+
+        #assert
+        assert all(0 <= d <= 0.3 for d in delays), "Backoff exceeds max_delay"
+        assert len(set(delays)) > 1, "Backoff is not jittered"
+        assert RetryPolicy(base_delay=0.1, jitter=False).backoff(3) == pytest.approx(0.4), "Exponential backoff is incorrect"
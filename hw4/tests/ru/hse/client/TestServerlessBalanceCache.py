@@ -0,0 +1,204 @@
+import pytest
+from unittest import mock
+
+from ru.hse.Account import Account
+from ru.hse.BalanceCache import BalanceCache
+from ru.hse.IAccountDataSource import IAccountDataSource
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.Client import Client
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class TestServerlessBalanceCache:
+    def setup_method(self):
+        self.data_source = mock.create_autospec(IAccountDataSource)
+        self.now = [0.0]
+        self.cache = BalanceCache(ttl=10.0, clock=lambda: self.now[0])
+        self.account = Account("user")
+        self.account.init_data_storage(self.data_source)
+        self.account.init_balance_cache(self.cache)
+        self.account.active_session = 1
+
+    def test_write_response_fills_cache(self):
+        #arrange
+        self.data_source.deposit.return_value = OperationResponse(OperationResponse.SUCCEED, 110.0)
+
+        #act
+        self.account.deposit(10.0)
+        response = self.account.get_balance()
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED and response.body == 110.0, "Cached balance is incorrect"
+        assert self.data_source.get_balance.call_count == 0, "Balance read went to server despite cached value"
+        assert self.cache.metrics.get("balance_cache.hits") == 1, "Cache hit is not counted"
+
+    def test_cache_expires_after_ttl(self):
+        #arrange
+        self.data_source.withdraw.return_value = OperationResponse(OperationResponse.SUCCEED, 90.0)
+        self.data_source.get_balance.return_value = OperationResponse(OperationResponse.SUCCEED, 95.0)
+        self.account.withdraw(10.0)
+        self.now[0] += 11.0
+
+        #act
+        response = self.account.get_balance()
+
+        #assert
+        assert response.body == 95.0, "Expired cached balance was returned"
+        assert self.data_source.get_balance.call_count == 1, "Expired cache did not go to server"
+        assert self.cache.metrics.get("balance_cache.misses") == 1, "Cache miss is not counted"
+
+    @pytest.mark.parametrize("code", [OperationResponse.INCORRECT_SESSION,
+                                      OperationResponse.NOT_LOGGED,
+                                      OperationResponse.CONNECTION_ERROR])
+    def test_error_invalidates_cache(self, code):
+        #arrange
+        self.data_source.deposit.side_effect = [OperationResponse(OperationResponse.SUCCEED, 50.0),
+                                                OperationResponse(code)]
+        self.data_source.get_balance.return_value = OperationResponse(OperationResponse.SUCCEED, 60.0)
+        self.account.deposit(50.0)
+
+        #act
+        self.account.deposit(10.0)
+        response = self.account.get_balance()
+
+        #assert
+        assert response.body == 60.0, "Cache was not invalidated by error response"
+        assert self.data_source.get_balance.call_count == 1, "Balance read after error did not go to server"
+
+    def test_new_session_does_not_use_old_balance(self):
+        #arrange
+        self.data_source.deposit.return_value = OperationResponse(OperationResponse.SUCCEED, 50.0)
+        self.data_source.get_balance.return_value = OperationResponse(OperationResponse.SUCCEED, 0.0)
+        self.account.deposit(50.0)
+        self.account.active_session = 2
+
+        #act
+        response = self.account.get_balance()
+
+        #assert
+        assert response.body == 0.0, "Balance cached for another session was returned"
+
+    def test_read_overlapping_write_is_not_cached(self):
+        #arrange
+        self.data_source.deposit.return_value = OperationResponse(OperationResponse.SUCCEED, 110.0)
+
+        def slow_read(*args, **kwargs):
+            # ответ на чтение отражает сервер до пополнения, но приходит после ответа на него
+            self.account.deposit(10.0)
+            return OperationResponse(OperationResponse.SUCCEED, 100.0)
+
+        self.data_source.get_balance.side_effect = slow_read
+
+        #act
+        stale = self.account.get_balance()
+        self.data_source.get_balance.side_effect = None
+        self.data_source.get_balance.return_value = OperationResponse(OperationResponse.SUCCEED, 110.0)
+        cached = self.account.get_balance()
+
+        #assert
+        assert stale.body == 100.0, "Read response is not returned to its caller"
+        assert cached.body == 110.0, "Stale read overwrote newer balance in cache"
+        assert self.data_source.get_balance.call_count == 1, "Balance from the later write was not kept"
+        assert self.cache.metrics.get("balance_cache.stale_fills") == 1, "Rejected stale fill is not counted"
+
+    def test_older_write_response_does_not_overwrite_newer(self):
+        #arrange
+        generation = self.cache.begin_write()
+        self.cache.put(1, 120.0, self.cache.begin_write())
+
+        #act
+        accepted = self.cache.put(1, 110.0, generation)
+
+        #assert
+        assert not accepted and self.cache.get(1) != 110.0, "Older write response overwrote newer balance"
+
+    def test_overlapping_writes_do_not_serve_pre_write_balance(self):
+        #arrange
+        self.data_source.get_balance.return_value = OperationResponse(OperationResponse.SUCCEED, 100.0)
+        self.account.get_balance()
+        balances = []
+
+        def deposit(login, session, amount, **kwargs):
+            if amount == 10.0:
+                return OperationResponse(OperationResponse.SUCCEED, 110.0)
+            # пополнение на 5 ещё ждёт ответа, а пополнение на 10 уже завершено
+            self.account.deposit(10.0)
+            self.data_source.get_balance.return_value = OperationResponse(OperationResponse.SUCCEED, 110.0)
+            balances.append(self.account.get_balance().body)
+            return OperationResponse(OperationResponse.SUCCEED, 115.0)
+
+        self.data_source.deposit.side_effect = deposit
+
+        #act
+        self.account.deposit(5.0)
+        self.data_source.get_balance.return_value = OperationResponse(OperationResponse.SUCCEED, 115.0)
+        after = self.account.get_balance()
+
+        #assert
+        assert balances == [110.0], "Balance from before a completed write was served from cache"
+        assert after.body == 115.0, "Balance cached from overlapping writes is not the server balance"
+
+    def test_read_during_unfinished_write_is_not_cached(self):
+        #arrange
+        generation = self.cache.begin_write()
+        read_generation = self.cache.begin_read()
+
+        #act
+        self.cache.put(1, 110.0, generation)
+        accepted = self.cache.put(1, 100.0, read_generation)
+        self.cache.end_write()
+
+        #assert
+        assert not accepted, "Read sent while a write was unfinished was cached"
+        assert self.cache.get(1) == 110.0, "Write response was not cached"
+
+    def test_batch_results_fill_cache(self):
+        #arrange
+        self.data_source.execute_batch.return_value = [OperationResponse(OperationResponse.SUCCEED, 10.0),
+                                                       OperationResponse(OperationResponse.SUCCEED, 7.0)]
+
+        #act
+        with self.account.batch() as batch:
+            batch.deposit(10.0)
+            batch.withdraw(3.0)
+        response = self.account.get_balance()
+
+        #assert
+        assert response.body == 7.0, "Cache does not hold balance after last batched operation"
+        assert self.data_source.get_balance.call_count == 0, "Balance read after batch went to server"
+
+
+class TestServerlessClientBalanceCache:
+    def setup_method(self):
+        self.auth_source = MockAuthorizationSource()
+        self.data_source = MockAccountDataSource()
+        self.client = Client(self.auth_source, self.data_source, balance_cache_ttl=60.0)
+
+    def test_client_saves_round_trips(self):
+        #arrange
+        account = self.client.register("user", "somePassword")
+        self.data_source.active_sessions["user"] = account.active_session
+        Client.deposit(account, 100.0)
+
+        #act
+        balances = [Client.get_balance(account) for _ in range(5)]
+
+        #assert
+        metrics = self.client.get_account_manager().metrics
+        assert balances == [100.0] * 5, "Cached balance through Client is incorrect"
+        assert metrics.get("balance_cache.hits") == 5, "Saved round trips are not counted"
+        assert metrics.get("balance_cache.misses") == 0, "Unexpected cache miss"
+
+    def test_logout_clears_cache(self):
+        #arrange
+        account = self.client.register("user", "somePassword")
+        self.data_source.active_sessions["user"] = account.active_session
+        Client.deposit(account, 100.0)
+
+        #act
+        self.client.logout(account)
+
+        #assert
+        assert account.balance_cache.get(account.active_session) is None, "Logout did not clear balance cache"
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from ru.hse.Account import Account
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AccountManager import AccountManager
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class SlowAuthorizationSource(MockAuthorizationSource):
+    # Задержка каждого запроса и учёт числа одновременных вызовов
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def call(self, method, *args):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+            return method(*args)
+
+    def register(self, login, password):
+        return self.call(super().register, login, password)
+
+    def login(self, login, password):
+        return self.call(super().login, login, password)
+
+
+class TestServerlessBulkAuth:
+    def setup_method(self):
+        self.auth_source = SlowAuthorizationSource(latency=0.02)
+        self.account_manager = AccountManager(self.auth_source, MockAccountDataSource())
+
+    def test_register_many_returns_results_in_input_order(self):
+        #arrange
+        credentials = [(f"user{i}", "password") for i in range(40)]
+        progress = []
+
+        #act
+        started = time.monotonic()
+        results = self.account_manager.register_many(iter(credentials), max_workers=8,
+                                                     progress=lambda done, total: progress.append((done, total)))
+        elapsed = time.monotonic() - started
+
+        #assert
+        assert [r.get_login() for r in results] == [login for login, _ in credentials], "Results are not in input order"
+        assert all(isinstance(r, Account) for r in results), "Some registrations failed"
+        assert self.auth_source.max_in_flight == 8, "Worker pool is not bounded by max_workers"
+        assert elapsed < 40 * 0.02 / 2, "Registrations were not run in parallel"
+        assert progress == [(i, 40) for i in range(1, 41)], "Progress callback reported wrong counts"
+
+    def test_login_many_reports_failures_per_login(self):
+        #arrange
+        self.account_manager.register_many([("user1", "password"), ("user2", "password")])
+        self.account_manager.logout(self.account_manager.active_accounts["user1"])
+
+        #act
+        results = self.account_manager.login_many([("user1", "password"), ("user2", "password"),
+                                                   ("ghost", "password"), ("", "password"), ("user1", "password")],
+                                                  max_workers=4)
+
+        #assert
+        accounts = [r for r in results if isinstance(r, Account)]
+        assert len(accounts) == 1 and accounts[0].get_login() == "user1", "Exactly one login of user1 should succeed"
+        codes = [r.response.code if isinstance(r, OperationException) else None for r in results]
+        assert codes[1:4] == [OperationResponse.ALREADY_LOGGED, OperationResponse.NO_USER_INCORRECT_PASSWORD,
+                              OperationResponse.NULL_ARGUMENT], "Failures are not mapped to their logins"
+        assert sorted(c for c in (codes[0], codes[4]) if c is not None) == [OperationResponse.ALREADY_LOGGED], \
+            "Duplicate login in one batch is not rejected"
+        assert len(self.account_manager.get_exceptions()) == 4, "Exceptions are not recorded in the manager"
+
+    def test_empty_input_and_invalid_concurrency(self):
+        #act & assert
+        assert self.account_manager.login_many([]) == [], "Empty input should give empty results"
+        with pytest.raises(ValueError):
+            self.account_manager.login_many([("user", "password")], max_workers=0)
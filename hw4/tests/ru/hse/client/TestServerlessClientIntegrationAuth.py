@@ -141,7 +141,7 @@ class TestServerlessClientIntegrationAuth:
         session_id = 1
         client = Client(self.auth_source, self.data_source)
         a = Account(correct_login)  # white box :(
-        a.activeSession = session_id
+        a.active_session = session_id
         a.init_data_storage(self.data_source)
 
         # act
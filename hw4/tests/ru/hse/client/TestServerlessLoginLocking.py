@@ -0,0 +1,106 @@
+import threading
+
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AccountManager import AccountManager
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class GatedAuthorizationSource(MockAuthorizationSource):
+    # login/logout сообщают о входе и ждут открытия gate, как медленный сервер
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.entered = threading.Semaphore(0)
+        self.lock = threading.Lock()
+        self.login_calls = 0
+
+    def login(self, login, password):
+        with self.lock:
+            self.login_calls += 1
+        self.entered.release()
+        self.gate.wait()
+        with self.lock:
+            return super().login(login, password)
+
+    def logout(self, login, active_session):
+        self.entered.release()
+        self.gate.wait()
+        with self.lock:
+            return super().logout(login, active_session)
+
+
+class TestServerlessLoginLocking:
+    def setup_method(self):
+        self.auth_source = GatedAuthorizationSource()
+        for user in ("user1", "user2", "user3"):
+            self.auth_source.registered_users[user] = AccountManager.get_encoded_password("password")
+        self.account_manager = AccountManager(self.auth_source, MockAccountDataSource())
+
+    def start(self, target, *args):
+        results = {}
+        thread = threading.Thread(target=lambda: results.setdefault("value", target(*args)))
+        thread.start()
+        return thread, results
+
+    def test_different_users_login_in_parallel(self):
+        #arrange
+        # полоса выбирается по hash(login): берутся пользователи из разных полос
+        users = {}
+        for i in range(1000):
+            users.setdefault(id(self.account_manager.login_lock(f"user{i}")), f"user{i}")
+        users = sorted(users.values())[:3]
+        for user in users:
+            self.auth_source.registered_users[user] = AccountManager.get_encoded_password("password")
+        started = [self.start(self.account_manager.login, user, "password") for user in users]
+
+        #act
+        entered = all(self.auth_source.entered.acquire(timeout=5) for _ in started)
+        self.auth_source.gate.set()
+        for thread, _ in started:
+            thread.join()
+
+        #assert
+        assert entered, "Logins of different users were serialized behind one server call"
+        assert all(results["value"] is not None for _, results in started), "Parallel logins failed"
+        assert sorted(self.account_manager.active_accounts) == users, "Accounts are not stored"
+
+    def test_same_user_login_is_not_duplicated(self):
+        #arrange
+        first, first_results = self.start(self.account_manager.login, "user1", "password")
+        assert self.auth_source.entered.acquire(timeout=5), "First login did not reach the server"
+        second, second_results = self.start(self.account_manager.login, "user1", "password")
+
+        #act
+        second_entered = self.auth_source.entered.acquire(timeout=0.2)
+        self.auth_source.gate.set()
+        first.join()
+        second.join()
+
+        #assert
+        assert not second_entered and self.auth_source.login_calls == 1, "Second login of the same user reached the server"
+        assert first_results["value"] is not None and second_results["value"] is None, "Exactly one login should succeed"
+        codes = [e.response.code for e in self.account_manager.get_exceptions()]
+        assert codes == [OperationResponse.ALREADY_LOGGED], "Duplicate login is not reported as ALREADY_LOGGED"
+
+    def test_logout_waits_for_login_of_same_user(self):
+        #arrange
+        self.auth_source.gate.set()
+        account = self.account_manager.login("user1", "password")
+        self.auth_source.gate.clear()
+        self.auth_source.entered.acquire()
+        logout, logout_results = self.start(self.account_manager.logout, account)
+        assert self.auth_source.entered.acquire(timeout=5), "Logout did not reach the server"
+        login, login_results = self.start(self.account_manager.login, "user1", "password")
+
+        #act
+        login_entered = self.auth_source.entered.acquire(timeout=0.2)
+        self.auth_source.gate.set()
+        logout.join()
+        login.join()
+
+        #assert
+        assert not login_entered, "Login of the same user ran concurrently with its logout"
+        assert logout_results["value"] is True and login_results["value"] is not None, "Logout then login should succeed"
+        assert self.account_manager.active_accounts["user1"] is login_results["value"], "Active account is not replaced"
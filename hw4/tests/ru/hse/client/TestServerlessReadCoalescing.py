@@ -0,0 +1,159 @@
+import threading
+import time
+
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.Client import Client
+from ru.hse.client.CoalescingAccountDataSource import CoalescingAccountDataSource
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class GatedAccountDataSource(MockAccountDataSource):
+    # get_balance запоминает баланс в момент вызова и ждёт открытия gate
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.entered = threading.Semaphore(0)
+        self.balance_calls = 0
+
+    def get_balance(self, login, session, deadline=None):
+        self.balance_calls += 1
+        response = super().get_balance(login, session)
+        self.entered.release()
+        self.gate.wait()
+        return response
+
+
+class TestServerlessReadCoalescing:
+    def setup_method(self):
+        self.source = GatedAccountDataSource()
+        self.source.active_sessions["user"] = 1
+        self.source.balances["user"] = 10.0
+        self.coalescing = CoalescingAccountDataSource(self.source)
+
+    def start_reads(self, count, session=1):
+        results = [None] * count
+
+        def read(i):
+            results[i] = self.coalescing.get_balance("user", session)
+
+        threads = [threading.Thread(target=read, args=(i,)) for i in range(count)]
+        for t in threads:
+            t.start()
+        return threads, results
+
+    def test_concurrent_reads_share_one_request(self):
+        #arrange
+        threads, results = self.start_reads(1)
+        self.source.entered.acquire()
+        more_threads, more_results = self.start_reads(9)
+        wait_until = time.monotonic() + 5
+        while self.coalescing.metrics.get("coalesce.joined") < 9 and time.monotonic() < wait_until:
+            time.sleep(0.01)
+
+        #act
+        self.source.gate.set()
+        for t in threads + more_threads:
+            t.join()
+
+        #assert
+        assert self.source.balance_calls == 1, "Concurrent identical reads were not coalesced"
+        assert all(r is results[0] for r in more_results), "Coalesced readers received different responses"
+        assert self.coalescing.metrics.get("coalesce.joined") == 9, "Joined readers are not counted"
+
+    def test_different_sessions_not_coalesced(self):
+        #arrange
+        self.source.gate.set()
+
+        #act
+        first = self.coalescing.get_balance("user", 1)
+        second = self.coalescing.get_balance("user", 2)
+
+        #assert
+        assert self.source.balance_calls == 2, "Reads of different sessions were coalesced"
+        assert first.code == OperationResponse.SUCCEED and second.code == OperationResponse.INCORRECT_SESSION, \
+            "Responses of different sessions were mixed"
+
+    def test_completed_write_is_barrier_for_new_reads(self):
+        #arrange
+        threads, results = self.start_reads(1)
+        self.source.entered.acquire()
+
+        #act
+        deposit = self.coalescing.deposit("user", 1, 5.0)
+        late_threads, late_results = self.start_reads(1)
+        self.source.entered.acquire()
+        self.source.gate.set()
+        for t in threads + late_threads:
+            t.join()
+
+        #assert
+        assert deposit.body == 15.0, "Deposit through coalescing source failed"
+        assert results[0].body == 10.0, "Read started before write changed its answer"
+        assert late_results[0].body == 15.0, "Read after completed write returned stale balance"
+        assert self.source.balance_calls == 2, "Read after write joined in-flight request"
+
+    def test_follower_deadline_expires(self):
+        #arrange
+        threads, _ = self.start_reads(1)
+        self.source.entered.acquire()
+
+        #act
+        response = self.coalescing.get_balance("user", 1, deadline=time.monotonic() + 0.05)
+        self.source.gate.set()
+        for t in threads:
+            t.join()
+
+        #assert
+        assert response is OperationResponse.DEADLINE_EXCEEDED_RESPONSE, "Follower ignored its own deadline"
+
+    def test_base_exception_in_leader_is_reported_to_joined_readers(self):
+        #arrange
+        raised = []
+
+        def interrupted(login, session, deadline=None):
+            self.source.entered.release()
+            self.source.gate.wait()
+            raise KeyboardInterrupt()
+
+        def leader():
+            try:
+                self.coalescing.get_balance("user", 1)
+            except BaseException as e:
+                raised.append(e)
+
+        self.source.get_balance = interrupted
+        first = threading.Thread(target=leader)
+        first.start()
+        self.source.entered.acquire()
+        threads, results = self.start_reads(3)
+        wait_until = time.monotonic() + 5
+        while self.coalescing.metrics.get("coalesce.joined") < 3 and time.monotonic() < wait_until:
+            time.sleep(0.01)
+
+        #act
+        self.source.gate.set()
+        for t in [first] + threads:
+            t.join(5)
+
+        #assert
+        assert len(raised) == 1 and isinstance(raised[0], KeyboardInterrupt), "Leader did not raise"
+        assert all(r is not None and r.code == OperationResponse.UNDEFINED_ERROR for r in results), \
+            "Joined readers did not get UNDEFINED ERROR"
+
+    def test_client_coalesce_reads_option(self):
+        #arrange
+        self.source.gate.set()
+        auth_source = MockAuthorizationSource()
+        client = Client(auth_source, self.source, coalesce_reads=True)
+        account = client.register("user2", "somePassword")
+        self.source.active_sessions["user2"] = account.active_session
+
+        #act
+        Client.deposit(account, 7.0)
+        balance = Client.get_balance(account)
+
+        #assert
+        assert isinstance(account.storage, CoalescingAccountDataSource), "Client did not wrap data source"
+        assert balance == 7.0, "Balance through coalescing client is incorrect"
@@ -0,0 +1,226 @@
+import threading
+import time
+
+import pytest
+
+from ru.hse.OperationException import OperationException
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AccountManager import AccountManager
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestServerlessSessionEviction:
+    def setup_method(self):
+        self.auth_source = MockAuthorizationSource()
+        self.managers = []
+
+    def teardown_method(self):
+        for manager in self.managers:
+            manager.close()
+
+    def manager(self, **kwargs):
+        manager = AccountManager(self.auth_source, MockAccountDataSource(), **kwargs)
+        self.managers.append(manager)
+        return manager
+
+    def register(self, manager, count):
+        return manager.register_many([(f"user{i}", "password") for i in range(count)], max_workers=1)
+
+    def test_idle_sessions_are_logged_out(self):
+        #arrange
+        manager = self.manager(session_idle_timeout=60, eviction_interval=3600, eviction_batch_size=2)
+        accounts = self.register(manager, 5)
+        now = time.monotonic()
+        for account in accounts[:3]:
+            account.last_used = now - 120
+
+        #act
+        evicted = manager.session_evictor.evict(now)
+
+        #assert
+        assert evicted == 3, "Idle sessions were not evicted"
+        assert sorted(manager.active_accounts) == ["user3", "user4"], "Active sessions were evicted"
+        assert sorted(self.auth_source.active_sessions) == ["user3", "user4"], "Evicted sessions are alive on server"
+        assert manager.metrics.get("sessions.evicted.idle") == 3, "Idle eviction metric is incorrect"
+        assert manager.metrics.get("sessions.active") == 2, "Active sessions gauge is incorrect"
+
+    def test_capacity_evicts_least_recently_used_in_background(self):
+        #arrange
+        manager = self.manager(max_active_accounts=3, eviction_interval=3600)
+        accounts = self.register(manager, 3)
+        accounts[0].last_used, accounts[1].last_used, accounts[2].last_used = 30.0, 10.0, 20.0
+
+        #act
+        extra = manager.register("extra", "password")
+        evicted = wait_until(lambda: len(manager.active_accounts) == 3)
+
+        #assert
+        assert extra is not None and evicted, "Capacity overflow did not wake the evictor"
+        assert sorted(manager.active_accounts) == ["extra", "user0", "user2"], "Not the least recently used was evicted"
+        assert manager.metrics.get("sessions.evicted.capacity") == 1, "Capacity eviction metric is incorrect"
+
+    def test_account_used_after_selection_is_kept(self):
+        #arrange
+        manager = self.manager(session_idle_timeout=60, eviction_interval=3600)
+        account = self.register(manager, 1)[0]
+        account.last_used -= 120
+        victims = manager.session_evictor.select(time.monotonic())
+
+        #act
+        account.get_balance()
+        evicted = [manager.evict(victim, used) for victim, used, _ in victims]
+
+        #assert
+        assert evicted == [False], "Account used after selection was evicted"
+        assert "user0" in manager.active_accounts, "Used account is no longer active"
+
+    def test_evicted_account_can_log_in_again(self):
+        #arrange
+        manager = self.manager(session_idle_timeout=60, eviction_interval=3600)
+        account = self.register(manager, 1)[0]
+        account.last_used -= 120
+        manager.session_evictor.evict()
+
+        #act
+        again = manager.login("user0", "password")
+
+        #assert
+        assert again is not None and again is not account, "Evicted account could not log in again"
+        assert account.get_balance().code in (OperationResponse.NOT_LOGGED, OperationResponse.INCORRECT_SESSION), \
+            "Evicted session is still valid"
+
+    def test_invalid_configuration(self):
+        #act & assert
+        with pytest.raises(ValueError):
+            AccountManager(self.auth_source, MockAccountDataSource(), max_active_accounts=0)
+
+    def slow_logout(self, delay=None):
+        # logout сервера, который ждёт release (или delay секунд); entered - logout начат
+        entered, release = threading.Event(), threading.Event()
+        logout = self.auth_source.logout
+
+        def slow(login, session):
+            entered.set()
+            release.wait(5 if delay is None else delay)
+            return logout(login, session)
+
+        self.auth_source.logout = slow
+        return entered, release
+
+    def test_eviction_logout_does_not_block_login_lock_stripe(self):
+        #arrange
+        manager = self.manager(session_idle_timeout=60, eviction_interval=3600, login_lock_stripes=1)
+        account = self.register(manager, 1)[0]
+        account.last_used -= 120
+        entered, release = self.slow_logout()
+        evictor = threading.Thread(target=manager.session_evictor.evict)
+        evictor.start()
+        entered.wait(5)
+
+        #act
+        started = time.monotonic()
+        other = manager.register("other", "password")
+        elapsed = time.monotonic() - started
+        still_active = "user0" in manager.active_accounts
+        release.set()
+        evictor.join()
+
+        #assert
+        assert other is not None and elapsed < 1.0, "Register waited for the eviction logout"
+        assert still_active, "Account was removed before the eviction logout finished"
+        assert "user0" not in manager.active_accounts, "Evicted account is still active"
+        assert "user0" not in self.auth_source.active_sessions, "Evicted session is alive on server"
+
+    def test_login_during_eviction_waits_for_logout(self):
+        #arrange
+        manager = self.manager(session_idle_timeout=0.05, eviction_interval=3600)
+        account = self.register(manager, 1)[0]
+        account.last_used -= 1
+        entered, _ = self.slow_logout(delay=0.3)
+        evictor = threading.Thread(target=manager.session_evictor.evict)
+        evictor.start()
+        entered.wait(5)
+        cursor = manager.exceptions_cursor()
+
+        #act
+        again = manager.login("user0", "password")
+        evictor.join()
+
+        #assert
+        assert again is not None and again is not account, \
+            f"Login during eviction failed: {manager.get_exceptions_since(cursor)!r}"
+        assert manager.active_accounts.get("user0") is again, "Eviction removed the new session"
+        assert self.auth_source.active_sessions.get("user0") == again.active_session, "New session is not alive on server"
+        manager.release_exceptions_cursor(cursor)
+
+    def test_no_scan_below_capacity_without_idle_timeout(self):
+        #arrange
+        manager = self.manager(max_active_accounts=10, eviction_interval=3600)
+        self.register(manager, 5)
+        checks = []
+        is_active = manager.session_evictor.is_active
+        manager.session_evictor.is_active = lambda account: checks.append(account) or is_active(account)
+
+        #act
+        evicted = manager.session_evictor.evict()
+
+        #assert
+        assert evicted == 0 and len(manager.active_accounts) == 5, "Sessions below capacity were evicted"
+        assert not checks, "Evictor walked sessions while below capacity"
+
+    def test_idle_selection_does_not_walk_all_sessions(self):
+        #arrange
+        manager = self.manager(session_idle_timeout=60, eviction_interval=3600)
+        accounts = self.register(manager, 1000)
+        now = time.monotonic()
+        for account in accounts[500:503]:
+            account.last_used = now - 120
+        checks = []
+        is_active = manager.session_evictor.is_active
+        manager.session_evictor.is_active = lambda account: checks.append(account) or is_active(account)
+
+        #act
+        victims = manager.session_evictor.select(now)
+
+        #assert
+        assert sorted(account.get_login() for account, _, _ in victims) == ["user500", "user501", "user502"], \
+            "Idle sessions were not selected"
+        assert len(checks) < 20, f"Selection checked {len(checks)} sessions instead of the idle ones"
+
+    def test_batch_logouts_are_sent_concurrently(self):
+        #arrange
+        manager = self.manager(session_idle_timeout=60, eviction_interval=3600, eviction_batch_size=4)
+        accounts = self.register(manager, 4)
+        for account in accounts:
+            account.last_used -= 120
+        self.slow_logout(delay=0.2)
+
+        #act
+        started = time.monotonic()
+        evicted = manager.session_evictor.evict()
+        elapsed = time.monotonic() - started
+
+        #assert
+        assert evicted == 4 and not manager.active_accounts, "Idle sessions were not evicted"
+        assert elapsed < 0.6, f"Logouts of one batch were sent one by one ({elapsed:.2f}s)"
+
+    def test_evictor_thread_not_started_when_init_fails(self):
+        #arrange
+        before = {t for t in threading.enumerate() if t.name == "session-evictor"}
+
+        #act
+        with pytest.raises(OperationException):
+            AccountManager(None, None, session_idle_timeout=60)
+
+        #assert
+        after = {t for t in threading.enumerate() if t.name == "session-evictor" and t.is_alive()}
+        assert after <= before, "Evictor thread leaked after failed init"
@@ -0,0 +1,141 @@
+import os
+
+import pytest
+
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.AccountManager import AccountManager
+from ru.hse.client.RestoredAccount import RestoredAccount
+from ru.hse.client.SessionSnapshot import SessionSnapshot
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+
+
+class MockBank(MockAuthorizationSource, MockAccountDataSource):
+    # Сервер в памяти: оба мока хранят сессии в общем active_sessions
+    def __init__(self):
+        MockAuthorizationSource.__init__(self)
+        MockAccountDataSource.__init__(self)
+        self.login_calls = 0
+
+    def login(self, login, password):
+        self.login_calls += 1
+        return MockAuthorizationSource.login(self, login, password)
+
+
+class TestSessionSnapshot:
+    def setup_method(self):
+        self.bank = MockBank()
+        self.manager = AccountManager(self.bank, self.bank)
+        for login in ("user1", "user2", "пользователь"):
+            self.manager.register(login, "password")
+
+    def restarted_manager(self, path, password_provider=None):
+        manager = AccountManager(self.bank, self.bank)
+        restored = manager.restore_sessions(path, password_provider)
+        return manager, restored
+
+    def test_restore_without_login_storm(self, tmp_path):
+        #arrange
+        path = str(tmp_path / "sessions.bin")
+        saved = self.manager.save_sessions(path)
+
+        #act
+        manager, restored = self.restarted_manager(path)
+        account = manager.active_accounts["user1"]
+        balance = account.deposit(10.0)
+
+        #assert
+        assert saved == restored == 3, "Not all sessions were saved and restored"
+        assert {login: a.active_session for login, a in manager.active_accounts.items()} == \
+            {login: a.active_session for login, a in self.manager.active_accounts.items()}, "Sessions changed"
+        assert self.bank.login_calls == 0, "Restore logged in again"
+        assert balance.code == OperationResponse.SUCCEED and balance.body == 10.0, "Restored session is not usable"
+        assert manager.login("user2", "password") is None, "Restored session does not block duplicate login"
+
+    def test_data_source_is_bound_lazily(self, tmp_path):
+        #arrange
+        path = str(tmp_path / "sessions.bin")
+        self.manager.save_sessions(path)
+        manager, _ = self.restarted_manager(path)
+        account = manager.active_accounts["user1"]
+
+        #act
+        bound_before = account.bound_storage
+        account.get_balance()
+
+        #assert
+        assert isinstance(account, RestoredAccount) and bound_before is None, "Data source was bound eagerly"
+        assert account.bound_storage is self.bank, "Data source was not bound on first use"
+
+    def test_stale_session_is_reestablished(self, tmp_path):
+        #arrange
+        path = str(tmp_path / "sessions.bin")
+        self.manager.save_sessions(path)
+        self.bank.active_sessions.clear()
+        manager, _ = self.restarted_manager(path, password_provider=lambda login: "password")
+        account = manager.active_accounts["user1"]
+        old_session = account.active_session
+
+        #act
+        response = account.get_balance()
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED, "Operation was not retried after re-login"
+        assert account.active_session != old_session and self.bank.login_calls == 1, "Session was not re-established"
+        assert manager.metrics.get("sessions.reestablished") == 1, "Re-establish metric is missing"
+
+    def test_foreign_session_is_adopted(self, tmp_path):
+        #arrange
+        path = str(tmp_path / "sessions.bin")
+        self.manager.save_sessions(path)
+        self.bank.active_sessions["user1"] = 1000
+        manager, _ = self.restarted_manager(path, password_provider=lambda login: "password")
+        account = manager.active_accounts["user1"]
+
+        #act
+        response = account.deposit(1.0)
+
+        #assert
+        assert response.code == OperationResponse.SUCCEED and account.active_session == 1000, \
+            "Session reported by ALREADY_LOGGED was not adopted"
+
+    def test_stale_session_without_password_is_dropped(self, tmp_path):
+        #arrange
+        path = str(tmp_path / "sessions.bin")
+        self.manager.save_sessions(path)
+        self.bank.active_sessions.clear()
+        manager, _ = self.restarted_manager(path)
+
+        #act
+        response = manager.active_accounts["user1"].get_balance()
+
+        #assert
+        assert response.code == OperationResponse.NOT_LOGGED, "Stale session error was hidden"
+        assert "user1" not in manager.active_accounts, "Stale session was kept"
+        assert manager.login("user1", "password") is not None, "Login after dropped session failed"
+
+    def test_snapshot_file_is_replaced_atomically(self, tmp_path):
+        #arrange
+        path = str(tmp_path / "sessions.bin")
+        SessionSnapshot.write(path, [("old", 1)])
+
+        #act
+        SessionSnapshot.write(path, [("user", 2 ** 40), ("другой", 7)])
+
+        #assert
+        assert list(SessionSnapshot.read(path)) == [("user", 2 ** 40), ("другой", 7)], "Snapshot content is wrong"
+        assert os.listdir(tmp_path) == ["sessions.bin"], "Temporary file was left behind"
+
+    def test_broken_snapshot_is_rejected(self, tmp_path):
+        #arrange
+        path = tmp_path / "sessions.bin"
+        SessionSnapshot.write(str(path), [("user", 1)])
+        path.write_bytes(path.read_bytes()[:-2])
+
+        #act & assert
+        with pytest.raises(ValueError):
+            list(SessionSnapshot.read(str(path)))
+        path.write_bytes(b"garbage")
+        with pytest.raises(ValueError):
+            list(SessionSnapshot.read(str(path)))
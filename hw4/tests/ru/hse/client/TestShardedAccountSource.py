@@ -0,0 +1,178 @@
+import sys
+import threading
+from collections import Counter
+
+import pytest
+
+from ru.hse.OperationResponse import OperationResponse
+from ru.hse.client.Client import Client
+from ru.hse.client.ConsistentHashRing import ConsistentHashRing
+from ru.hse.client.ShardedAccountSource import ShardedAccountSource
+
+from MockAccountDataSource import MockAccountDataSource
+from MockAuthorizationSource import MockAuthorizationSource
+from StandInServer import StandInServer
+
+LOGINS = [f"user{i}" for i in range(20000)]
+
+
+class MockShard(MockAuthorizationSource, MockAccountDataSource):
+    # Узел банка в памяти: оба мока хранят сессии в общем active_sessions
+    def __init__(self):
+        MockAuthorizationSource.__init__(self)
+        MockAccountDataSource.__init__(self)
+        self.batches = []
+
+    def execute_batch(self, ops):
+        self.batches.append([op[1] for op in ops])
+        return MockAccountDataSource.execute_batch(self, ops)
+
+
+class TestConsistentHashRing:
+    def test_keys_are_spread_evenly(self):
+        #arrange
+        ring = ConsistentHashRing(["a", "b", "c", "d"])
+
+        #act
+        counts = Counter(ring.node_for(login) for login in LOGINS)
+
+        #assert
+        assert sorted(counts) == ["a", "b", "c", "d"], "Some nodes own no keys"
+        assert all(0.18 < count / len(LOGINS) < 0.32 for count in counts.values()), f"Uneven spread: {counts}"
+
+    def test_adding_node_moves_about_one_nth(self):
+        #arrange
+        ring = ConsistentHashRing(["a", "b", "c", "d"])
+        before = {login: ring.node_for(login) for login in LOGINS}
+
+        #act
+        ring.add("e")
+        moved = [login for login in LOGINS if ring.node_for(login) != before[login]]
+
+        #assert
+        assert all(ring.node_for(login) == "e" for login in moved), "Keys moved between old nodes"
+        assert 0.12 < len(moved) / len(LOGINS) < 0.28, f"Moved {len(moved)} of {len(LOGINS)} keys instead of ~1/5"
+
+    def test_removing_node_moves_only_its_keys(self):
+        #arrange
+        ring = ConsistentHashRing(["a", "b", "c", "d"])
+        before = {login: ring.node_for(login) for login in LOGINS}
+
+        #act
+        ring.remove("b")
+
+        #assert
+        moved = {login for login in LOGINS if ring.node_for(login) != before[login]}
+        assert moved == {login for login in LOGINS if before[login] == "b"}, "Keys of remaining nodes moved"
+
+    def test_routing_is_stable_and_validated(self):
+        #act & assert
+        assert ConsistentHashRing(["a", "b"]).node_for("user") == ConsistentHashRing(["b", "a"]).node_for("user"), \
+            "Routing depends on node insertion order"
+        with pytest.raises(LookupError):
+            ConsistentHashRing().node_for("user")
+        with pytest.raises(ValueError):
+            ConsistentHashRing(["a", "a"])
+
+
+class TestShardedAccountSource:
+    def setup_method(self):
+        self.shards = {name: MockShard() for name in ("a", "b", "c")}
+        self.sharded = ShardedAccountSource(self.shards)
+
+    def test_login_and_operations_go_to_owning_shard(self):
+        #arrange
+        client = Client(self.sharded, self.sharded)
+
+        #act
+        accounts = [client.register(f"user{i}", "password") for i in range(30)]
+        for account in accounts:
+            client.deposit(account, 10.0)
+
+        #assert
+        for account in accounts:
+            owner = self.shards[self.sharded.shard_for(account.get_login())]
+            assert account.get_login() in owner.registered_users, "User registered on a wrong shard"
+            others = [s for name, s in self.shards.items() if s is not owner]
+            assert all(account.get_login() not in s.registered_users for s in others), "User registered twice"
+        assert all(len(s.registered_users) > 0 for s in self.shards.values()), "Some shards got no users"
+
+    def test_batch_is_split_per_shard_in_order(self):
+        #arrange
+        ops = [("balance", f"user{i}", 1, None) for i in range(12)]
+
+        #act
+        results = self.sharded.execute_batch(ops)
+
+        #assert
+        assert len(results) == 12 and all(r.code == OperationResponse.NOT_LOGGED for r in results), \
+            "Batch results are missing"
+        for name, shard in self.shards.items():
+            expected = [op[1] for op in ops if self.sharded.shard_for(op[1]) == name]
+            assert shard.batches == ([expected] if expected else []), "Batch was not grouped by shard"
+
+    def test_remove_last_shard_is_rejected(self):
+        #arrange
+        self.sharded.remove_shard("a")
+        self.sharded.remove_shard("b")
+
+        #act & assert
+        with pytest.raises(ValueError):
+            self.sharded.remove_shard("c")
+
+    def test_lookups_during_shard_changes(self):
+        #arrange
+        stop = threading.Event()
+        errors = []
+
+        def reader():
+            while not stop.is_set():
+                for login in LOGINS[:200]:
+                    try:
+                        self.sharded.source_for(login)
+                    except Exception as e:
+                        errors.append(e)
+
+        def writer():
+            for _ in range(100):
+                self.sharded.add_shard("d", MockShard())
+                self.sharded.remove_shard("d")
+
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        # частые переключения потоков, чтобы поиск чаще попадал между изменениями кольца и словаря узлов
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        #act
+        try:
+            for t in readers:
+                t.start()
+            writer()
+        finally:
+            stop.set()
+            for t in readers:
+                t.join()
+            sys.setswitchinterval(interval)
+
+        #assert
+        assert not errors, f"Lookup failed while shards were changing: {errors[:3]!r}"
+        assert sorted(self.sharded.shards) == ["a", "b", "c"], "Shard set is incorrect after changes"
+
+    def test_client_over_several_urls(self):
+        #arrange
+        with StandInServer() as first, StandInServer() as second:
+            client = Client([first.url, second.url], None)
+            sharded = client.get_account_manager().server_auth_data
+
+            #act
+            accounts = [client.register(f"user{i}", "password") for i in range(20)]
+            balances = [client.deposit(account, 5.0) for account in accounts]
+            sharded.close()
+
+        #assert
+        assert balances == [5.0] * 20, "Operations through sharded client failed"
+        assert set(first.bank.passwords) | set(second.bank.passwords) == {f"user{i}" for i in range(20)}, \
+            "Users are lost"
+        assert not set(first.bank.passwords) & set(second.bank.passwords), "User registered on both servers"
+        assert sharded.shards[first.url].transport is not sharded.shards[second.url].transport, \
+            "Shards share a connection pool"